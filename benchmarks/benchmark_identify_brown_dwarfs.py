@@ -0,0 +1,107 @@
+"""
+Benchmark of Catalog.identify_brown_dwarfs on the Exoplanet Encyclopaedia table.
+
+The vectorized implementation is compared against the original row-by-row loop,
+checking that both produce identical 'letter' and 'binary' columns.
+
+Usage (from a folder where 'exomercat input' has been run):
+
+    python benchmarks/benchmark_identify_brown_dwarfs.py InputSources/eu_init2024-01-01.csv
+
+If no file is given, the most recent InputSources/eu_init*.csv is used.
+"""
+
+import argparse
+import glob
+import re
+import sys
+import timeit
+
+import pandas as pd
+
+from exomercat.catalogs import Catalog
+
+
+def identify_brown_dwarfs_loop(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Original row-by-row implementation of Catalog.identify_brown_dwarfs.
+
+    :param data: The DataFrame containing the 'name', 'letter' and 'binary' columns
+    :type data: pd.DataFrame
+    :return: The updated DataFrame
+    :rtype: pd.DataFrame
+    """
+    for i in data.index:
+        if "PSR B1257+12" not in data.at[i, "name"]:
+            if not str(re.search("\\d$", data.at[i, "name"], re.M)) == "None":
+                if data.at[i, "name"][-3:-1] != ".0":
+                    data.at[i, "letter"] = "BD"
+            if not str(re.search("[aABCD]$", data.at[i, "name"], re.M)) == "None":
+                data.at[i, "letter"] = "BD"
+                data.at[i, "binary"] = data.at[i, "name"][-1:]
+            if len(re.findall(r"\(.*?\)$", data.at[i, "name"])) > 0:
+                data.at[i, "letter"] = "BD"
+                data.at[i, "binary"] = (
+                    re.findall(r"\(.*?\)$", data.at[i, "name"])[0]
+                    .strip("(")
+                    .strip(")")
+                )
+    return data
+
+
+def identify_brown_dwarfs_vectorized(data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Run the current Catalog.identify_brown_dwarfs implementation.
+
+    :param data: The DataFrame containing the 'name', 'letter' and 'binary' columns
+    :type data: pd.DataFrame
+    :return: The updated DataFrame
+    :rtype: pd.DataFrame
+    """
+    cat = Catalog()
+    cat.data = data
+    cat.identify_brown_dwarfs()
+    return cat.data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("file", nargs="?", help="EU catalog .csv file")
+    parser.add_argument(
+        "-n", "--number", type=int, default=5, help="number of runs (default: 5)"
+    )
+    parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=1,
+        help="replicate the table to simulate larger catalogs (default: 1)",
+    )
+    args = parser.parse_args()
+
+    file_path = args.file
+    if file_path is None:
+        files = sorted(glob.glob("InputSources/eu_init*.csv"))
+        if len(files) == 0:
+            sys.exit("No EU catalog found. Run 'exomercat input' or give a file.")
+        file_path = files[-1]
+
+    names = pd.read_csv(file_path, usecols=["name"])["name"].fillna("").astype(str)
+    names = pd.concat([names] * args.repeat, ignore_index=True)
+    base = pd.DataFrame({"name": names, "binary": "", "letter": ""})
+
+    loop_result = identify_brown_dwarfs_loop(base.copy())
+    vectorized_result = identify_brown_dwarfs_vectorized(base.copy())
+    pd.testing.assert_frame_equal(loop_result, vectorized_result)
+
+    print(file_path + ": " + str(len(base)) + " rows, identical results.")
+    for label, function in [
+        ("loop", identify_brown_dwarfs_loop),
+        ("vectorized", identify_brown_dwarfs_vectorized),
+    ]:
+        elapsed = timeit.timeit(lambda: function(base.copy()), number=args.number)
+        print(label.ljust(12) + "%.4f s per run" % (elapsed / args.number))
+
+
+if __name__ == "__main__":
+    main()
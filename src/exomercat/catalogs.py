@@ -288,35 +288,46 @@ class Catalog:
         :rtype: None
         """
 
-        for i in self.data.index:
-            # Known weird candidates
-            if "PSR B1257+12" not in self.data.at[i, "name"]:
-                if not str(re.search("\\d$", self.data.at[i, "name"], re.M)) == "None":
-                    if self.data.at[i, "name"][-3:-1] != ".0":
-                        self.data.at[i, "letter"] = "BD"
-                if (
-                    not str(re.search("[aABCD]$", self.data.at[i, "name"], re.M))
-                    == "None"
-                ):
-                    self.data.at[i, "letter"] = "BD"
-                    self.data.at[i, "binary"] = self.data.at[i, "name"][
-                        -1:
-                    ]  # so that we avoid binary systems to get merged
-
-                # 03/27/2024 add special case for problematic triple BD system DENIS J063001.4-184014 (bc)
-                # and all those whose name ends with parenthesis
-                if len(re.findall(r"\(.*?\)$", self.data.at[i, "name"])) > 0:
-                    self.data.at[i, "letter"] = "BD"
-                    self.data.at[i, "binary"] = (
-                        re.findall(r"\(.*?\)$", self.data.at[i, "name"])[0]
-                        .strip("(")
-                        .strip(")")
-                    )
+        names = self.data["name"]
+        # Known weird candidates
+        candidates = ~names.str.contains("PSR B1257+12", regex=False, na=False)
+
+        # Names ending with a digit (but not KOI-like ".0d" names)
+        ends_with_digit = (
+            candidates
+            & names.str.contains("\\d$", flags=re.M, na=False)
+            & (names.str[-3:-1] != ".0")
+        )
+        self.data.loc[ends_with_digit, "letter"] = "BD"
+
+        # Names ending with a binary letter
+        ends_with_binary = candidates & names.str.contains(
+            "[aABCD]$", flags=re.M, na=False
+        )
+        self.data.loc[ends_with_binary, "letter"] = "BD"
+        # so that we avoid binary systems to get merged
+        self.data.loc[ends_with_binary, "binary"] = (
+            names[ends_with_binary].str[-1:].to_numpy()
+        )
+
+        # 03/27/2024 add special case for problematic triple BD system DENIS J063001.4-184014 (bc)
+        # and all those whose name ends with parenthesis
+        parenthesis = names.str.extract(r"(\(.*?\)$)", expand=False)
+        ends_with_parenthesis = candidates & parenthesis.notna()
+        self.data.loc[ends_with_parenthesis, "letter"] = "BD"
+        self.data.loc[ends_with_parenthesis, "binary"] = (
+            parenthesis[ends_with_parenthesis]
+            .str.strip("(")
+            .str.strip(")")
+            .to_numpy()
+        )
 
         # Logging
         logging.info("Identified possible Brown Dwarfs (no letter for planet name).")
 
-    def replace_known_mistakes(self) -> None:
+    def replace_known_mistakes(
+        self, log_file: str = "Logs/replace_known_mistakes.txt"
+    ) -> None:
         """
         Replace known errors in the dataframe based on predefined rules.
 
@@ -325,6 +336,8 @@ class Catalog:
 
         :param self: An instance of class Catalog
         :type self: Catalog
+        :param log_file: The file where unused replacements are logged (in append mode)
+        :type log_file: str
         :return: None
         :rtype: None
         """
@@ -348,7 +361,7 @@ class Catalog:
                 ]
 
         # Open file to log unused replacements
-        f = open("Logs/replace_known_mistakes.txt", "a")
+        f = open(log_file, "a")
         f.write("**** UNUSED REPLACEMENTS FOR " + self.name + " ****\n")
 
         # NAME to change NAME section
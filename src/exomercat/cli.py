@@ -9,6 +9,11 @@ from .epic import Epic
 from .emc import Emc
 from .koi import Koi
 from .toi import Toi
+from .identifier_cache import IdentifierCache
+from .query_recorder import QueryRecorder
+from .simbad_snapshot import SimbadSnapshot
+from .tic_store import TicStore
+from .step_cache import StepCache
 from .utility_functions import UtilityFunctions as Utils
 import socket
 import warnings
@@ -16,6 +21,7 @@ import pandas as pd
 import logging
 import os
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter
+from concurrent.futures import ProcessPoolExecutor
 from datetime import date, datetime
 import numpy as np
 
@@ -37,14 +43,40 @@ def main():  # pragma: no cover
 
     - all: Execute all of the above operations in sequence
 
+    - snapshot: Build the local SIMBAD snapshot from a dump of the SIMBAD tables
+
     Command-line arguments:
 
-    - function: The operation to perform (maintenance, input, run, check, or all)
+    - function: The operation to perform (maintenance, input, run, check, all or snapshot)
 
     - --verbose (-v): Increase output verbosity (use -v, -vv, or -vvv for more detail)
 
     - --date (-d): Specify a date for catalog data (format: YYYY-MM-DD)
 
+    - --workers (-w): Number of processes used to standardize the catalogs in the input stage
+
+    - --cache: Cache the intermediate results of the input stage and the identifiers resolved by SIMBAD in the run stage
+
+    - --cache-ttl: Number of days after which a cached SIMBAD identifier is queried again
+
+    - --cache-negative-ttl: Number of days after which a cached identifier that SIMBAD did not resolve is queried again
+
+    - --categorical: Store low-cardinality columns as pandas categories during the run stage
+
+    - --snapshot: Resolve the SIMBAD identifiers and coordinates with a local snapshot, refreshed with the results of the queries
+
+    - --snapshot-dump: The .csv dumps of the SIMBAD basic, ident and ids tables loaded into the snapshot by the snapshot function
+
+    - --tic-store: Answer the TIC queries with a local store of TIC stars, refreshed with the results of the queries
+
+    - --no-refresh: Do not query SIMBAD and VizieR for what is missing from the snapshot and the TIC store
+
+    - --record: Store the results of the TAP queries in the given folder
+
+    - --replay: Serve the TAP queries from the results stored in the given folder, without network access
+
+    - --replay-latency: Number of seconds waited before serving each replayed query
+
     This function is not intended to be imported and used directly in other modules.
     """
 
@@ -52,7 +84,7 @@ def main():  # pragma: no cover
     parser = ArgumentParser(formatter_class=ArgumentDefaultsHelpFormatter)
     parser.add_argument(
         "function",
-        help="specify function to be run (options: maintenance, input, run, check, all)",
+        help="specify function to be run (options: maintenance, input, run, check, all, snapshot)",
     )  # positional argument
     parser.add_argument(
         "--verbose",
@@ -62,7 +94,78 @@ def main():  # pragma: no cover
         help="Increase output verbosity. Use -v, -vv, or -vvv for more verbosity.",
     )
     parser.add_argument("-d", "--date", help="load a specific date (YYYY-MM-DD)")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=1,
+        help="number of processes used to standardize the catalogs in the input stage",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="cache the intermediate results of the input stage and the identifiers resolved by SIMBAD in the run stage",
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=30,
+        help="number of days after which a cached SIMBAD identifier is queried again",
+    )
+    parser.add_argument(
+        "--cache-negative-ttl",
+        type=float,
+        default=7,
+        help="number of days after which a cached identifier that SIMBAD did not resolve is queried again",
+    )
+    parser.add_argument(
+        "--categorical",
+        action="store_true",
+        help="store low-cardinality columns (catalog, status, binary, letter...) as pandas categories in the run stage",
+    )
+    parser.add_argument(
+        "--snapshot",
+        metavar="FILE",
+        help="resolve the SIMBAD identifiers and coordinates in the run stage with the local snapshot in FILE",
+    )
+    parser.add_argument(
+        "--snapshot-dump",
+        nargs=3,
+        metavar=("BASIC", "IDENT", "IDS"),
+        help="the .csv dumps of the SIMBAD basic, ident and ids tables loaded into the snapshot by the snapshot function",
+    )
+    parser.add_argument(
+        "--tic-store",
+        metavar="FILE",
+        help="answer the TIC queries of the input and run stages with the local store of TIC stars in FILE",
+    )
+    parser.add_argument(
+        "--no-refresh",
+        action="store_true",
+        help="do not query SIMBAD and VizieR for what is missing from the snapshot and the TIC store",
+    )
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument(
+        "--record",
+        metavar="FOLDER",
+        help="store the results of the TAP queries in FOLDER",
+    )
+    recording.add_argument(
+        "--replay",
+        metavar="FOLDER",
+        help="serve the TAP queries from the results stored in FOLDER, without network access",
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        help="number of seconds waited before serving each replayed query",
+    )
     args = vars(parser.parse_args())
+    if args["function"] == "snapshot" and (
+        args["snapshot"] is None or args["snapshot_dump"] is None
+    ):
+        parser.error("the snapshot function requires --snapshot and --snapshot-dump")
 
     # Set up level of verbosity
     warnings.filterwarnings("ignore")
@@ -81,6 +184,14 @@ def main():  # pragma: no cover
     # Initialize service files and folders
     Utils.folder_initialization()
 
+    # Record or replay the TAP queries
+    if args["record"]:
+        Utils.query_recorder = QueryRecorder(args["record"], mode="record")
+    elif args["replay"]:
+        Utils.query_recorder = QueryRecorder(
+            args["replay"], mode="replay", latency=args["replay_latency"]
+        )
+
     # Execute the specified function based on the command-line argument
     if args["function"] == "maintenance":
 
@@ -90,14 +201,30 @@ def main():  # pragma: no cover
         # Remove log file created in input
         os.system("rm Logs/replace_known_mistakes.txt")
         # Download and standardize catalog files
-        input(local_date)
+        input(
+            local_date,
+            workers=args["workers"],
+            cache=args["cache"],
+            tic_store=args["tic_store"],
+            refresh=not args["no_refresh"],
+        )
     if args["function"] == "run":
         # Remove log files created in run
         for file in glob.glob('Logs/*'):
             if 'replace_known_mistakes.txt' not in file:
                 os.system("rm "+file)
         # Process and merge catalog data to create the Exo-MerCat catalog
-        run(local_date, args["verbose"])
+        run(
+            local_date,
+            args["verbose"],
+            categorical=args["categorical"],
+            cache=args["cache"],
+            cache_ttl=args["cache_ttl"],
+            cache_negative_ttl=args["cache_negative_ttl"],
+            snapshot=args["snapshot"],
+            tic_store=args["tic_store"],
+            refresh=not args["no_refresh"],
+        )
     if args["function"] == "check":
         # Perform validation checks on the final Exo-MerCat catalog
         check(local_date)
@@ -108,16 +235,59 @@ def main():  # pragma: no cover
         # 1. Perform sanity checks
         ping(local_date)
         # 2. Download and standardize catalog files
-        input(local_date)
+        input(
+            local_date,
+            workers=args["workers"],
+            cache=args["cache"],
+            tic_store=args["tic_store"],
+            refresh=not args["no_refresh"],
+        )
         # 3. Process and merge catalog data
-        run(local_date, args["verbose"])
+        run(
+            local_date,
+            args["verbose"],
+            categorical=args["categorical"],
+            cache=args["cache"],
+            cache_ttl=args["cache_ttl"],
+            cache_negative_ttl=args["cache_negative_ttl"],
+            snapshot=args["snapshot"],
+            tic_store=args["tic_store"],
+            refresh=not args["no_refresh"],
+        )
         # 4. Perform validation checks on the final catalog
         check(local_date)
+    if args["function"] == "snapshot":
+        # Build the local SIMBAD snapshot from a dump of the SIMBAD tables
+        build_snapshot(args["snapshot"], *args["snapshot_dump"])
 
     timeout = 100000
     socket.setdefaulttimeout(timeout)
 
 
+def build_snapshot(
+    snapshot: str, basic_file: str, ident_file: str, ids_file: str
+) -> None:  # pragma: no cover
+    """
+    Build the local SIMBAD snapshot from a dump of the SIMBAD 'basic', 'ident' and 'ids'
+    tables. The objects are added to the snapshot if it already exists.
+
+    :param snapshot: The path of the SQLite database of the snapshot
+    :type snapshot: str
+    :param basic_file: A .csv file with the columns oid, main_id, ra, dec and otype of the
+        SIMBAD 'basic' table
+    :type basic_file: str
+    :param ident_file: A .csv file with the columns oidref and id of the SIMBAD 'ident'
+        table
+    :type ident_file: str
+    :param ids_file: A .csv file with the columns oidref and ids of the SIMBAD 'ids' table
+    :type ids_file: str
+    :return: None
+    :rtype: None
+    """
+    SimbadSnapshot(snapshot).load_dump(basic_file, ident_file, ids_file)
+    logging.info("SIMBAD snapshot " + snapshot + " built from the dump.")
+
+
 def ping(local_date):  # pragma: no cover
     """
     Perform sanity checks on the input catalog data.
@@ -213,7 +383,9 @@ def ping(local_date):  # pragma: no cover
         raise ValueError("One or more sanity checks was not successful.")
     
 
-def input(local_date):  # pragma: no cover
+def input(
+    local_date, workers=1, cache=False, tic_store=None, refresh=True
+):  # pragma: no cover
     """
     Download and standardize catalog files.
 
@@ -231,8 +403,22 @@ def input(local_date):  # pragma: no cover
 
     6. Saves the standardized catalog
 
+    The KOI catalog is processed first, since the others use it to check the mission tables.
+    The other catalogs are independent and can be processed in a process pool.
+
     :param local_date: The date for which to download and process catalogs (format: YYYY-MM-DD)
     :type local_date: str
+    :param workers: The number of processes used for the EU, NASA, OEC, TOI and EPIC
+        catalogs. If 1, they are processed sequentially.
+    :type workers: int
+    :param cache: If True, the intermediate results of the standardization are cached
+        in the Cache/ folder and reused by later runs
+    :type cache: bool
+    :param tic_store: The path of a local store of TIC stars used for the TOI aliases, if
+        any
+    :type tic_store: str
+    :param refresh: If True, the stars missing from the TIC store are queried on VizieR
+    :type refresh: bool
     """
 
     # Load configuration
@@ -257,42 +443,186 @@ def input(local_date):  # pragma: no cover
         # Save the standardized catalog
         cat.print_catalog("StandardizedSources/" + cat.name + local_date + ".csv")
 
-    # Process other catalogs
-    cat_types = [Eu(), Nasa(), Oec(), Toi(), Epic()]
-    for cat in cat_types:
-        logging.info("****** " + cat.name + " ******")
-        config_per_cat = config_dict[cat.name]
-        
-        # Download and read the catalog
-        file_path = cat.download_catalog(
-            config_per_cat["url"], config_per_cat["file"], local_date
-        )
-        cat.read_csv_catalog(file_path)
+    # Process other catalogs. They only depend on the standardized KOI catalog,
+    # so they can be processed independently
+    cat_types = [Eu, Nasa, Oec, Toi, Epic]
+    names = [cat_type().name for cat_type in cat_types]
+    if workers > 1:
+        # Each worker logs the unused replacements into its own file
+        log_files = [
+            "Logs/replace_known_mistakes_" + name + ".txt" for name in names
+        ]
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(workers, len(cat_types)),
+                initializer=initialize_worker,
+                initargs=(
+                    logging.getLogger().level,
+                    list(warnings.filters),
+                    Utils.query_recorder,
+                ),
+            ) as executor:
+                list(
+                    executor.map(
+                        standardize_input_catalog,
+                        cat_types,
+                        [config_dict[name] for name in names],
+                        [local_date] * len(cat_types),
+                        log_files,
+                        [cache] * len(cat_types),
+                        [tic_store] * len(cat_types),
+                        [refresh] * len(cat_types),
+                    )
+                )
+        finally:
+            # Collect the logs in a fixed order, regardless of the completion order
+            Utils.concatenate_log_files(log_files, "Logs/replace_known_mistakes.txt")
+    else:
+        for cat_type, name in zip(cat_types, names):
+            standardize_input_catalog(
+                cat_type,
+                config_dict[name],
+                local_date,
+                cache=cache,
+                tic_store=tic_store,
+                refresh=refresh,
+            )
+
+
+def initialize_worker(
+    level: int, filters: list, query_recorder: QueryRecorder = None
+):  # pragma: no cover
+    """
+    Set up logging, warnings and the TAP query recorder in a worker process of the
+    parallel input stage.
+
+    :param level: The logging level of the main process
+    :type level: int
+    :param filters: The warning filters of the main process
+    :type filters: list
+    :param query_recorder: The query recorder of the main process, if any
+    :type query_recorder: QueryRecorder
+    """
+    warnings.filters[:] = filters
+    Utils.query_recorder = query_recorder
+    if level != logging.NOTSET and level <= logging.INFO:
+        logging.basicConfig(format="%(asctime)s: %(message)s", level=level)
+
+
+def standardize_input_catalog(
+    cat_type: type,
+    config_per_cat: dict,
+    local_date: str,
+    log_file: str = "Logs/replace_known_mistakes.txt",
+    cache: bool = False,
+    tic_store: str = None,
+    refresh: bool = True,
+) -> str:  # pragma: no cover
+    """
+    Download and standardize a single catalog (EU, NASA, OEC, TOI or EPIC).
+
+    It only needs the standardized KOI catalog, so it can run in a separate process.
+
+    :param cat_type: The catalog class (e.g. Eu, Nasa)
+    :type cat_type: type
+    :param config_per_cat: The section of 'input_sources.ini' for the catalog
+    :type config_per_cat: dict
+    :param local_date: The date for which to download and process catalogs (format: YYYY-MM-DD)
+    :type local_date: str
+    :param log_file: The file where the unused replacements are logged
+    :type log_file: str
+    :param cache: If True, the intermediate results are cached, and a rerun resumes from
+        the first step whose code, input or configuration changed
+    :type cache: bool
+    :param tic_store: The path of a local store of TIC stars used for the TOI aliases, if
+        any
+    :type tic_store: str
+    :param refresh: If True, the stars missing from the TIC store are queried on VizieR
+    :type refresh: bool
+    :return: The path of the standardized catalog
+    :rtype: str
+    """
+    cat = cat_type()
+    if tic_store is not None and isinstance(cat, Toi):
+        cat.tic_store = TicStore(tic_store, refresh=refresh)
+    logging.info("****** " + cat.name + " ******")
+
+    # Download the catalog
+    file_path = cat.download_catalog(
+        config_per_cat["url"], config_per_cat["file"], local_date
+    )
+    koi_path = "StandardizedSources/koi" + local_date + ".csv"
+    no_config = StepCache.fingerprint(None)
+    steps = [
+        # Read the catalog
+        ("read_csv_catalog", (file_path,), no_config),
         # Standardize and clean the catalog
-        cat.standardize_catalog()
-        cat.convert_coordinates()
-        cat.fill_nan_on_coordinates()
-        cat.fill_binary_column()
-        cat.replace_known_mistakes()
-        cat.standardize_name_host_letter()
-        cat.identify_brown_dwarfs()
-        cat.remove_theoretical_masses()
-        cat.make_errors_absolute()
-        cat.remove_impossible_values()
-        cat.handle_reference_format()
-        
+        (
+            "standardize_catalog",
+            (),
+            StepCache.config_fingerprint(["DISCOVERYMETHOD"]),
+        ),
+        ("convert_coordinates", (), no_config),
+        ("fill_nan_on_coordinates", (), no_config),
+        ("fill_binary_column", (), no_config),
+        (
+            "replace_known_mistakes",
+            (log_file,),
+            StepCache.config_fingerprint(
+                [
+                    "NAMEtochangeNAME",
+                    "NAMEtochangeHOST",
+                    "HOSTtochangeHOST",
+                    "NAMEtochangeBINARY",
+                    "HOSTtochangeRA",
+                    "HOSTtochangeDEC",
+                    "DROP",
+                ]
+            ),
+        ),
+        ("standardize_name_host_letter", (), no_config),
+        ("identify_brown_dwarfs", (), no_config),
+        ("remove_theoretical_masses", (), no_config),
+        ("make_errors_absolute", (), no_config),
+        ("remove_impossible_values", (), no_config),
+        ("handle_reference_format", (), no_config),
         # Assign status and create catalog status strings
-        cat.assign_status()
-        cat.create_catalogstatus_string("original_catalog_status")
-        cat.check_mission_tables("StandardizedSources/koi" + local_date + ".csv")
-        cat.create_catalogstatus_string("checked_catalog_status")
-        
-        # Finalize and save the standardized catalog
-        cat.make_standardized_alias_list()
-        cat.keep_columns()
-        cat.print_catalog("StandardizedSources/" + cat.name + local_date + ".csv")
-
-def run(local_date: str, verbose: int):  # pragma: no cover
+        ("assign_status", (), no_config),
+        ("create_catalogstatus_string", ("original_catalog_status",), no_config),
+        ("check_mission_tables", (koi_path,), StepCache.file_fingerprint(koi_path)),
+        ("create_catalogstatus_string", ("checked_catalog_status",), no_config),
+        # Finalize the standardized catalog
+        ("make_standardized_alias_list", (), no_config),
+        ("keep_columns", (), no_config),
+    ]
+    if cache:
+        StepCache().run(
+            cat,
+            steps,
+            StepCache.file_fingerprint(file_path),
+            log_files=[log_file],
+        )
+    else:
+        for method, args, _ in steps:
+            getattr(cat, method)(*args)
+
+    # Save the standardized catalog
+    output_file = "StandardizedSources/" + cat.name + local_date + ".csv"
+    cat.print_catalog(output_file)
+    return output_file
+
+
+def run(
+    local_date: str,
+    verbose: int,
+    categorical: bool = False,
+    cache: bool = False,
+    cache_ttl: float = 30,
+    cache_negative_ttl: float = 7,
+    snapshot: str = None,
+    tic_store: str = None,
+    refresh: bool = True,
+):  # pragma: no cover
     """
     Process and merge catalog data to create the Exo-MerCat catalog.
 
@@ -314,26 +644,56 @@ def run(local_date: str, verbose: int):  # pragma: no cover
     :type local_date: str
     :param verbose: The verbosity level for output
     :type verbose: int
+    :param categorical: If True, low-cardinality columns are stored as pandas categories
+    :type categorical: bool
+    :param cache: If True, the identifiers resolved by SIMBAD are cached in Cache/
+    :type cache: bool
+    :param cache_ttl: The time-to-live of the cached identifiers, in days
+    :type cache_ttl: float
+    :param cache_negative_ttl: The time-to-live of the cached identifiers that SIMBAD did
+        not resolve, in days
+    :type cache_negative_ttl: float
+    :param snapshot: The path of a local SIMBAD snapshot used to resolve the identifiers
+        and coordinates, if any
+    :type snapshot: str
+    :param tic_store: The path of a local store of TIC stars used for the TIC queries, if
+        any
+    :type tic_store: str
+    :param refresh: If True, what is missing from the snapshot and the TIC store is
+        queried on SIMBAD and VizieR and added to them
+    :type refresh: bool
     """
 
     emc = Emc()
+    if cache:
+        emc.identifier_cache = IdentifierCache(
+            "Cache/simbad_identifiers.sqlite",
+            ttl=cache_ttl,
+            negative_ttl=cache_negative_ttl,
+        )
+    if snapshot is not None:
+        emc.simbad_snapshot = SimbadSnapshot(snapshot, refresh=refresh)
+    if tic_store is not None:
+        emc.tic_store = TicStore(tic_store, refresh=refresh)
 
     logging.info("Loading standardized files...")
-    # Load NASA catalog data
-    emc.data = Utils.load_standardized_catalog("StandardizedSources/nasa", local_date)
-    # Concatenate data from other catalogs (EU, OEC, TOI, EPIC)
-    for catalog in ["eu", "oec", "toi", "epic"]:
-        emc.data = pd.concat(
-            [
-                emc.data,
-                Utils.load_standardized_catalog(
-                    "StandardizedSources/" + catalog, local_date
-                ),
-            ]
+    # Load NASA, EU, OEC, TOI and EPIC catalog data
+    frames = []
+    for catalog in ["nasa", "eu", "oec", "toi", "epic"]:
+        frame = Utils.load_standardized_catalog(
+            "StandardizedSources/" + catalog, local_date
         )
-    # Fix for TOI catalog: convert 'letter' column to string and keep only last 3 characters
-    emc.data.letter = emc.data.letter.astype(str)
-    emc.data.letter = emc.data.letter.str[-3:]
+        # Fix for TOI catalog: convert 'letter' column to string and keep only last 3 characters
+        frame.letter = frame.letter.astype(str)
+        frame.letter = frame.letter.str[-3:]
+        frames.append(frame)
+
+    # Use the same categories in all catalogs so that the concatenation stays categorical
+    if categorical:
+        frames = Utils.convert_to_categorical(frames)
+
+    # Concatenate data from all catalogs
+    emc.data = pd.concat(frames)
 
     emc.data = emc.data.reset_index()
 
@@ -341,12 +701,28 @@ def run(local_date: str, verbose: int):  # pragma: no cover
     emc.alias_as_host()
     emc.check_binary_mismatch(keyword="host", tolerance=1.0 / 3600.0)
     emc.prepare_columns_for_mainid_search()
-    emc.get_host_info_from_simbad()
-    emc.get_host_info_from_tic()
+    # The SIMBAD and VizieR queries run concurrently on the rows without main_id. Each
+    # step then only uses the results of the rows it would have queried, in order
+    simbad_hosts, tic_hosts = Utils.run_concurrently(
+        [emc.fetch_host_info_from_simbad, emc.fetch_host_info_from_tic]
+    )
+    emc.get_host_info_from_simbad(prefetched=simbad_hosts)
+    emc.get_host_info_from_tic(prefetched=tic_hosts)
     emc.check_coordinates(tolerance=1.0 / 3600.0)
-    emc.get_coordinates_from_simbad(tolerance=1.0 / 3600.0)
-    emc.get_coordinates_from_tic(tolerance=1.0 / 3600.0)
+    simbad_coordinates, tic_coordinates = Utils.run_concurrently(
+        [
+            lambda: emc.fetch_coordinates_from_simbad(tolerance=1.0 / 3600.0),
+            lambda: emc.fetch_coordinates_from_tic(tolerance=1.0 / 3600.0),
+        ]
+    )
+    emc.get_coordinates_from_simbad(
+        tolerance=1.0 / 3600.0, prefetched=simbad_coordinates
+    )
+    emc.get_coordinates_from_tic(tolerance=1.0 / 3600.0, prefetched=tic_coordinates)
     emc.fill_missing_main_id()
+    if categorical:
+        # main_id_provenance is only complete at this point
+        emc.data = Utils.convert_to_categorical([emc.data])[0]
     emc.polish_main_id()
     emc.post_main_id_query_checks(tolerance=1.0 / 3600.0)
     emc.group_by_main_id_set_main_id_aliases()
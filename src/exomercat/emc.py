@@ -1,7 +1,6 @@
 import logging
 import os
 import re
-from statistics import mode
 from datetime import date, datetime
 import glob
 import numpy as np
@@ -12,6 +11,7 @@ from astropy.coordinates import SkyCoord
 from astropy.table import Table
 import socket
 from .catalogs import Catalog
+from .sky_index import SkyIndex
 from .utility_functions import UtilityFunctions as Utils
 
 
@@ -38,6 +38,13 @@ class Emc(Catalog):
         super().__init__()
         self.name = "exo_mercat"  # Assigning the name of the class
         self.data = pd.DataFrame()  # Initializing data with an empty DataFrame
+        self.identifier_cache = None  # Optional IdentifierCache for SIMBAD queries
+        self.simbad_snapshot = None  # Optional SimbadSnapshot for SIMBAD queries
+        self.tic_store = None  # Optional TicStore for TIC queries
+        self.unresolved_identifiers = set()  # Identifiers not resolved by SIMBAD in this run
+        self.simbad_results = pd.DataFrame(
+            columns=["identifier", "main_id", "ra_2", "dec_2", "ids"]
+        )  # Identifiers resolved by SIMBAD in this run
         
 
     def convert_coordinates(self) -> None:
@@ -64,8 +71,11 @@ class Emc(Catalog):
         Check if any aliases are labeled as hosts in some other entry and standardize the host name.
 
         This function takes the alias column of a dataframe and checks if any of the aliases are labeled
-        as hosts in some other entry. If an alias is labeled as a host, it changes the host to be that of the
-        original host. It then adds all aliases of both hosts into one list for each row. It logs results into "Logs/alias_as_host.txt".
+        as hosts in some other entry. Hosts linked in this way (also indirectly) are grouped with a
+        union-find structure over the host names and the alias tokens. The hosts of each group are changed
+        to that of the original host, i.e. the first host (in alphabetical order) that lists another host of
+        the group among its aliases. It then adds all aliases of the group into one list for each row. It
+        logs results into "Logs/alias_as_host.txt".
 
         :param self: The instance of the Emc class.
         :type self: Emc
@@ -74,50 +84,55 @@ class Emc(Catalog):
         """
         # Open log file
         f = open("Logs/alias_as_host.txt", "a")
-        counter = 0
-        host: str
-        # Iterate through groups of data, grouped by host
-        for host, group in self.data.groupby(by="host"):
-            # Create an empty set to store unique values
-            main_id_aliases = set()
-
-            # Iterate through the list and add non-NaN values to the set
-            for alias in list(group.alias):
-                alias_list = str(alias).split(",")
-                for item in alias_list:
-                    if (
-                        not pd.isnull(item)
-                        and item != "nan"
-                        and item not in main_id_aliases
-                        and item != host
-                    ):
-                        main_id_aliases.add(item)
-
-            main_id_aliases_total = set(main_id_aliases)
-            # Check if any alias is labeled as a host in another entry
-            for al in main_id_aliases:
-                if len(self.data.loc[self.data.host == al]) > 0:
-                    counter = counter + 1
-                    # Add aliases of the host found as an alias to the total set
-                    for internal_alias in self.data.loc[self.data.host == al].alias:
-                        alias_list = str(internal_alias).split(",")
-
-                        for internal_al in alias_list:
-                            if internal_al not in main_id_aliases_total:
-                                main_id_aliases_total.add(internal_al.lstrip().rstrip())
-                    # Change the host to be that of the original host
-                    self.data.loc[self.data.host == al, "host"] = host
-                    f.write("ALIAS: " + al + " AS HOST:" + host + "\n")
-
-            main_id_aliases_total = set(main_id_aliases_total)
-
-            # Update the alias column with all unique aliases
-            self.data.loc[self.data.host == host, "alias"] = (
-                ",".join(sorted(set(main_id_aliases_total))).rstrip(",").lstrip(",")
-            )
 
+        # One row per host and alias token
+        with_host = self.data.host.notna()
+        tokens = self.data.loc[with_host, ["host", "alias"]]
+        tokens = tokens.assign(alias=tokens.alias.astype(str).str.split(",")).explode(
+            "alias"
+        )
+        tokens["alias"] = tokens.alias.str.strip()
+
+        # Aliases labeled as hosts in another entry link the two hosts
+        hosts = sorted(set(tokens.host))
+        links = tokens[
+            tokens.alias.isin(hosts) & (tokens.alias != tokens.host)
+        ].drop_duplicates()
+        components = Utils.connected_components(
+            hosts, links.itertuples(index=False, name=None)
+        )
+
+        # The original host of each group is the first that lists another host as alias
+        original_hosts = (
+            links.assign(component=links.host.map(components))
+            .groupby("component")
+            .host.min()
+        )
+        new_hosts = pd.Series(components).map(original_hosts)
+        new_hosts = new_hosts.fillna(pd.Series(new_hosts.index, index=new_hosts.index))
+
+        counter = 0
+        absorbed = new_hosts[new_hosts != new_hosts.index]
+        for host, al in sorted(zip(absorbed.values, absorbed.index)):
+            counter = counter + 1
+            f.write("ALIAS: " + al + " AS HOST:" + host + "\n")
         f.close()
 
+        # Change the host to be that of the original host
+        self.data.loc[with_host, "host"] = self.data.loc[with_host, "host"].map(
+            new_hosts
+        )
+
+        # Update the alias column with all unique aliases of the group
+        tokens["host"] = tokens.host.map(new_hosts)
+        tokens = tokens[
+            ~tokens.alias.isin(["", "nan"]) & (tokens.alias != tokens.host)
+        ].drop_duplicates()
+        aliases = tokens.groupby("host").alias.agg(lambda x: ",".join(sorted(x)))
+        self.data.loc[with_host, "alias"] = (
+            self.data.loc[with_host, "host"].map(aliases).fillna("")
+        )
+
         # Log the number of times an alias was labeled as a host
         logging.info(
             "Aliases labeled as hosts in some other entry checked. It happens "
@@ -165,13 +180,12 @@ class Emc(Catalog):
         counter = 0  # Counter for the number of binary mismatches fixed
 
         # Try to standardize the value of binary from the other entries of the same system.
-        for (key, letter), group in self.data.groupby(by=[keyword, "letter"]):
+        for (key, letter), group in self.data.groupby(
+            by=[keyword, "letter"], observed=True
+        ):
             group.ra = np.round(group.ra.astype(float), 6)
             group.dec = np.round(group.dec.astype(float), 6)
-            group.binary = group.binary.replace("", "null")
-            group["skycoord"] = SkyCoord(
-                ra=group.ra * u.deg, dec=group.dec * u.deg, unit="deg"
-            )
+            group.binary = group.binary.astype(str).replace("", "null")
             # if len(set(group.binary))==1 there is no issue, the binary values agree with one another
             if len(set(group.binary)) > 1:  # there is a discrepancy
                 f.write("\n")
@@ -187,16 +201,12 @@ class Emc(Catalog):
                         counter += 1
                         warning = ""
                         # Check coordinate agreement
-                        check_on_coordinates = [
-                            subgroup1.at[i, "skycoord"]
-                            .separation(subgroup1.at[j, "skycoord"])
-                            .value
-                            for j in subgroup1.index
-                            for i in subgroup1.index
-                        ]
+                        check_on_coordinates = Utils.pairwise_separation(
+                            subgroup1.ra, subgroup1.dec, subgroup1.ra, subgroup1.dec
+                        )
                         
                         # If coordinates don't agree within tolerance
-                        if all([x <= tolerance for x in check_on_coordinates]) is False:
+                        if not (check_on_coordinates <= tolerance).all():
                             # For main_id, check if flags are changing compared to previous check
                             # if keyword == "main_id":
                                 # # Check if more than one value in the same
@@ -217,7 +227,7 @@ class Emc(Catalog):
                             # Prepare warning message for coordinate disagreement
                             warning = (
                                 "WARNING: coordinate agreement exceeds tolerance. Maximum difference: "
-                                + str(max(check_on_coordinates))
+                                + str(check_on_coordinates.max())
                                 + " (binary_coordinate_mismatch_flag = 1). Please check this system:\n"
                                 + group[
                                     [
@@ -253,12 +263,10 @@ class Emc(Catalog):
 
                         warning = ""
                         # Check the angular separation between coordinates in subgroup1 and subgroup2
-                        check_on_coordinates = [
-                            subgroup1.at[i, "skycoord"].separation(subgroup2.at[j, "skycoord"]).value
-                            for j in subgroup2.index
-                            for i in subgroup1.index
-                        ]
-                        if all([x <= tolerance for x in check_on_coordinates]) is False:
+                        check_on_coordinates = Utils.pairwise_separation(
+                            subgroup1.ra, subgroup1.dec, subgroup2.ra, subgroup2.dec
+                        )
+                        if not (check_on_coordinates <= tolerance).all():
                             # If coordinates don't agree within tolerance, set a flag
                             # if keyword == "main_id":
                             #     # Check if flags are changing compared to previous check
@@ -277,7 +285,7 @@ class Emc(Catalog):
                             # Prepare warning message for coordinate disagreement
                             warning = (
                                 "WARNING: coordinate agreement exceeds tolerance. Maximum difference: "
-                                + str(max(check_on_coordinates))
+                                + str(check_on_coordinates.max())
                                 + " (binary_coordinate_mismatch_flag = 1). Please check this system:\n"
                                 + group[
                                     [
@@ -340,14 +348,12 @@ class Emc(Catalog):
                         # If there's at least one S-type or null binary, try to replace it based on coordinates
                         # This is done for each entry, the code calculates the distance of that entry compared to the 
                         # ones that have a binary value. If it works, it replaces.
-                        for i in subgroup1.index:
-                            for j in subgroup2.index:
-                                # Calculate angular separation between each pair of coordinates
-                                subgroup2.at[j, "angsep"] = (
-                                    subgroup1.at[i, "skycoord"]
-                                    .separation(subgroup2.at[j, "skycoord"])
-                                    .value
-                                )
+                        # Calculate angular separation between each pair of coordinates
+                        separations = Utils.pairwise_separation(
+                            subgroup1.ra, subgroup1.dec, subgroup2.ra, subgroup2.dec
+                        )
+                        for position, i in enumerate(subgroup1.index):
+                            subgroup2 = subgroup2.assign(angsep=separations[position])
                             # Filter subgroup2 to only include entries within 1 arcsecond
                             sub = subgroup2[subgroup2.angsep <= tolerance]
 
@@ -386,29 +392,25 @@ class Emc(Catalog):
             + keyword
             + " POTENTIAL BINARIES NOT TREATED HERE. They should be treated manually in replacements.ini ****\n"
         )
-        for i in self.data.index:
-            # Check if the keyword ends with a binary indicator (A, B, C, N, or S)
-            if (
-                not str(re.search(r"([\s\d][ABCNS])$", self.data.at[i, keyword]))
-                == "None"
-            ):
-                # Check if the binary indicator doesn't match the 'binary' column
-                if (
-                    not self.data.at[i, keyword][-1:].strip()
-                    == self.data.at[i, "binary"]
-                ):
-                    # Log the mismatch
-                    f.write(
-                        "MISSED POTENTIAL BINARY Key:"
-                        + str(self.data.at[i, keyword])
-                        + " name: "
-                        + str(self.data.at[i, "name"])
-                        + " binary: "
-                        + str(self.data.at[i, "binary"])
-                        + " catalog:"
-                        + str(self.data.at[i, "catalog"])
-                        + ".\n"
-                    )
+        # Check if the keyword ends with a binary indicator (A, B, C, N, or S)
+        keys = self.data[keyword].astype(str)
+        missed = keys.str.contains(r"[\s\d][ABCNS]$", regex=True)
+        # Check if the binary indicator doesn't match the 'binary' column
+        missed = missed & (keys.str[-1:].str.strip() != self.data.binary.astype(str))
+        # Log the mismatches
+        f.write(
+            "".join(
+                "MISSED POTENTIAL BINARY Key:"
+                + keys[missed]
+                + " name: "
+                + self.data.loc[missed, "name"].astype(str)
+                + " binary: "
+                + self.data.loc[missed, "binary"].astype(str)
+                + " catalog:"
+                + self.data.loc[missed, "catalog"].astype(str)
+                + ".\n"
+            )
+        )
 
         f.close()
         # Log summary of changes
@@ -451,24 +453,19 @@ class Emc(Catalog):
         )
         self.data["hostbinary"] = self.data.hostbinary.str.rstrip()
 
+        # Split the aliases, to combine each of them with the 'binary' information
+        binary = (
+            self.data["binary"]
+            .astype(str)
+            .str.replace("nan", "", regex=False)
+            .str.replace("Rogue", "", regex=False)
+            .str.replace("S-type", "", regex=False)
+        )
+        with_alias = self.data["alias"].str.len() > 0
+        aliases = self.data.loc[with_alias, "alias"].astype(str).str.split(",").explode()
+
         # Create an 'aliasbinary' column by combining 'alias' and 'binary' information
-        for i in self.data.index:
-            if len(self.data.at[i, "alias"]) > 0:
-                single_binary = (
-                    str(self.data.at[i, "binary"])
-                    .replace("nan", "")
-                    .replace("Rogue", "")
-                    .replace("S-type", "")
-                )
-                single_aliases = str(self.data.at[i, "alias"]).split(",")
-                single_aliases_binary = [
-                    s + " " + single_binary for s in single_aliases
-                ]
-                single_aliases_binary = [
-                    s.rstrip().lstrip() for s in single_aliases_binary
-                ]
-                self.data.at[i, "aliasbinary"] = ",".join(single_aliases_binary)
-                self.data["aliasbinary"] = self.data["aliasbinary"].fillna("")
+        self.combine_aliases_binary(aliases, binary, "aliasbinary", " ")
 
         # Create a 'hostbinary2' column (similar to 'hostbinary' but without spaces)
         self.data["hostbinary2"] = self.data["host"].astype(str) + self.data[
@@ -477,21 +474,7 @@ class Emc(Catalog):
         self.data["hostbinary2"] = self.data.hostbinary2.str.rstrip()
 
         # Create an 'aliasbinary2' column (similar to 'aliasbinary' but without spaces)
-        for i in self.data.index:
-            if len(self.data.at[i, "alias"]) > 0:
-                single_binary = (
-                    str(self.data.at[i, "binary"])
-                    .replace("nan", "")
-                    .replace("Rogue", "")
-                    .replace("S-type", "")
-                )
-                single_aliases = str(self.data.at[i, "alias"]).split(",")
-                single_aliases_binary = [s + single_binary for s in single_aliases]
-                single_aliases_binary = [
-                    s.rstrip().lstrip() for s in single_aliases_binary
-                ]
-                self.data.at[i, "aliasbinary2"] = ",".join(single_aliases_binary)
-                self.data["aliasbinary2"] = self.data["aliasbinary2"].fillna("")
+        self.combine_aliases_binary(aliases, binary, "aliasbinary2", "")
 
         # Initialize columns for main identifier search
         self.data["main_id"] = ""
@@ -505,6 +488,43 @@ class Emc(Catalog):
         self.data["main_id_provenance"] = ""
        
        
+    def combine_aliases_binary(
+        self, aliases: pd.Series, binary: pd.Series, column: str, separator: str
+    ) -> None:
+        """
+        Fills a column with the aliases of each row combined with its binary information.
+
+        The rows without aliases keep their value (if the column exists). The column is
+        not created if no row has aliases.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param aliases: The aliases of the rows, one per element, indexed by row
+        :type aliases: pd.Series
+        :param binary: The binary information of each row
+        :type binary: pd.Series
+        :param column: The name of the column to fill (e.g. 'aliasbinary')
+        :type column: str
+        :param separator: The separator between each alias and the binary information
+        :type separator: str
+        :return: None
+        :rtype: None
+        """
+        if len(aliases) == 0:
+            return
+        aliases_binary = (
+            (aliases + separator + binary[aliases.index])
+            .str.strip()
+            .groupby(level=0, sort=False)
+            .agg(",".join)
+        )
+        if column in self.data.columns:
+            values = self.data[column].astype(object)
+        else:
+            values = pd.Series(np.nan, index=self.data.index, dtype=object)
+        values.loc[aliases_binary.index] = aliases_binary.values
+        self.data[column] = values.fillna("")
+
     def fill_mainid_provenance_column(self, keyword: str) -> None:
         """
         Fills the 'main_id_provenance' column with the provided keyword if 'main_id_provenance' is empty and
@@ -529,7 +549,216 @@ class Emc(Catalog):
                 self.data.at[ind, "main_id_provenance"] = keyword
         
 
-    def simbad_list_host_search(self, typed_id: str) -> None:
+    def apply_resolution_results(self, table: pd.DataFrame, column: str) -> None:
+        """
+        Applies the results of an identifier or coordinate search to the catalog.
+
+        The results are matched to the rows by the given column. If a value of the column
+        has more than one result, the first one is used. The main_id, list_id,
+        main_id_ra, main_id_dec and angsep columns are filled with a single join, instead
+        of one selection per result. As in the previous searches, the rows that already
+        have a main_id are updated too if they share the value of the column (e.g. HD
+        19994 A, resolved as a binary, takes the main_id found for HD 19994).
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param table: The results, with the given column and the columns main_id, ids,
+            ra_2, dec_2 and (optionally, 0.0 otherwise) angsep
+        :type table: pd.DataFrame
+        :param column: The column used to match the results to the rows
+        :type column: str
+        :return: None
+        :rtype: None
+        """
+        if len(table) == 0:
+            return
+        results = table[table[column].notna()].drop_duplicates(subset=column)
+        if "angsep" not in results.columns:
+            results = results.assign(angsep=0.0)
+        results = results[[column, "main_id", "ids", "ra_2", "dec_2", "angsep"]]
+
+        rows = self.data[column].isin(results[column])
+        matched = self.data.loc[rows, [column]].merge(results, how="left", on=column)
+
+        self.data.loc[rows, "main_id_ra"] = matched["ra_2"].astype(float).to_numpy()
+        self.data.loc[rows, "main_id_dec"] = matched["dec_2"].astype(float).to_numpy()
+        self.data.loc[rows, "main_id"] = matched["main_id"].to_numpy()
+        self.data.loc[rows, "list_id"] = (
+            matched["ids"].astype(str).str.replace("|", ",", regex=False).to_numpy()
+        )
+        self.data.loc[rows, "angsep"] = matched["angsep"].astype(float).to_numpy()
+
+    def simbad_identifier_query(
+        self, upload: pd.DataFrame, column: str
+    ) -> pd.DataFrame:
+        """
+        Resolves the identifiers in a column of a DataFrame using SIMBAD.
+
+        Each distinct identifier is queried only once per run: the identifiers resolved
+        in this run are kept in memory, and those that SIMBAD did not resolve are skipped.
+        If an identifier cache is set, the identifiers that are in the cache (and not
+        expired), either resolved or not, are not uploaded to SIMBAD, and the results of
+        the query are stored in the cache. If a SIMBAD snapshot is set, the identifiers
+        that it contains are resolved locally, and the results of the query are added to
+        it. If the snapshot is not refreshed, SIMBAD is not queried at all.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param upload: The DataFrame containing the identifiers to resolve
+        :type upload: pd.DataFrame
+        :param column: The name of the column that contains the identifiers
+        :type column: str
+        :return: The rows of upload whose identifier was resolved, with the main_id, ra_2,
+            dec_2, ids and angsep columns from SIMBAD (one row per SIMBAD match)
+        :rtype: pd.DataFrame
+        """
+        identifiers = list(upload[column].dropna().unique())
+        # Skip the identifiers that were already resolved or not resolved in this run
+        resolved = set(self.simbad_results.identifier)
+        identifiers = [
+            x
+            for x in identifiers
+            if x not in self.unresolved_identifiers and x not in resolved
+        ]
+
+        # Look up the identifiers in the cache
+        if self.identifier_cache is not None and len(identifiers) > 0:
+            cached, missing = self.identifier_cache.lookup(identifiers)
+            logging.info(
+                "Identifiers found in the SIMBAD cache "
+                + str(len(identifiers) - len(missing))
+                + " out of "
+                + str(len(identifiers))
+            )
+        else:
+            cached, missing = pd.DataFrame(), identifiers
+
+        results = [self.simbad_results]
+        if len(cached) > 0:
+            results.append(cached)
+
+        # Look up the identifiers in the local snapshot
+        if self.simbad_snapshot is not None and len(missing) > 0:
+            local, missing = self.simbad_snapshot.lookup(missing)
+            if len(local) > 0:
+                results.append(local)
+            if not self.simbad_snapshot.refresh:
+                # SIMBAD is not queried: what is not in the snapshot is not resolved
+                self.unresolved_identifiers.update(missing)
+                missing = []
+
+        if len(missing) > 0:
+            # Set up SIMBAD TAP service
+            service = pyvo.dal.TAPService(
+                "http://simbad.cds.unistra.fr/simbad/sim-tap"
+            )
+            t2 = Table.from_pandas(pd.DataFrame({column: missing}))
+
+            # Construct and execute SIMBAD query
+            query = (
+                "SELECT t.*, basic.main_id, basic.ra as ra_2,basic.dec as dec_2, ids.ids as ids FROM TAP_UPLOAD.tab as t LEFT OUTER JOIN ident ON ident.id = t."
+                + column
+                + " LEFT OUTER JOIN basic ON ident.oidref = basic.oid LEFT OUTER JOIN ids ON basic.oid = ids.oidref"
+            )
+            table = Utils.perform_query(service, query, uploads_dict={"tab": t2})
+            if len(table) > 0:
+                table = table.rename(columns={column: "identifier"})
+                table = table[["identifier", "main_id", "ra_2", "dec_2", "ids"]]
+                results.append(table)
+            else:
+                table = pd.DataFrame(columns=["identifier"])
+            # Remember the identifiers that were not resolved
+            self.unresolved_identifiers.update(set(missing) - set(table.identifier))
+            if self.identifier_cache is not None:
+                self.identifier_cache.store(table, queried=missing)
+            if self.simbad_snapshot is not None:
+                self.simbad_snapshot.store(table)
+
+        # Keep the resolved identifiers in memory for the next passes
+        results = [result for result in results if len(result) > 0]
+        if len(results) > 0:
+            self.simbad_results = pd.concat(results, ignore_index=True)
+
+        return self.match_resolved_identifiers(upload, column, self.simbad_results)
+
+    @staticmethod
+    def match_resolved_identifiers(
+        upload: pd.DataFrame, column: str, resolved: pd.DataFrame
+    ) -> pd.DataFrame:
+        """
+        Attaches the identifiers resolved by SIMBAD to the uploaded rows, keeping their
+        order.
+
+        :param upload: The DataFrame containing the identifiers
+        :type upload: pd.DataFrame
+        :param column: The name of the column that contains the identifiers
+        :type column: str
+        :param resolved: The resolved identifiers, with the columns identifier, main_id,
+            ra_2, dec_2 and ids
+        :type resolved: pd.DataFrame
+        :return: The rows of upload whose identifier was resolved, with the main_id, ra_2,
+            dec_2, ids and angsep columns from SIMBAD (one row per SIMBAD match)
+        :rtype: pd.DataFrame
+        """
+        table = upload.astype({column: object}).merge(
+            resolved[["identifier", "main_id", "ra_2", "dec_2", "ids"]].rename(
+                columns={"identifier": column}
+            ),
+            on=column,
+            how="inner",
+        )
+        table["angsep"] = 0.0
+        return table
+
+    def collect_simbad_identifiers(self) -> pd.DataFrame:
+        """
+        Collects the identifiers used by all the SIMBAD passes of get_host_info_from_simbad.
+
+        For each row that is missing the main_id, it lists the host names (hostbinary,
+        hostbinary2, host) and aliases (aliasbinary, aliasbinary2, alias), together with
+        the priority of the pass that uses them. Identifiers with non-ASCII characters are
+        excluded, as in the single passes.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :return: A DataFrame with columns ind, kind, priority and identifier
+        :rtype: pd.DataFrame
+        """
+        keys = []
+        missing = self.data[self.data.main_id == ""]
+        kinds = [
+            "hostbinary",
+            "aliasbinary",
+            "hostbinary2",
+            "aliasbinary2",
+            "host",
+            "alias",
+        ]
+        for priority, kind in enumerate(kinds):
+            identifiers = missing[kind].fillna("").astype(str)
+            if "alias" in kind:
+                # Aliases are comma-separated lists
+                not_empty = identifiers.str.replace("nan", "").str.len() > 0
+                identifiers = identifiers[not_empty].str.split(",").explode()
+            else:
+                identifiers = identifiers[missing[kind].notna()]
+            keys.append(
+                pd.DataFrame(
+                    {
+                        "ind": identifiers.index,
+                        "kind": kind,
+                        "priority": priority,
+                        "identifier": identifiers.values,
+                    }
+                )
+            )
+        keys = pd.concat(keys, ignore_index=True)
+        keys = keys[keys.identifier.str.findall(r"[^\x00-\x7F]+").str.len() == 0]
+        return keys.reset_index(drop=True)
+
+    def simbad_list_host_search(
+        self, typed_id: str, resolved: pd.DataFrame = None
+    ) -> None:
         """
         Searches for host stars in SIMBAD using the specified column.
 
@@ -541,6 +770,9 @@ class Emc(Catalog):
         :type self: Emc
         :param typed_id: The name of the column that contains the host star to search for (host or hostbinary)
         :type typed_id: str
+        :param resolved: The identifiers already resolved by fetch_host_info_from_simbad. If
+            None, SIMBAD (or the identifier cache) is queried.
+        :type resolved: pd.DataFrame
         :return: None
         :rtype: None
         """
@@ -551,19 +783,11 @@ class Emc(Catalog):
             typed_id,
         ]
 
-        # Set up SIMBAD TAP service
-        service = pyvo.dal.TAPService("http://simbad.cds.unistra.fr/simbad/sim-tap")
-
-        # Convert list of hosts to astropy Table
-        t2 = Table.from_pandas(list_of_hosts)
-
-        # Construct and execute SIMBAD query
-        query = (
-            "SELECT t.*, basic.main_id, basic.ra as ra_2,basic.dec as dec_2, ids.ids as ids FROM TAP_UPLOAD.tab as t LEFT OUTER JOIN ident ON ident.id = t."
-            + typed_id
-            + " LEFT OUTER JOIN basic ON ident.oidref = basic.oid LEFT OUTER JOIN ids ON basic.oid = ids.oidref"
-        )
-        table = Utils.perform_query(service, query, uploads_dict={"tab": t2})
+        # Query SIMBAD (or the identifier cache), unless already resolved
+        if resolved is None:
+            table = self.simbad_identifier_query(list_of_hosts, typed_id)
+        else:
+            table = self.match_resolved_identifiers(list_of_hosts, typed_id, resolved)
 
         # Log query results
         logging.info(
@@ -573,21 +797,8 @@ class Emc(Catalog):
             + str(len(table))
         )
 
-        # Update main catalog with SIMBAD results
-        for host in table[typed_id]:
-            self.data.loc[self.data[typed_id] == host, "main_id_ra"] = float(
-                table.loc[table[typed_id] == host, "ra_2"].values[0]
-            )
-            self.data.loc[self.data[typed_id] == host, "main_id_dec"] = float(
-                table.loc[table[typed_id] == host, "dec_2"].values[0]
-            )
-            self.data.loc[self.data[typed_id] == host, "main_id"] = table.loc[
-                table[typed_id] == host, "main_id"
-            ].values[0]
-            self.data.loc[self.data[typed_id] == host, "list_id"] = (
-                table.loc[table[typed_id] == host, "ids"].values[0].replace("|", ",")
-            )
-            self.data.loc[self.data[typed_id] == host, "angsep"] = 0.0
+        # Update main catalog with SIMBAD results (direct matches)
+        self.apply_resolution_results(table.assign(angsep=0.0), typed_id)
 
         # Fill NaN values in relevant columns
         self.data.main_id = self.data.main_id.fillna("")
@@ -595,7 +806,9 @@ class Emc(Catalog):
         self.data.main_id_ra = self.data.main_id_ra.fillna(np.nan)
         self.data.main_id_dec = self.data.main_id_dec.fillna(np.nan)
 
-    def simbad_list_alias_search(self, column: str) -> None:
+    def simbad_list_alias_search(
+        self, column: str, resolved: pd.DataFrame = None
+    ) -> None:
         """
         Searches for the main ID of each object in the specified column using SIMBAD.
 
@@ -611,86 +824,121 @@ class Emc(Catalog):
         :type self: Emc
         :param column: The name of the column that contains the host star aliases to search for (e.g., 'alias' or 'aliasbinary')
         :type column: str
+        :param resolved: The identifiers already resolved by fetch_host_info_from_simbad. If
+            None, SIMBAD (or the identifier cache) is queried.
+        :type resolved: pd.DataFrame
         :return: None
         """
 
-        # Initialize DataFrame to store aliases
-        alias_df = pd.DataFrame(columns=["ind", column])
         self.data[column] = self.data[column].fillna("")
 
-        # Iterate through rows where main_id is empty
-        for i in self.data[self.data.main_id == ""].index:
-            if len(self.data.at[i, column].replace("nan", "")) > 0:
-                # Split aliases into a list and remove duplicates
-                list_of_aliases = pd.DataFrame(
-                    self.data.at[i, column].split(","), columns=[column]
-                ).drop_duplicates()
-                # Filter out non-ASCII characters to avoid conflicts with pyvo
-                cleaned_list_of_aliases = pd.DataFrame(columns=[column])
-                cleaned_list_of_aliases[column] = list_of_aliases.loc[
-                list_of_aliases[column].str.findall(r"[^\x00-\x7F]+").str.len() == 0,
-                column,
-                ]
-                cleaned_list_of_aliases["ind"] = i
-                alias_df = pd.concat([alias_df, cleaned_list_of_aliases])
-
-        # Set up SIMBAD TAP service
-        service = pyvo.dal.TAPService("http://simbad.cds.unistra.fr/simbad/sim-tap")
-        t2 = Table.from_pandas(alias_df)
-
-        # Construct and execute SIMBAD query
-        query = (
-            "SELECT t.*, basic.main_id, basic.ra as ra_2,basic.dec as dec_2, ids.ids FROM TAP_UPLOAD.tab as t LEFT OUTER JOIN ident ON ident.id = t."
-            + column
-            + " LEFT OUTER JOIN basic ON ident.oidref = basic.oid LEFT OUTER JOIN ids ON basic.oid = ids.oidref"
+        # Split the aliases of the rows where main_id is empty, one row per alias
+        aliases = self.data.loc[self.data.main_id == "", column].astype(str)
+        aliases = aliases[aliases.str.replace("nan", "").str.len() > 0]
+        alias_df = (
+            aliases.str.split(",")
+            .explode()
+            .rename(column)
+            .rename_axis("ind")
+            .reset_index()
+            .drop_duplicates()
         )
-        table = Utils.perform_query(service, query, uploads_dict={"tab": t2})
+        # Filter out non-ASCII characters to avoid conflicts with pyvo
+        alias_df = alias_df[~alias_df[column].str.contains(r"[^\x00-\x7F]", regex=True)]
+
+        # Query SIMBAD (or the identifier cache), unless already resolved
+        if resolved is None:
+            table = self.simbad_identifier_query(alias_df, column)
+        else:
+            table = self.match_resolved_identifiers(alias_df, column, resolved)
 
         # Remove duplicate results
         table = table.drop_duplicates(["ind", "main_id", "ra_2", "dec_2", "ids"])
 
-        # Process SIMBAD results and update main dataframe
-        for i in table["ind"].unique():
-            subtable = table[table.ind == i]
-
-            if len(subtable) != 0:
-            # Log a warning if multiple aliases are not in agreement
-                if len(subtable) > 1:
-                    logging.info(
-                        "WARNING, MULTIPLE ALIASES NOT IN AGREEMENT "
-                        + column
-                        + " "
-                        + str(sorted(set(subtable[column].unique())))
-                        + " main_id "
-                        + str(sorted(set(subtable["main_id"].unique())))
-                    )
-                    subtable = subtable.head(1)
+        # Log a warning if multiple aliases are not in agreement
+        sizes = table.groupby("ind", sort=False).size()
+        conflicts = table[table.ind.isin(sizes[sizes > 1].index)]
+        for i, subtable in conflicts.groupby("ind", sort=False):
+            logging.info(
+                "WARNING, MULTIPLE ALIASES NOT IN AGREEMENT "
+                + column
+                + " "
+                + str(sorted(set(subtable[column].unique())))
+                + " main_id "
+                + str(sorted(set(subtable["main_id"].unique())))
+            )
 
-                # Update main dataframe with SIMBAD information
-                self.data.at[int(i), "main_id_ra"] = float(subtable["ra_2"].values[0])
-                self.data.at[int(i), "main_id_dec"] = float(subtable["dec_2"].values[0])
-                self.data.at[int(i), "main_id"] = subtable["main_id"].values[0]
-                self.data.at[int(i), "list_id"] = subtable["ids"].values[0].replace("|", ",")
-                self.data.at[int(i), "angsep"] = 0.0
+        # Update main dataframe with the first SIMBAD result of each row
+        table = table.drop_duplicates(subset="ind")
+        rows = table["ind"].astype(int).to_numpy()
+        self.data.loc[rows, "main_id_ra"] = table["ra_2"].astype(float).to_numpy()
+        self.data.loc[rows, "main_id_dec"] = table["dec_2"].astype(float).to_numpy()
+        self.data.loc[rows, "main_id"] = table["main_id"].to_numpy()
+        self.data.loc[rows, "list_id"] = (
+            table["ids"].astype(str).str.replace("|", ",", regex=False).to_numpy()
+        )
+        self.data.loc[rows, "angsep"] = 0.0
 
         self.data.main_id = self.data.main_id.fillna("")
         self.data.list_id = self.data.list_id.fillna("")
         self.data.main_id_ra = self.data.main_id_ra.fillna(np.nan)
         self.data.main_id_dec = self.data.main_id_dec.fillna(np.nan)
 
-    def get_host_info_from_simbad(self) -> None:
+    def fetch_host_info_from_simbad(self, keys: pd.DataFrame = None) -> pd.DataFrame:
+        """
+        Resolves the identifiers of all the passes of get_host_info_from_simbad with a
+        single SIMBAD query.
+
+        This is the remote part of get_host_info_from_simbad, so that it can run
+        concurrently with other queries. The identifiers already resolved are not
+        queried again.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param keys: The identifiers, as returned by collect_simbad_identifiers. If None,
+            they are collected from the rows without main_id.
+        :type keys: pd.DataFrame
+        :return: The resolved identifiers, with the columns identifier, main_id, ra_2,
+            dec_2 and ids (one row per SIMBAD match)
+        :rtype: pd.DataFrame
+        """
+        if keys is None:
+            keys = self.collect_simbad_identifiers()
+        table = self.simbad_identifier_query(
+            keys[["identifier"]].drop_duplicates(), "identifier"
+        )
+        return table[["identifier", "main_id", "ra_2", "dec_2", "ids"]]
+
+    def get_host_info_from_simbad(self, prefetched: pd.DataFrame = None) -> None:
         """
         Queries SIMBAD for the main identifier based on the host star name.
 
         :param self: The instance of the Emc class.
         :type self: Emc
+        :param prefetched: The result of fetch_host_info_from_simbad, if already
+            available. It must have been obtained on the current rows without main_id:
+            the identifiers that it does not contain are considered not resolved.
+        :type prefetched: pd.DataFrame
         :return: None
         :rtype: None
         """
 
+        # Resolve the identifiers of all passes with a single query. The passes below
+        # then use the resolved identifiers, in order of precedence
+        if prefetched is None:
+            keys = self.collect_simbad_identifiers()
+            logging.info(
+                "Resolving "
+                + str(keys.identifier.nunique())
+                + " distinct identifiers of "
+                + str(keys.ind.nunique())
+                + " rows with a single SIMBAD query"
+            )
+            prefetched = self.fetch_host_info_from_simbad(keys)
+
         # Search SIMBAD using host name and binary information
         logging.info("HOST+ +BINARY Simbad Check")
-        self.simbad_list_host_search("hostbinary")
+        self.simbad_list_host_search("hostbinary", resolved=prefetched)
         logging.info(
             "Rows still missing main_id after host search "
             + str(len(self.data[self.data.main_id == ""]))
@@ -698,7 +946,7 @@ class Emc(Catalog):
 
         # Search SIMBAD using alias and binary information
         logging.info("ALIAS+ +BINARY Simbad Check")
-        self.simbad_list_alias_search("aliasbinary")
+        self.simbad_list_alias_search("aliasbinary", resolved=prefetched)
         logging.info(
             "Rows still missing main_id after alias search "
             + str(len(self.data[self.data.main_id == ""]))
@@ -706,7 +954,7 @@ class Emc(Catalog):
 
         # Search SIMBAD using host name and binary information (without space)
         logging.info("HOST+BINARY Simbad Check")
-        self.simbad_list_host_search("hostbinary2")
+        self.simbad_list_host_search("hostbinary2", resolved=prefetched)
         logging.info(
             "Rows still missing main_id after host search "
             + str(len(self.data[self.data.main_id == ""]))
@@ -714,7 +962,7 @@ class Emc(Catalog):
 
         # Search SIMBAD using alias and binary information (without space)
         logging.info("ALIAS+BINARY Simbad Check")
-        self.simbad_list_alias_search("aliasbinary2")
+        self.simbad_list_alias_search("aliasbinary2", resolved=prefetched)
         logging.info(
             "Rows still missing main_id after alias search "
             + str(len(self.data[self.data.main_id == ""]))
@@ -722,7 +970,7 @@ class Emc(Catalog):
 
         # Search SIMBAD using only host name
         logging.info("PURE HOST Simbad Check")
-        self.simbad_list_host_search("host")
+        self.simbad_list_host_search("host", resolved=prefetched)
         logging.info(
             "Rows still missing main_id after host search "
             + str(len(self.data[self.data.main_id == ""]))
@@ -730,7 +978,7 @@ class Emc(Catalog):
 
         # Search SIMBAD using only alias
         logging.info("PURE ALIAS Simbad Check")
-        self.simbad_list_alias_search("alias")
+        self.simbad_list_alias_search("alias", resolved=prefetched)
 
         # Log results
         logging.info(
@@ -747,18 +995,30 @@ class Emc(Catalog):
         self.fill_mainid_provenance_column("SIMBAD")
 
         
-    def get_coordinates_from_simbad(self, tolerance: float = 1 / 3600) -> None:
+    def fetch_coordinates_from_simbad(
+        self, tolerance: float = 1 / 3600
+    ) -> pd.DataFrame:
         """
-        Prepares a query for SIMBAD, executes the query and then merges the results with the original dataframe.
+        Queries SIMBAD for the objects around the coordinates of the rows without main_id.
+
+        This is the remote part of get_coordinates_from_simbad, so that it can run
+        concurrently with other queries.
 
         :param self: The instance of the Emc class.
         :type self: Emc
         :param tolerance: The tolerance for the query in degrees (default is 1 arcsecond)
         :type tolerance: float
-        :return: None
-        :rtype: None
+        :return: The SIMBAD objects (main_id, ra_2, dec_2, type, ids) matched to each
+            uploaded row (hostbinary, ra, dec)
+        :rtype: pd.DataFrame
         """
 
+        # Without refresh, search the local snapshot only
+        if self.simbad_snapshot is not None and not self.simbad_snapshot.refresh:
+            return self.simbad_snapshot.cone_search(
+                self.data[self.data.main_id == ""], tolerance
+            )
+
         # Set up SIMBAD TAP service
         service = pyvo.dal.TAPService("http://simbad.cds.unistra.fr/simbad/sim-tap")
 
@@ -782,28 +1042,42 @@ class Emc(Catalog):
         # Execute the second query
         table = Utils.perform_query(service, query, uploads_dict={"tab": t2})
 
+        # Add the objects found to the local snapshot
+        if self.simbad_snapshot is not None:
+            self.simbad_snapshot.store(table)
+        return table
+
+    def get_coordinates_from_simbad(
+        self, tolerance: float = 1 / 3600, prefetched: pd.DataFrame = None
+    ) -> None:
+        """
+        Prepares a query for SIMBAD, executes the query and then merges the results with the original dataframe.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param tolerance: The tolerance for the query in degrees (default is 1 arcsecond)
+        :type tolerance: float
+        :param prefetched: The result of fetch_coordinates_from_simbad, if already
+            available. It can have been obtained on more rows: only those still without
+            main_id are used.
+        :type prefetched: pd.DataFrame
+        :return: None
+        :rtype: None
+        """
+        if prefetched is None:
+            table = self.fetch_coordinates_from_simbad(tolerance)
+        else:
+            table = Utils.select_uploaded_rows(
+                prefetched,
+                self.data[self.data.main_id == ""],
+                ["hostbinary", "ra", "dec"],
+            )
+
         # Calculate angular separation between input and SIMBAD coordinates
         table = Utils.calculate_angsep(table)
 
         # Update main dataframe with SIMBAD results
-        for host in table["hostbinary"]:
-            self.data.loc[self.data["hostbinary"] == host, "main_id_ra"] = float(
-                table.loc[table["hostbinary"] == host, "ra_2"].values[0]
-            )
-            self.data.loc[self.data["hostbinary"] == host, "main_id_dec"] = float(
-                table.loc[table["hostbinary"] == host, "dec_2"].values[0]
-            )
-            self.data.loc[self.data["hostbinary"] == host, "main_id"] = table.loc[
-                table["hostbinary"] == host, "main_id"
-            ].values[0]
-            self.data.loc[self.data["hostbinary"] == host, "list_id"] = (
-                table.loc[table["hostbinary"] == host, "ids"]
-                .values[0]
-                .replace("|", ",")
-            )
-            self.data.loc[self.data["hostbinary"] == host, "angsep"] = float(
-                table.loc[table["hostbinary"] == host, "angsep"].values[0]
-            )
+        self.apply_resolution_results(table, "hostbinary")
 
         # Fill NaN values in relevant columns
         self.data.main_id = self.data.main_id.fillna("")
@@ -824,26 +1098,15 @@ class Emc(Catalog):
         # Update main_id_provenance column with 'SIMBADCOORD'
         self.fill_mainid_provenance_column("SIMBADCOORD")
 
-    def get_host_info_from_tic(self) -> None:
+    def tic_host_upload(self) -> pd.DataFrame:
         """
-        Retrieves host information from the TIC (TESS Input Catalog) for hosts with TIC identifiers.
-
-        This function performs the following steps:
-
-        1. Extracts unique host star names that are TIC identifiers.
-
-        2. Queries the TIC for each of these names.
-
-        3. Merges the obtained information with the original dataframe.
+        Prepares the TIC identifiers of the hosts of the rows without main_id.
 
         :param self: The instance of the Emc class.
         :type self: Emc
-        :return: None
-        :rtype: None
+        :return: A DataFrame with the unique TIC numbers in the 'host' column
+        :rtype: pd.DataFrame
         """
-
-        logging.info("TIC host check")
-
         # Extract unique host names that are TIC identifiers
         list_of_hosts = (
             self.data[self.data.main_id == ""][["host"]].drop_duplicates().dropna()
@@ -859,7 +1122,46 @@ class Emc(Catalog):
         list_of_hosts["host"] = (
             list_of_hosts["host"].str.replace("TIC ", "").str.replace("TIC-", "")
         ).astype(int)
+        return list_of_hosts
 
+    def tic_alias_upload(self) -> pd.DataFrame:
+        """
+        Prepares the TIC identifiers found among the aliases of the rows without main_id.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :return: A DataFrame with the 'host' and 'tic_alias' columns
+        :rtype: pd.DataFrame
+        """
+        # Extract rows where main_id is empty and alias contains 'TIC'
+        alias_df = self.data[self.data.main_id == ""]
+        alias_df = alias_df[alias_df.alias.str.contains("TIC")]
+
+        # Extract TIC identifiers from the alias column
+        for ind in alias_df.index:
+            tic_alias = alias_df.at[ind, "alias"].split(",")
+            alias_df.at[ind, "tic_alias"] = [x for x in tic_alias if "TIC" in x][0]
+
+        # Clean up TIC identifiers and convert to integer
+        alias_df["tic_alias"] = (
+            alias_df["tic_alias"].str.replace("TIC ", "").astype(int)
+        )
+
+        # Keep only 'host' and 'tic_alias' columns
+        alias_df = alias_df[["host", "tic_alias"]]
+        return alias_df
+
+    def fetch_tic_hosts(self, list_of_hosts: pd.DataFrame) -> pd.DataFrame:
+        """
+        Queries the TIC for the TIC identifiers of the hosts.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param list_of_hosts: The upload prepared by tic_host_upload
+        :type list_of_hosts: pd.DataFrame
+        :return: The result of the query
+        :rtype: pd.DataFrame
+        """
         # Set socket timeout
         timeout = 100000
         socket.setdefaulttimeout(timeout)
@@ -867,17 +1169,108 @@ class Emc(Catalog):
         # Set up TAP service for querying TIC
         service = pyvo.dal.TAPService("http://TAPVizieR.cds.unistra.fr/TAPVizieR/tap/")
 
-        # Prepare data for query
-        t2 = Table.from_pandas(pd.DataFrame(list_of_hosts["host"]))
-
         # Construct query to retrieve TIC information
         query = 'SELECT tc.*, RAJ2000 as ra_2, DEJ2000 as dec_2, GAIA, UCAC4, "2MASS", WISEA, TIC, KIC, HIP, TYC  FROM "IV/39/tic82" AS db JOIN TAP_UPLOAD.t1 AS tc ON db.TIC = tc.host'
 
-        # Execute query
-        table = Utils.perform_query(service, query, uploads_dict={"t1": t2})
+        # Execute query, locally if possible
+        if self.tic_store is not None:
+            table = self.tic_store.query(
+                service,
+                query,
+                "t1",
+                pd.DataFrame(list_of_hosts["host"]),
+                ["ra_2", "dec_2", "GAIA", "UCAC4", "2MASS", "WISEA", "TIC", "KIC", "HIP", "TYC"],
+                column="host",
+            )
+        else:
+            # Prepare data for query
+            t2 = Table.from_pandas(pd.DataFrame(list_of_hosts["host"]))
+            table = Utils.perform_query(service, query, uploads_dict={"t1": t2})
 
         # Remove duplicates from results
         table = table.drop_duplicates()
+        return table
+
+    def fetch_tic_aliases(self, alias_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Queries the TIC for the TIC identifiers found among the aliases.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param alias_df: The upload prepared by tic_alias_upload
+        :type alias_df: pd.DataFrame
+        :return: The result of the query
+        :rtype: pd.DataFrame
+        """
+        # Set up TAP service for querying TIC
+        service = pyvo.dal.TAPService("http://TAPVizieR.cds.unistra.fr/TAPVizieR/tap/")
+
+        # Construct query to retrieve TIC information
+        # This query joins the uploaded table (t1) with the TIC catalog (IV/39/tic82)
+        # based on the TIC identifier
+        query = 'SELECT tc.*, RAJ2000 as ra_2, DEJ2000 as dec_2, GAIA, UCAC4, "2MASS", WISEA, TIC, KIC, HIP, TYC  FROM "IV/39/tic82" AS db JOIN TAP_UPLOAD.t1 AS tc ON db.TIC = tc.tic_alias'
+
+        # Execute the query, locally if possible
+        if self.tic_store is not None:
+            table = self.tic_store.query(
+                service,
+                query,
+                "t1",
+                alias_df[["host", "tic_alias"]],
+                ["ra_2", "dec_2", "GAIA", "UCAC4", "2MASS", "WISEA", "TIC", "KIC", "HIP", "TYC"],
+                column="tic_alias",
+            )
+        else:
+            # Convert DataFrame to Astropy Table for use in TAP query
+            t2 = Table.from_pandas(alias_df[["host", "tic_alias"]])
+            table = Utils.perform_query(service, query, uploads_dict={"t1": t2})
+        return table
+
+    def fetch_host_info_from_tic(self) -> tuple:
+        """
+        Queries the TIC for the TIC identifiers of the hosts and of the aliases of the rows
+        without main_id.
+
+        This is the remote part of get_host_info_from_tic, so that it can run concurrently
+        with other queries.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :return: The results of the host query and of the alias query
+        :rtype: tuple
+        """
+        table = self.fetch_tic_hosts(self.tic_host_upload())
+        alias_table = self.fetch_tic_aliases(self.tic_alias_upload())
+        return table, alias_table
+
+    def get_host_info_from_tic(self, prefetched: tuple = None) -> None:
+        """
+        Retrieves host information from the TIC (TESS Input Catalog) for hosts with TIC identifiers.
+
+        This function performs the following steps:
+
+        1. Extracts unique host star names that are TIC identifiers.
+
+        2. Queries the TIC for each of these names.
+
+        3. Merges the obtained information with the original dataframe.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param prefetched: The result of fetch_host_info_from_tic, if already available. It
+            can have been obtained on more rows: only those still without main_id are used.
+        :type prefetched: tuple
+        :return: None
+        :rtype: None
+        """
+
+        logging.info("TIC host check")
+
+        list_of_hosts = self.tic_host_upload()
+        if prefetched is None:
+            table = self.fetch_tic_hosts(list_of_hosts)
+        else:
+            table = Utils.select_uploaded_rows(prefetched[0], list_of_hosts, ["host"])
 
         # Log query results
         logging.info(
@@ -887,21 +1280,11 @@ class Emc(Catalog):
             + str(len(table))
         )
 
-        # Update main dataframe with TIC information
-        for host in table["host"]:
-            self.data.loc[self.data["host"] == "TIC " + host, "main_id_ra"] = float(
-                table.loc[table["host"] == host, "ra_2"].values[0]
-            )
-            self.data.loc[self.data["host"] == "TIC " + host, "main_id_dec"] = float(
-                table.loc[table["host"] == host, "dec_2"].values[0]
-            )
-            self.data.loc[self.data["host"] == "TIC " + host, "main_id"] = table.loc[
-                table["host"] == host, "main_id"
-            ].values[0]
-            self.data.loc[self.data["host"] == "TIC " + host, "list_id"] = (
-                table.loc[table["host"] == host, "ids"].values[0].replace("|", ",")
-            )
-            self.data.loc[self.data["host"] == "TIC " + host, "angsep"] = 0.0
+        # Update main dataframe with TIC information (the hosts were uploaded without
+        # the 'TIC' prefix)
+        if len(table) > 0:
+            table = table.assign(host="TIC " + table["host"].astype(str), angsep=0.0)
+        self.apply_resolution_results(table, "host")
 
         # Fill NaN values in main_id, list_id, main_id_ra, and main_id_dec columns with empty strings
         self.data.main_id = self.data.main_id.fillna("")
@@ -917,33 +1300,13 @@ class Emc(Catalog):
 
         logging.info("TIC alias check")
 
-        # Extract rows where main_id is empty and alias contains 'TIC'
-        alias_df = self.data[self.data.main_id == ""]
-        alias_df = alias_df[alias_df.alias.str.contains("TIC")]
-
-        # Extract TIC identifiers from the alias column
-        for ind in alias_df.index:
-            tic_alias = alias_df.at[ind, "alias"].split(",")
-            alias_df.at[ind, "tic_alias"] = [x for x in tic_alias if "TIC" in x][0]
-
-        # Clean up TIC identifiers and convert to integer
-        alias_df["tic_alias"] = (
-            alias_df["tic_alias"].str.replace("TIC ", "").astype(int)
-        )
-
-        # Keep only 'host' and 'tic_alias' columns
-        alias_df = alias_df[["host", "tic_alias"]]
-
-        # Convert DataFrame to Astropy Table for use in TAP query
-        t2 = Table.from_pandas(alias_df[["host", "tic_alias"]])
-
-        # Construct query to retrieve TIC information
-        # This query joins the uploaded table (t1) with the TIC catalog (IV/39/tic82)
-        # based on the TIC identifier
-        query = 'SELECT tc.*, RAJ2000 as ra_2, DEJ2000 as dec_2, GAIA, UCAC4, "2MASS", WISEA, TIC, KIC, HIP, TYC  FROM "IV/39/tic82" AS db JOIN TAP_UPLOAD.t1 AS tc ON db.TIC = tc.tic_alias'
-
-        # Execute the query
-        table = Utils.perform_query(service, query, uploads_dict={"t1": t2})
+        alias_df = self.tic_alias_upload()
+        if prefetched is None:
+            table = self.fetch_tic_aliases(alias_df)
+        else:
+            table = Utils.select_uploaded_rows(
+                prefetched[1], alias_df, ["host", "tic_alias"]
+            )
 
         # Log the number of successful TIC queries
         logging.info(
@@ -953,26 +1316,10 @@ class Emc(Catalog):
             + str(len(table))
         )
 
-        # Update the main dataframe with TIC information for each host
-        for host in table["host"]:
-            # Update right ascension
-            self.data.loc[self.data["host"] == host, "main_id_ra"] = float(
-                table.loc[table["host"] == host, "ra_2"].values[0]
-            )
-            # Update declination
-            self.data.loc[self.data["host"] == host, "main_id_dec"] = float(
-                table.loc[table["host"] == host, "dec_2"].values[0]
-            )
-            # Update main identifier
-            self.data.loc[self.data["host"] == host, "main_id"] = table.loc[
-                table["host"] == host, "main_id"
-            ].values[0]
-            # Update list of identifiers, replacing '|' with ','
-            self.data.loc[self.data["host"] == host, "list_id"] = (
-                table.loc[table["host"] == host, "ids"].values[0].replace("|", ",")
-            )
-            # Set angular separation to 0 (as this is a direct match)
-            self.data.loc[self.data["host"] == host, "angsep"] = 0.0
+        # Update the main dataframe with TIC information for each host (direct matches)
+        if len(table) > 0:
+            table = table.assign(angsep=0.0)
+        self.apply_resolution_results(table, "host")
 
         # Fill NaN values in main_id, list_id, main_id_ra, and main_id_dec columns with empty strings
         self.data.main_id = self.data.main_id.fillna("")
@@ -989,7 +1336,56 @@ class Emc(Catalog):
         self.fill_mainid_provenance_column("TIC")
 
 
-    def get_coordinates_from_tic(self, tolerance: float = 1.0 / 3600.0):
+    def fetch_coordinates_from_tic(
+        self, tolerance: float = 1.0 / 3600.0
+    ) -> pd.DataFrame:
+        """
+        Queries the TIC for the coordinates of the objects without main IDs.
+
+        This is the remote part of get_coordinates_from_tic, so that it can run concurrently
+        with other queries.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param tolerance: The tolerance for the query in degrees (default is 1 arcsecond)
+        :type tolerance: float
+        :return: The result of the query
+        :rtype: pd.DataFrame
+        """
+        # Set up the TAP service for querying the VizieR TIC catalog
+        service = pyvo.dal.TAPService("http://TAPVizieR.cds.unistra.fr/TAPVizieR/tap/")
+
+        # Construct the ADQL query to retrieve TIC information
+        # This query joins the uploaded table (t) with the TIC catalog (IV/39/tic82)
+        # It uses the CONTAINS and CIRCLE functions to match coordinates within the specified tolerance
+        query = (
+            """SELECT t.*, RAJ2000 as ra_2, DEJ2000 as dec_2, GAIA, UCAC4, "2MASS", WISEA, TIC, KIC, HIP, TYC FROM "IV/39/tic82" JOIN TAP_UPLOAD.tab AS t on 1=CONTAINS(POINT('ICRS',RAJ2000, DEJ2000), CIRCLE('ICRS', t.ra, t.dec,"""
+            + str(tolerance)
+            + """)) """
+        )
+
+        # Prepare data for the query: select rows without main_id and relevant columns
+        upload = self.data[self.data.main_id == ""][["hostbinary", "ra", "dec"]]
+
+        # Execute the query, locally if possible
+        if self.tic_store is not None:
+            table = self.tic_store.query(
+                service,
+                query,
+                "tab",
+                upload,
+                ["ra_2", "dec_2", "GAIA", "UCAC4", "2MASS", "WISEA", "TIC", "KIC", "HIP", "TYC"],
+                tolerance=tolerance,
+            )
+        else:
+            table = Utils.perform_query(
+                service, query, uploads_dict={"tab": Table.from_pandas(upload)}
+            )
+        return table
+
+    def get_coordinates_from_tic(
+        self, tolerance: float = 1.0 / 3600.0, prefetched: pd.DataFrame = None
+    ):
         """
         Retrieves coordinates from the TESS Input Catalog (TIC) for objects without main IDs.
 
@@ -1008,53 +1404,26 @@ class Emc(Catalog):
         :type self: Emc
         :param tolerance: The tolerance for the query in degrees (default is 1 arcsecond)
         :type tolerance: float
+        :param prefetched: The result of fetch_coordinates_from_tic, if already available.
+            It can have been obtained on more rows: only those still without main_id are
+            used.
+        :type prefetched: pd.DataFrame
         :return: None
         :rtype: None
         """
-
-
-        # Set up the TAP service for querying the VizieR TIC catalog
-        service = pyvo.dal.TAPService("http://TAPVizieR.cds.unistra.fr/TAPVizieR/tap/")
-
-        # Prepare data for the query: select rows without main_id and relevant columns
-        t2 = Table.from_pandas(
-            self.data[self.data.main_id == ""][["hostbinary", "ra", "dec"]]
-        )
-
-        # Construct the ADQL query to retrieve TIC information
-        # This query joins the uploaded table (t) with the TIC catalog (IV/39/tic82)
-        # It uses the CONTAINS and CIRCLE functions to match coordinates within the specified tolerance
-        query = (
-            """SELECT t.*, RAJ2000 as ra_2, DEJ2000 as dec_2, GAIA, UCAC4, "2MASS", WISEA, TIC, KIC, HIP, TYC FROM "IV/39/tic82" JOIN TAP_UPLOAD.tab AS t on 1=CONTAINS(POINT('ICRS',RAJ2000, DEJ2000), CIRCLE('ICRS', t.ra, t.dec,"""
-            + str(tolerance)
-            + """)) """
-        )
-
-        # Execute the query using the utility function
-        table = Utils.perform_query(service, query, uploads_dict={"tab": t2})
+        if prefetched is None:
+            table = self.fetch_coordinates_from_tic(tolerance)
+        else:
+            table = Utils.select_uploaded_rows(
+                prefetched,
+                self.data[self.data.main_id == ""],
+                ["hostbinary", "ra", "dec"],
+            )
         table = table.drop_duplicates()
         table = Utils.calculate_angsep(table)
 
-        for host in table["hostbinary"]:
-            self.data.loc[self.data["hostbinary"] == host, "main_id_ra"] = float(
-                table.loc[table["hostbinary"] == host, "ra_2"].values[0]
-            )
-            # Update declination
-            self.data.loc[self.data["hostbinary"] == host, "main_id_dec"] = float(
-                table.loc[table["hostbinary"] == host, "dec_2"].values[0]
-            )
-            # Update main identifier
-            self.data.loc[self.data["hostbinary"] == host, "main_id"] = table.loc[
-                table["hostbinary"] == host, "main_id"
-            ].values[0]
-            self.data.loc[self.data["hostbinary"] == host, "list_id"] = (
-                table.loc[table["hostbinary"] == host, "ids"]
-                .replace("|", ",")
-            )
-            # Update angular separation
-            self.data.loc[self.data["hostbinary"] == host, "angsep"] = float(
-                table.loc[table["hostbinary"] == host, "angsep"].values[0]
-            )
+        # Update main dataframe with TIC results
+        self.apply_resolution_results(table, "hostbinary")
 
         # Fill NaN values in main_id, list_id, main_id_ra, and main_id_dec columns with empty strings
         self.data.main_id = self.data.main_id.fillna("")
@@ -1108,62 +1477,68 @@ class Emc(Catalog):
         f = open("Logs/check_coordinates.txt", "a")
 
         # Group the data by host and binary for entries without a main_id
-        for (host, binary), group in self.data[self.data.main_id == ""].groupby(
-            ["host", "binary"]
-        ):
-            # Check if there's more than one entry in the group
-            if len(group) > 1:
-                # Calculate the mode of RA and DEC for the group
-                ra = mode(list(round(group.ra, 6)))
-                dec = mode(list(round(group.dec, 6)))
-                mismatch_string = ""
-
-                if (abs(round(group["ra"], 6) - ra) > tolerance).any():
-                    countra = countra + 1
-                    with pd.option_context("display.max_columns", 2000):
-                        f.write(
-                            "*** MISMATCH ON RA at tolerance "
-                            + str(tolerance)
-                            + " *** \n"
-                            + group[
-                                [
-                                    "name",
-                                    "host",
-                                    "binary",
-                                    "letter",
-                                    "catalog",
-                                    "ra",
-                                ]
-                            ].to_string()
-                            + "\n"
-                        )
-                    mismatch_string = "RA"
+        data = self.data[self.data.main_id == ""]
+        groups = data.groupby(["host", "binary"], observed=True).ngroup()
+        data = data[groups.notna()]
+        groups = groups[groups.notna()].astype(int)
+
+        # Check, for each group, if any RA or DEC is too far from the mode of the group
+        mismatches = {}
+        for coordinate in ["ra", "dec"]:
+            values = data[coordinate].round(6)
+            mismatches[coordinate] = (
+                (values - Utils.group_mode(values, groups)).abs() > tolerance
+            ).groupby(groups).transform("any")
+
+        # Log the mismatches, group by group
+        mismatched = mismatches["ra"] | mismatches["dec"]
+        for _, group in data[mismatched].groupby(groups[mismatched], sort=True):
+            if mismatches["ra"][group.index[0]]:
+                countra = countra + 1
+                with pd.option_context("display.max_columns", 2000):
+                    f.write(
+                        "*** MISMATCH ON RA at tolerance "
+                        + str(tolerance)
+                        + " *** \n"
+                        + group[
+                            [
+                                "name",
+                                "host",
+                                "binary",
+                                "letter",
+                                "catalog",
+                                "ra",
+                            ]
+                        ].to_string()
+                        + "\n"
+                    )
 
-                # Check for DEC mismatches
-                if (abs(round(group["dec"], 6) - dec) > tolerance).any():
-                    countdec += 1
-                    # Log the DEC mismatch
-                    with pd.option_context("display.max_columns", 2000):
-                        f.write(
-                            "*** MISMATCH ON DEC at tolerance "
-                            + str(tolerance)
-                            + " *** \n"
-                            + group[
-                                [
-                                    "name",
-                                    "host",
-                                    "binary",
-                                    "letter",
-                                    "catalog",
-                                    "dec",
-                                ]
-                            ].to_string()
-                            + "\n"
-                        )
-                    mismatch_string += "DEC"
+            # Check for DEC mismatches
+            if mismatches["dec"][group.index[0]]:
+                countdec += 1
+                # Log the DEC mismatch
+                with pd.option_context("display.max_columns", 2000):
+                    f.write(
+                        "*** MISMATCH ON DEC at tolerance "
+                        + str(tolerance)
+                        + " *** \n"
+                        + group[
+                            [
+                                "name",
+                                "host",
+                                "binary",
+                                "letter",
+                                "catalog",
+                                "dec",
+                            ]
+                        ].to_string()
+                        + "\n"
+                    )
 
-                # Update the coordinate_mismatch column for the group
-                self.data.loc[group.index, "coordinate_mismatch"] = mismatch_string
+        # Update the coordinate_mismatch column of all the groups at once
+        self.data.loc[data.index, "coordinate_mismatch"] = np.where(
+            mismatches["ra"], "RA", ""
+        ) + np.where(mismatches["dec"], "DEC", "")
 
         # Close the log file
         f.close()
@@ -1192,77 +1567,109 @@ class Emc(Catalog):
         :rtype: str
 
         """
-        output_string = ""
-        service = pyvo.dal.TAPService("http://simbad.cds.unistra.fr/simbad/sim-tap")
+        return self.replace_old_new_identifiers(
+            pd.DataFrame(
+                {
+                    "identifier": [identifier],
+                    "new_identifier": [new_identifier],
+                    "binary": [binary],
+                }
+            )
+        )[0]
 
-        # Construct the ADQL query to retrieve information for the new identifier
-        query = (
-            """SELECT  basic.main_id, basic.ra as ra_2,basic.dec as dec_2, ids.ids FROM ident JOIN basic ON ident.oidref = basic.oid LEFT OUTER JOIN ids ON basic.oid = ids.oidref  WHERE id = '"""
-            + new_identifier
-            + """'"""
+    def replace_old_new_identifiers(self, candidates: pd.DataFrame) -> list:
+        """
+        Replaces the old identifiers with the main_id of the new identifiers in the
+        dataframe.
+
+        The new identifiers are resolved together with simbad_identifier_query, and the
+        replacements are then applied with a single mapping over the main_id column. If a
+        binary value is given, the binary column of the replaced rows is standardized when
+        it is only S-type or null.
+
+        :param self: The instance of the Emc class.
+        :type self: Emc
+        :param candidates: A DataFrame with the columns identifier (the old identifier),
+            new_identifier and binary (None if there is no binary value)
+        :type candidates: pd.DataFrame
+        :return: The explanation strings for logging purposes, one per candidate
+        :rtype: list
+        """
+        if len(candidates) == 0:
+            return []
+
+        # Resolve the new identifiers, keeping the first SIMBAD match of each
+        resolved = self.simbad_identifier_query(
+            candidates[["new_identifier"]].drop_duplicates(), "new_identifier"
         )
+        resolved = resolved[
+            resolved.main_id.notna() & ~resolved.main_id.isin(["", "nan"])
+        ].drop_duplicates(subset="new_identifier")
+        candidates = candidates.merge(
+            resolved[["new_identifier", "main_id", "ra_2", "dec_2", "ids"]],
+            on="new_identifier",
+            how="left",
+        )
+        found = candidates[candidates.main_id.notna()].drop_duplicates(
+            subset="identifier"
+        )
+        found = found.set_index("identifier")
 
-        table = Utils.perform_query(service, query, uploads_dict={})
+        rows = self.data.main_id.isin(found.index)
+        keys = self.data.loc[rows, "main_id"]
+        self.data.loc[rows, "main_id_ra"] = keys.map(found.ra_2).astype(float)
+        self.data.loc[rows, "main_id_dec"] = keys.map(found.dec_2).astype(float)
 
-        if len(table) >= 1:
-            self.data.loc[self.data.main_id == identifier, "main_id_ra"] = float(
-                table.at[0, "ra_2"]
-            )
-            self.data.loc[self.data.main_id == identifier, "main_id_dec"] = float(
-                table.at[0, "dec_2"]
-            )
-    
-            # Check if there are existing list_ids and append new ones if necessary
-            if (
-                len(
-                    self.data.loc[self.data.main_id == identifier, "list_id"]
-                    .replace("", np.nan)
-                    .dropna()
-                    .unique()
+        # Append the SIMBAD identifiers to the existing list_ids, if any
+        cumulative_aliases = {}
+        for identifier, list_ids in (
+            self.data.loc[rows].groupby("main_id", sort=False).list_id.unique().items()
+        ):
+            ids = str(found.at[identifier, "ids"]).replace("|", ",")
+            if any(pd.notna(x) and x != "" for x in list_ids):
+                cumulative_alias = ",".join(list_ids) + "," + ids
+                ids = ",".join(
+                    dict.fromkeys(cumulative_alias.rstrip(",").lstrip(",").split(","))
                 )
-                > 0
-            ):
-                cumulative_alias = (
-                    ",".join(
-                        self.data.loc[
-                            self.data.main_id == identifier, "list_id"
-                        ].unique()
-                    )
-                    + ","
-                    + table.loc[0, "ids"].replace("|", ",")
+            cumulative_aliases[identifier] = ids
+        self.data.loc[rows, "list_id"] = keys.map(cumulative_aliases)
+
+        # Standardize the binary values
+        binary = keys.map(found.binary)
+        binary_catalog = self.data.loc[rows, "binary"]
+        only_s_type = (binary_catalog.replace("S-type", "") == "").groupby(keys).all()
+        agreement = (binary_catalog == binary).groupby(keys).all()
+
+        output_strings = []
+        for candidate in candidates.itertuples(index=False):
+            identifier = candidate.identifier
+            if pd.isna(candidate.main_id):
+                # Log results
+                output_strings.append(
+                    "Weird MAINID found: "
+                    + identifier
+                    + " but cannot be found when "
+                    + candidate.new_identifier
+                    + ". No replacement performed."
                 )
-                cumulative_alias = ",".join(
-                    [
-                        x
-                        for x in set(
-                            cumulative_alias.rstrip(",").lstrip(",").split(",")
-                        )
-                    ]
-                )
-                self.data.loc[
-                    self.data.main_id == identifier, "list_id"
-                ] = cumulative_alias
-            else:
-                # If no existing list_ids, use SIMBAD data
-                self.data.loc[self.data.main_id == identifier, "list_id"] = table.loc[
-                    0, "ids"
-                ].replace("|", ",")
+                continue
             output_string = (
-                "MAINID can be corrected " + identifier + " to " + new_identifier + ". "
+                "MAINID can be corrected "
+                + identifier
+                + " to "
+                + candidate.new_identifier
+                + ". "
             )
-
-            if binary is not None:
-                output_string = output_string + " Binary value: " + binary + "."
-                binary_catalog = self.data.loc[
-                    self.data.main_id == identifier, "binary"
-                ].copy()
-                if (binary_catalog.replace("S-type", "") == "").all():
-                    self.data.loc[self.data.main_id == identifier, "binary"] = binary
+            if candidate.binary is not None and not pd.isna(candidate.binary):
+                output_string = (
+                    output_string + " Binary value: " + candidate.binary + "."
+                )
+                if only_s_type.get(identifier, True):
                     output_string = (
                         output_string
                         + " Only S-type or null. Binary could be standardized."
                     )
-                elif (binary_catalog != binary).any():
+                elif not agreement[identifier]:
                     # Flag disagreement in binary values, no replacement possible.
                     output_string = (
                         output_string
@@ -1272,33 +1679,26 @@ class Emc(Catalog):
                             ["name", "host", "binary", "catalog"],
                         ].to_string()
                     )
-                elif (binary_catalog == binary).all():
+                else:
                     # No changes needed if binary values already correct
                     output_string = output_string + " Already correct."
             else:
                 output_string = output_string + "\n"
-            # last thing to be changed since it changes the query
-            self.data.loc[self.data.main_id == identifier, "main_id"] = table.at[
-                0, "main_id"
-            ]
-            output_string = output_string
-        elif len(table) == 0:
-            # Log results
-            output_string = (
-                "Weird MAINID found: "
-                + identifier
-                + " but cannot be found when "
-                + new_identifier
-                + ". No replacement performed."
-            )
+            output_strings.append(output_string)
 
-        return output_string
+        standardized = keys.map(only_s_type) & binary.notna()
+        self.data.loc[standardized[standardized].index, "binary"] = binary[
+            standardized
+        ]
+        # last thing to be changed since it changes the identifiers
+        self.data.loc[rows, "main_id"] = keys.map(found.main_id)
+        return output_strings
 
     def polish_main_id(self) -> None:
         """
         Polish the main_id column in the data by removing planet/binary letters.
 
-        This function iterates over the unique values in the main_id column of the data and performs the following operations:
+        This function looks for the unique values in the main_id column of the data that end with a planet or binary letter, and performs the following operations:
 
         1. Check for planet letters in the main_id column. If a planet letter is found, it tries to look for the corresponding star in SIMBAD and replaces the main_id with the star's main_id.
 
@@ -1306,64 +1706,39 @@ class Emc(Catalog):
 
         3. All of the above operations are logged in a text file named "Logs/polish_main_id.txt".
 
+        The identifiers without the letters are resolved on SIMBAD with a single upload
+        query, and only the new main_ids found by the first check are queried again.
+
         :param self: The instance of the Emc class.
         :type self: Emc
         :return: None
         :rtype: None
         """
+        candidates = Utils.main_id_letter_candidates(self.data.main_id.unique())
+        # Resolve the identifiers of both checks at once
+        self.simbad_identifier_query(
+            candidates[["new_identifier"]].drop_duplicates(), "new_identifier"
+        )
 
-        counter = 0
         f = open("Logs/polish_main_id.txt", "a")
         f.write("***** CHECK FOR PLANET LETTER IN MAIN_ID *****\n")
 
-        # Iterate through unique main_id values to check for planet letters
-        for identifier in self.data.main_id.unique():
-            # Check if the identifier ends with a planet letter (b-j)
-            if len(re.findall("[\s\d][b-j]$", identifier)) > 0:
-                # Remove the planet letter and any leading/trailing whitespace
-                new_identifier = identifier[:-1].strip().replace("NAME ", "")
-                counter += 1
-                # Try to replace the old identifier with the new one
-                output_string = self.replace_old_new_identifier(
-                    identifier, new_identifier
-                )
-                f.write(output_string)
+        # Check for planet letters (b-j)
+        planets = candidates[candidates.binary.isna()]
+        for output_string in self.replace_old_new_identifiers(planets):
+            f.write(output_string)
 
         f.write("\n***** CHECK FOR BINARY LETTER IN MAIN_ID *****\n")
-        
-        # Iterate through unique main_id values to check for binary letters
-        for identifier in self.data.main_id.unique():
-            # Check for circumbinary identifiers (ending with (AB))
-            if len(re.findall(r"[\s\d](\(AB\))$", identifier)) > 0:
-                counter += 1
-                # Remove the (AB) suffix and any leading/trailing whitespace
-                new_identifier = identifier[:-4].rstrip().replace("NAME ", "")
-                output_string = self.replace_old_new_identifier(
-                    identifier, new_identifier, "AB"
-                )
-                f.write(output_string + "\n")
-
-            # Check for AB suffix without parentheses
-            if len(re.findall(r"[\[a-z](AB)$|\s(AB)$|\d(AB)$]", identifier)) > 0:
-                counter += 1
-                # Remove the AB suffix
-                new_identifier = identifier[:-2].rstrip()
-                output_string = self.replace_old_new_identifier(
-                    identifier, new_identifier, "AB"
-                )
-                f.write(output_string + "\n")
-
-            # Check for regular binary identifiers (ending with A, B, C, S, or N)
-            if len(re.findall("[\s\d][ABCSN]$", identifier)) > 0:
-                counter += 1
-                # Remove the binary letter
-                new_identifier = identifier[:-1].strip()
-                output_string = self.replace_old_new_identifier(
-                    identifier, new_identifier, identifier[-1:]
-                )
-                f.write(output_string + "\n")
+
+        # Check for binary letters ((AB), AB, A, B, C, S or N), including the main_ids
+        # found by the previous check
+        candidates = Utils.main_id_letter_candidates(self.data.main_id.unique())
+        binaries = candidates[candidates.binary.notna()]
+        for output_string in self.replace_old_new_identifiers(binaries):
+            f.write(output_string + "\n")
 
         f.close()
+        counter = len(planets) + len(binaries)
         # Log the number of changes made
         logging.info(
             "Removed planet/binary letter from main_id. It happens "
@@ -1371,7 +1746,6 @@ class Emc(Catalog):
             + " times."
         )
 
-        
     def fill_missing_main_id(self) -> None:
         """
         Fill missing values in main_id related columns with data from other columns.
@@ -1418,7 +1792,7 @@ class Emc(Catalog):
         
         # Create 'angular_separation' by concatenating 'catalog' and 'angsep'
         self.data["angular_separation"] = (
-            self.data["catalog"] + ": " + self.data.angsep.astype(str)
+            self.data["catalog"].astype(str) + ": " + self.data.angsep.astype(str)
         )
 
     def check_same_host_different_id(self) -> None:
@@ -1475,8 +1849,14 @@ class Emc(Catalog):
         should check in Logs/post_main_id_query_checks.txt that the two main ids and coordinates are indeed
         different stars. Otherwise, the user can force a replacement.
 
+        The pairs of entries within the tolerance are found with a spatial index, and are grouped in
+        connected components (entries linked by a chain of close pairs). Each component with more than one
+        main_id is reported once, with the angular separation of its entries from the first one.
+
         :param self: The instance of the Emc class.
         :type self: Emc
+        :param tolerance: The tolerance in degrees (default is 1 arcsecond)
+        :type tolerance: float
         :return: None
         :rtype: None
         """
@@ -1490,52 +1870,49 @@ class Emc(Catalog):
         self.data.main_id_ra = self.data.main_id_ra.astype(float)
         self.data.main_id_dec = self.data.main_id_dec.astype(float)
 
-        # Create SkyCoord objects for each entry to facilitate astronomical calculations
-        self.data["skycoord"] = SkyCoord(
-            ra=self.data.main_id_ra * u.deg, dec=self.data.main_id_dec * u.deg, unit="deg"
+        # Find all the pairs of entries within the tolerance
+        data = self.data[self.data.main_id_ra.notna() & self.data.main_id_dec.notna()]
+        pairs = SkyIndex(data.main_id_ra, data.main_id_dec).query_pairs(tolerance)
+
+        # Group the entries linked by close pairs
+        components = Utils.connected_components(
+            range(len(data)), zip(pairs["first"], pairs["second"])
+        )
+        components = pd.Series(
+            [components[position] for position in range(len(data))], index=data.index
         )
 
-        # Iterate through each entry in the dataset
-        for i in self.data.index:
-            # Extract RA and Dec for the current entry
-            ra = self.data.at[i, "main_id_ra"]
-            dec = self.data.at[i, "main_id_dec"]
-    
-            # Create a subset of data within a wider rectangle around the current coordinates
-            sub = self.data.copy()
-            sub = sub[sub.main_id_ra < (ra + 2 * tolerance)]
-            sub = sub[sub.main_id_ra > (ra - 2 * tolerance)]
-            sub = sub[sub.main_id_dec > (dec - 2 * tolerance)]
-            sub = sub[sub.main_id_ra < (dec + 2 * tolerance)]
-    
-            # Calculate angular separation between the current entry and each entry in the subset
-            for j in sub.index:
-                sub.at[j, "angsep"] = (
-                    self.data.at[i, "skycoord"].separation(sub.at[j, "skycoord"]).value
+        # Keep the components with multiple unique main_ids
+        main_ids = data.main_id.groupby(components).transform("nunique")
+        data = data[main_ids > 1]
+
+        for _, sub in data.groupby(components[main_ids > 1], sort=True):
+            sub = sub.assign(
+                angsep=Utils.pairwise_separation(
+                    sub.main_id_ra.iloc[:1],
+                    sub.main_id_dec.iloc[:1],
+                    sub.main_id_ra,
+                    sub.main_id_dec,
+                )[0]
+            )
+            # If multiple main_ids are found, log this information
+            with pd.option_context("display.max_columns", 2000):
+                f.write(
+                    "FOUND SAME COORDINATES DIFFERENT MAINID\n"
+                    + sub[
+                        [
+                            "host",
+                            "main_id",
+                            "binary",
+                            "letter",
+                            "catalog",
+                            "angsep",
+                            "main_id_provenance",
+                        ]
+                    ].to_string()
+                    + "\n"
                 )
-            # Filter the subset to only include entries within the specified angular separation tolerance
-            sub = sub[sub.angsep <= tolerance]
 
-            # Check if there are multiple unique main_ids within the tolerance
-            if len(sub.main_id.unique()) > 1:
-                # If multiple main_ids are found, log this information
-                with pd.option_context("display.max_columns", 2000):
-                    f.write(
-                        "FOUND SAME COORDINATES DIFFERENT MAINID\n"
-                        + sub[
-                            [
-                                "host",
-                                "main_id",
-                                "binary",
-                                "letter",
-                                "catalog",
-                                "angsep",
-                                "main_id_provenance",
-                            ]
-                        ].to_string()
-                        + "\n"
-                    )
-                    
         # Log that the check has been completed
         logging.info("Checked if same coordinates found in main_ids.")
 
@@ -1544,15 +1921,16 @@ class Emc(Catalog):
 
     def group_by_list_id_check_main_id(self) -> None:
         """
-        Groups the data by 'list_id' and checks for inconsistencies in 'main_id'.
+        Groups the data by the identifiers in 'list_id' and checks for inconsistencies in
+        'main_id'.
 
         This function performs the following steps:
 
-        1. Groups the data by the 'list_id' column.
+        1. Builds an index from each identifier in the 'list_id' column to the rows that contain it, and groups the rows that share any identifier (directly or through other rows) with a union-find.
 
-        2. For each group, checks if the 'list_id' is not empty and if there are multiple unique 'main_id' values.
+        2. For each group, checks if there are multiple unique 'main_id' values.
 
-        3. If inconsistencies are found, it sets all 'main_id' values in the group to the first unique 'main_id'.
+        3. If inconsistencies are found, it sets all 'main_id' values in the group to the first 'main_id' of the group.
 
         4. Logs details of any inconsistencies found.
 
@@ -1567,25 +1945,49 @@ class Emc(Catalog):
         f.write("**** GROUP BY LIST_ID CHECK MAIN_ID ****\n")
         f.write("****************************************\n")
 
+        # Index of the rows (by position) that contain each identifier
+        tokens = (
+            self.data.list_id.fillna("")
+            .astype(str)
+            .reset_index(drop=True)
+            .str.split(",")
+            .explode()
+            .str.strip()
+        )
+        tokens = tokens[~tokens.isin(["", "nan"])]
+        positions = tokens.index.to_series(index=tokens.index)
+        first = positions.groupby(tokens.to_numpy()).transform("first")
+        edges = zip(first[first != positions], positions[first != positions])
+
+        # Each group is represented by its first row
+        components = Utils.connected_components(range(len(self.data)), edges)
+        groups = pd.DataFrame(
+            {
+                "root": [components[position] for position in range(len(self.data))],
+                "main_id": self.data.main_id.to_numpy(),
+            }
+        )
+        groups = groups[groups.groupby("root").main_id.transform("nunique") > 1]
+
         count = 0
-        # Group the data by list_id and iterate through each group
-        for ids, group in self.data.groupby(by="list_id"):
-            # Check if the list_id is not empty and there are multiple main_ids in the group
-            if ids != "" and len(set(group.main_id)) > 1:
-                # Update all rows with this list_id to have the same main_id (the first one in the group)
-                self.data.loc[self.data.list_id == ids, "main_id"] = list(
-                    group.main_id
-                )[0]
-                # Log the inconsistency
-                with pd.option_context("display.max_columns", 2000):
-                    f.write(
-                        "*** SAME LIST_ID, DIFFERENT MAIN_ID *** \n"
-                        + group[["catalog", "status", "letter", "main_id"]].to_string()
-                        + "\n"
-                    )
-                # Increment the counter for inconsistencies found
-                count = count + 1
-        
+        for root, group in groups.groupby("root"):
+            # Log the inconsistency
+            with pd.option_context("display.max_columns", 2000):
+                f.write(
+                    "*** SAME LIST_ID, DIFFERENT MAIN_ID *** \n"
+                    + self.data.iloc[group.index][
+                        ["catalog", "status", "letter", "main_id"]
+                    ].to_string()
+                    + "\n"
+                )
+            # Increment the counter for inconsistencies found
+            count = count + 1
+
+        # Update all rows of each group to have the same main_id (the first one)
+        self.data.iloc[
+            groups.index, self.data.columns.get_loc("main_id")
+        ] = groups.main_id.loc[groups.root].to_numpy()
+
         # Log the total number of inconsistencies found
         logging.info(
             "Planets that had a different main_id name but same SIMBAD alias: "
@@ -1633,37 +2035,36 @@ class Emc(Catalog):
     def group_by_main_id_set_main_id_aliases(self) -> None:
         """
         Groups the dataframe by main_id and combines alias and list_id columns into a single main_id_aliases column.
-        This function consolidates all identifiers for each unique main_id.
+        This function consolidates all identifiers for each unique main_id, as a sorted list without duplicates.
 
         :param self: The instance of the Emc class.
         :type self: Emc
         :return: None
         :rtype: None
         """
-        # Initialize the main_id_aliases column with empty strings
-        self.data["main_id_aliases"] = ""
-
-        # Iterate over each unique main_id in the dataframe
-        for host, group in self.data.groupby(by="main_id"):
-        # Initialize an empty string to store all aliases
-            main_id_aliases = ""
-
-            # Concatenate all aliases from the 'alias' column
-            for al in group.alias:
-                main_id_aliases = main_id_aliases+ "," + str(al)
-
-            # Concatenate all identifiers from the 'list_id' column
-            for al in group.list_id:
-                main_id_aliases = main_id_aliases + "," + str(al)
-
-            # Remove duplicates and unnecessary characters from main_id_aliases
-            main_id_aliases = ",".join(
-                [x for x in set(main_id_aliases.split(",")) if x]
-            )
-            main_id_aliases = main_id_aliases.replace("nan", "").replace(",,", ",")
-
-            # Update the main_id_aliases column for all rows with the current main_id
-            self.data.loc[self.data.main_id == host, "main_id_aliases"] = main_id_aliases
+        # Collect all the identifiers from the 'alias' and 'list_id' columns
+        identifiers = pd.DataFrame(
+            {
+                "main_id": np.concatenate([self.data.main_id.to_numpy()] * 2),
+                "identifier": pd.concat([self.data.alias, self.data.list_id])
+                .astype(str)
+                .str.split(",")
+                .to_numpy(),
+            }
+        ).explode("identifier")
+
+        # Remove duplicates and unnecessary values
+        identifiers = identifiers[
+            identifiers.main_id.notna() & ~identifiers.identifier.isin(["", "nan"])
+        ].drop_duplicates()
+
+        # Set the sorted identifiers of each main_id to all of its rows
+        main_id_aliases = (
+            identifiers.sort_values("identifier")
+            .groupby("main_id")
+            .identifier.agg(",".join)
+        )
+        self.data["main_id_aliases"] = self.data.main_id.map(main_id_aliases).fillna("")
 
     def cleanup_catalog(self) -> None:
         """
@@ -1719,7 +2120,9 @@ class Emc(Catalog):
         f1 = open("Logs/group_by_period_check_letter.txt", "a")
 
         # Group by main_id and binary
-        grouped_df = self.data.groupby(["main_id", "binary"], sort=True, as_index=False)
+        grouped_df = self.data.groupby(
+            ["main_id", "binary"], sort=True, as_index=False, observed=True
+        )
         f1.write("TOTAL NUMBER OF GROUPS: " + str(grouped_df.ngroups) + "\n")
         counter = 0
 
@@ -2045,7 +2448,7 @@ class Emc(Catalog):
         else:
             # Otherwise, include all unique discovery methods
             discovery_method = ",".join(
-                sorted(group.discovery_method.replace(np.nan, "").unique())
+                sorted(group.discovery_method.fillna("").unique())
             ).rstrip(",")
 
         # Clean up and format the discovery method string
@@ -2150,7 +2553,7 @@ class Emc(Catalog):
 
             # Flag the entry as a duplicate
             entry["duplicate_catalog_flag"] = 1
-            group['catalog_and_name']=group.catalog + ": " + group.catalog_name
+            group['catalog_and_name']=group.catalog.astype(str) + ": " + group.catalog_name
             entry["duplicate_names"] = ",".join(
                 sorted(group.catalog_and_name)
             ).rstrip(",")
@@ -2231,7 +2634,7 @@ class Emc(Catalog):
 
         # Group the data by main_id, binary, and letter
         grouped_df = self.data.groupby(
-            ["main_id", "binary", "letter"], sort=True, as_index=False
+            ["main_id", "binary", "letter"], sort=True, as_index=False, observed=True
         )
         
         counter = 0
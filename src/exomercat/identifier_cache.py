@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+
+class IdentifierCache:
+    """
+    A persistent cache of the identifiers resolved by SIMBAD.
+
+    The cache is a SQLite database, keyed by the queried identifier string. For each
+    identifier it stores the SIMBAD rows (main_id, ra_2, dec_2, ids) in the order they
+    were returned, together with the time of the query. Identifiers that SIMBAD could
+    not resolve are stored too (negative results), so that they are not uploaded again.
+    Entries older than their time-to-live are considered expired and are queried again.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "Cache/simbad_identifiers.sqlite",
+        ttl: float = 30,
+        negative_ttl: float = 7,
+    ) -> None:
+        """
+        Initialize an IdentifierCache instance, creating the database if needed.
+
+        :param self: An instance of class IdentifierCache
+        :type self: IdentifierCache
+        :param db_path: The path of the SQLite database
+        :type db_path: str
+        :param ttl: The time-to-live of the resolved identifiers, in days
+        :type ttl: float
+        :param negative_ttl: The time-to-live of the identifiers that were not resolved, in
+            days
+        :type negative_ttl: float
+        :return: None
+        :rtype: None
+        """
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        folder = os.path.dirname(db_path)
+        if folder != "":
+            os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS lookups "
+                "(identifier TEXT PRIMARY KEY, fetched REAL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (identifier TEXT, position INTEGER, "
+                "main_id TEXT, ra_2 REAL, dec_2 REAL, ids TEXT)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS results_identifier ON results (identifier)"
+            )
+
+    def lookup(self, identifiers: list) -> tuple:
+        """
+        Look up identifiers in the cache.
+
+        :param self: An instance of class IdentifierCache
+        :type self: IdentifierCache
+        :param identifiers: The identifiers to look up
+        :type identifiers: list
+        :return: A DataFrame with the cached rows (identifier, main_id, ra_2, dec_2, ids) of
+            the identifiers found, and the list of identifiers that are missing or expired
+            (in the input order). Identifiers that are known not to be resolved are in
+            neither.
+        :rtype: tuple
+        """
+        identifiers = list(dict.fromkeys(identifiers))
+        oldest = time.time() - self.ttl * 86400
+        oldest_negative = time.time() - self.negative_ttl * 86400
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute(
+                "CREATE TEMP TABLE requested (identifier TEXT PRIMARY KEY)"
+            )
+            connection.executemany(
+                "INSERT INTO requested VALUES (?)", [(x,) for x in identifiers]
+            )
+            cached = pd.read_sql_query(
+                "SELECT r.identifier, r.main_id, r.ra_2, r.dec_2, r.ids "
+                "FROM requested AS q "
+                "JOIN lookups AS l ON l.identifier = q.identifier "
+                "JOIN results AS r ON r.identifier = q.identifier "
+                "WHERE l.fetched >= ? ORDER BY r.identifier, r.position",
+                connection,
+                params=(oldest,),
+            )
+            unresolved = connection.execute(
+                "SELECT q.identifier FROM requested AS q "
+                "JOIN lookups AS l ON l.identifier = q.identifier "
+                "WHERE l.fetched >= ? AND NOT EXISTS "
+                "(SELECT 1 FROM results AS r WHERE r.identifier = q.identifier)",
+                (oldest_negative,),
+            ).fetchall()
+            connection.execute("DROP TABLE requested")
+        found = set(cached.identifier) | set(x[0] for x in unresolved)
+        missing = [x for x in identifiers if x not in found]
+        return cached, missing
+
+    def store(self, results: pd.DataFrame, queried: list = None) -> None:
+        """
+        Store the rows returned by SIMBAD for some identifiers, replacing previous entries.
+
+        :param self: An instance of class IdentifierCache
+        :type self: IdentifierCache
+        :param results: A DataFrame with columns identifier, main_id, ra_2, dec_2 and ids
+        :type results: pd.DataFrame
+        :param queried: The identifiers that were queried. Those without rows in results
+            are stored as not resolved. Defaults to the identifiers in results.
+        :type queried: list
+        :return: None
+        :rtype: None
+        """
+        if len(results) > 0:
+            results = results[["identifier", "main_id", "ra_2", "dec_2", "ids"]].copy()
+        else:
+            results = pd.DataFrame(
+                columns=["identifier", "main_id", "ra_2", "dec_2", "ids"]
+            )
+        results["position"] = results.groupby("identifier").cumcount()
+        if queried is None:
+            queried = []
+        identifiers = list(results.identifier.unique()) + list(queried)
+        identifiers = [(x,) for x in dict.fromkeys(identifiers)]
+        if len(identifiers) == 0:
+            return
+        now = time.time()
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.executemany(
+                "DELETE FROM results WHERE identifier = ?", identifiers
+            )
+            connection.executemany(
+                "INSERT INTO results (identifier, position, main_id, ra_2, dec_2, ids) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        str(row.identifier),
+                        int(row.position),
+                        str(row.main_id),
+                        float(row.ra_2),
+                        float(row.dec_2),
+                        str(row.ids),
+                    )
+                    for row in results.itertuples()
+                ],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO lookups (identifier, fetched) VALUES (?, ?)",
+                [(x[0], now) for x in identifiers],
+            )
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import pickle
+import threading
+import time
+
+import pandas as pd
+
+
+class QueryRecorder:
+    """
+    A record/replay layer for the TAP queries.
+
+    In record mode, the result of each query is stored on disk, keyed by the URL of the
+    service, the query string and the hash of the uploaded tables. In replay mode, the
+    stored results are served instead of querying the service, optionally after an
+    artificial latency, so that a whole run can be repeated (e.g. benchmarked or
+    profiled) without network access.
+    """
+
+    def __init__(
+        self, folder: str = "Recordings/", mode: str = "record", latency: float = 0.0
+    ) -> None:
+        """
+        Initialize a QueryRecorder instance.
+
+        :param self: An instance of class QueryRecorder
+        :type self: QueryRecorder
+        :param folder: The folder where the results of the queries are stored
+        :type folder: str
+        :param mode: Either 'record' or 'replay'
+        :type mode: str
+        :param latency: The time waited before serving each replayed query, in seconds
+        :type latency: float
+        :return: None
+        :rtype: None
+        """
+        if mode not in ["record", "replay"]:
+            raise ValueError("Unknown mode " + str(mode) + ", use record or replay.")
+        self.folder = folder
+        self.mode = mode
+        self.latency = latency
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def key(service, query: str, uploads_dict: dict) -> str:
+        """
+        Compute the key of a query from the service URL, the query and the uploads.
+
+        :param service: The service object used to perform the query
+        :type service: object
+        :param query: The query string
+        :type query: str
+        :param uploads_dict: A dictionary of astropy Tables to upload
+        :type uploads_dict: dict
+        :return: The hexadecimal SHA-256 digest
+        :rtype: str
+        """
+        sha = hashlib.sha256()
+        sha.update(str(getattr(service, "baseurl", "")).strip().encode("utf-8"))
+        sha.update(b"\0")
+        sha.update(query.encode("utf-8"))
+        for name in sorted(uploads_dict):
+            sha.update(b"\0" + name.encode("utf-8") + b"\0")
+            upload = uploads_dict[name].to_pandas()
+            sha.update(upload.to_csv(index=False).encode("utf-8"))
+        return sha.hexdigest()
+
+    def run(self, service, query: str, uploads_dict: dict, function) -> pd.DataFrame:
+        """
+        Run a query through the recorder.
+
+        :param self: An instance of class QueryRecorder
+        :type self: QueryRecorder
+        :param service: The service object used to perform the query
+        :type service: object
+        :param query: The query string
+        :type query: str
+        :param uploads_dict: A dictionary of astropy Tables to upload
+        :type uploads_dict: dict
+        :param function: The function that performs the query, without arguments
+        :type function: function
+        :return: The result of the query
+        :rtype: pd.DataFrame
+        """
+        file_path = os.path.join(
+            self.folder, self.key(service, query, uploads_dict) + ".pkl"
+        )
+        if self.mode == "replay":
+            if not os.path.exists(file_path):
+                raise ValueError("No recorded result for query: " + query)
+            with open(file_path, "rb") as f:
+                recorded = pickle.load(f)
+            time.sleep(self.latency)
+            return recorded["data"]
+
+        table = function()
+        # Write to a temporary file first, so that concurrent queries or an interrupted
+        # run never leave a partial recording
+        temporary_path = (
+            file_path + "." + str(os.getpid()) + "_" + str(threading.get_ident()) + ".tmp"
+        )
+        with open(temporary_path, "wb") as f:
+            pickle.dump(
+                {"query": query, "data": table}, f, protocol=pickle.HIGHEST_PROTOCOL
+            )
+        os.replace(temporary_path, file_path)
+        return table
@@ -0,0 +1,253 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from .utility_functions import UtilityFunctions as Utils
+
+
+class SimbadSnapshot:
+    """
+    A local snapshot of the SIMBAD objects relevant to the exoplanet hosts.
+
+    The snapshot is a SQLite database with the objects (main_id, coordinates, object
+    type and list of identifiers), an index of all their identifiers and an R*Tree
+    spatial index of their coordinates. It can be built from a dump of the SIMBAD
+    'basic', 'ident' and 'ids' tables and is refreshed incrementally with the results of
+    the TAP queries. If refresh is disabled, SIMBAD is never queried and the main
+    identifiers are resolved with the snapshot only.
+    """
+
+    def __init__(
+        self, db_path: str = "Cache/simbad_snapshot.sqlite", refresh: bool = True
+    ) -> None:
+        """
+        Initialize a SimbadSnapshot instance, creating the database if needed.
+
+        :param self: An instance of class SimbadSnapshot
+        :type self: SimbadSnapshot
+        :param db_path: The path of the SQLite database
+        :type db_path: str
+        :param refresh: If True, what is missing from the snapshot is queried on SIMBAD and
+            added to the snapshot. If False, SIMBAD is not queried.
+        :type refresh: bool
+        :return: None
+        :rtype: None
+        """
+        self.db_path = db_path
+        self.refresh = refresh
+        folder = os.path.dirname(db_path)
+        if folder != "":
+            os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS objects (id INTEGER PRIMARY KEY, "
+                "main_id TEXT UNIQUE, ra REAL, dec REAL, type TEXT, ids TEXT, "
+                "fetched REAL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS identifiers (identifier TEXT, "
+                "object INTEGER, PRIMARY KEY (identifier, object))"
+            )
+            connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS positions "
+                "USING rtree(id, min_ra, max_ra, min_dec, max_dec)"
+            )
+
+    @staticmethod
+    def normalize(identifier: str) -> str:
+        """
+        Normalize an identifier by collapsing the white spaces, as SIMBAD does.
+
+        :param identifier: The identifier
+        :type identifier: str
+        :return: The normalized identifier
+        :rtype: str
+        """
+        return " ".join(str(identifier).split())
+
+    @staticmethod
+    def identifier_keys(identifiers: list) -> list:
+        """
+        Get the keys under which the identifiers of an object are indexed: the normalized
+        identifiers. Identifiers are not indexed without their prefixes (e.g. '* 51 Peg'
+        is not indexed as '51 Peg'), as the SIMBAD queries do not match them either.
+
+        :param identifiers: The identifiers of an object
+        :type identifiers: list
+        :return: The unique keys
+        :rtype: list
+        """
+        keys = []
+        for identifier in identifiers:
+            identifier = SimbadSnapshot.normalize(identifier)
+            if identifier != "":
+                keys.append(identifier)
+        return list(dict.fromkeys(keys))
+
+    def store(self, results: pd.DataFrame) -> None:
+        """
+        Add or update objects in the snapshot.
+
+        :param self: An instance of class SimbadSnapshot
+        :type self: SimbadSnapshot
+        :param results: A DataFrame with columns main_id, ra_2, dec_2 and ids ('|'
+            separated), and optionally identifier (the queried identifier, indexed too)
+            and type
+        :type results: pd.DataFrame
+        :return: None
+        :rtype: None
+        """
+        if len(results) == 0:
+            return
+        now = time.time()
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            for row in results.to_dict("records"):
+                main_id = str(row["main_id"])
+                ra = float(row["ra_2"])
+                dec = float(row["dec_2"])
+                ids = str(row["ids"]) if pd.notna(row["ids"]) else main_id
+                connection.execute(
+                    "INSERT INTO objects (main_id, ra, dec, type, ids, fetched) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (main_id) DO UPDATE SET "
+                    "ra = excluded.ra, dec = excluded.dec, "
+                    "type = COALESCE(excluded.type, type), ids = excluded.ids, "
+                    "fetched = excluded.fetched",
+                    (main_id, ra, dec, row.get("type"), ids, now),
+                )
+                object_id = connection.execute(
+                    "SELECT id FROM objects WHERE main_id = ?", (main_id,)
+                ).fetchone()[0]
+                connection.execute(
+                    "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?)",
+                    (object_id, ra, ra, dec, dec),
+                )
+                identifiers = [main_id] + ids.split("|")
+                if "identifier" in row:
+                    identifiers.append(row["identifier"])
+                connection.executemany(
+                    "INSERT OR IGNORE INTO identifiers VALUES (?, ?)",
+                    [(key, object_id) for key in self.identifier_keys(identifiers)],
+                )
+
+    def load_dump(self, basic_file: str, ident_file: str, ids_file: str) -> None:
+        """
+        Add the objects of a dump of the SIMBAD tables to the snapshot.
+
+        :param self: An instance of class SimbadSnapshot
+        :type self: SimbadSnapshot
+        :param basic_file: A .csv file with the columns oid, main_id, ra, dec and otype of
+            the SIMBAD 'basic' table
+        :type basic_file: str
+        :param ident_file: A .csv file with the columns oidref and id of the SIMBAD
+            'ident' table
+        :type ident_file: str
+        :param ids_file: A .csv file with the columns oidref and ids of the SIMBAD 'ids'
+            table
+        :type ids_file: str
+        :return: None
+        :rtype: None
+        """
+        basic = pd.read_csv(basic_file)
+        ident = pd.read_csv(ident_file)
+        ids = pd.read_csv(ids_file)
+        basic = basic.dropna(subset=["ra", "dec"])
+        objects = basic.merge(ids, left_on="oid", right_on="oidref", how="left")
+        objects["ids"] = objects["ids"].fillna(objects["main_id"])
+        objects = objects.rename(
+            columns={"ra": "ra_2", "dec": "dec_2", "otype": "type"}
+        )
+        self.store(objects[["main_id", "ra_2", "dec_2", "type", "ids"]])
+
+        # Identifiers that are in the 'ident' table but not in the 'ids' list
+        ident = ident.merge(basic[["oid", "main_id"]], left_on="oidref", right_on="oid")
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            object_ids = dict(connection.execute("SELECT main_id, id FROM objects"))
+            connection.executemany(
+                "INSERT OR IGNORE INTO identifiers VALUES (?, ?)",
+                [
+                    (key, object_ids[row.main_id])
+                    for row in ident.itertuples()
+                    for key in self.identifier_keys([row.id])
+                ],
+            )
+
+    def lookup(self, identifiers: list) -> tuple:
+        """
+        Look up identifiers in the snapshot.
+
+        :param self: An instance of class SimbadSnapshot
+        :type self: SimbadSnapshot
+        :param identifiers: The identifiers to look up
+        :type identifiers: list
+        :return: A DataFrame with the rows (identifier, main_id, ra_2, dec_2, ids) of the
+            identifiers found, and the list of identifiers that are not in the snapshot (in
+            the input order)
+        :rtype: tuple
+        """
+        identifiers = list(dict.fromkeys(identifiers))
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute(
+                "CREATE TEMP TABLE requested (identifier TEXT PRIMARY KEY, key TEXT)"
+            )
+            connection.executemany(
+                "INSERT INTO requested VALUES (?, ?)",
+                [(x, self.normalize(x)) for x in identifiers],
+            )
+            found = pd.read_sql_query(
+                "SELECT q.identifier, o.main_id, o.ra AS ra_2, o.dec AS dec_2, o.ids "
+                "FROM requested AS q "
+                "JOIN identifiers AS i ON i.identifier = q.key "
+                "JOIN objects AS o ON o.id = i.object "
+                "ORDER BY q.identifier, o.id",
+                connection,
+            )
+            connection.execute("DROP TABLE requested")
+        missing = [x for x in identifiers if x not in set(found.identifier)]
+        return found, missing
+
+    def cone_search(self, upload: pd.DataFrame, tolerance: float) -> pd.DataFrame:
+        """
+        Find the objects of the snapshot around the given coordinates.
+
+        The candidates are selected with the spatial index, and then filtered by their
+        angular separation.
+
+        :param self: An instance of class SimbadSnapshot
+        :type self: SimbadSnapshot
+        :param upload: A DataFrame with the columns hostbinary, ra and dec
+        :type upload: pd.DataFrame
+        :param tolerance: The radius of the search, in degrees
+        :type tolerance: float
+        :return: A DataFrame with the columns main_id, dec_2, ra_2, type, hostbinary, ra,
+            dec and ids, as the SIMBAD coordinate query (the angular separation is
+            calculated by get_coordinates_from_simbad, as for the remote results)
+        :rtype: pd.DataFrame
+        """
+        rows = []
+        with closing(sqlite3.connect(self.db_path)) as connection:
+            for row in upload[["hostbinary", "ra", "dec"]].itertuples(index=False):
+                ra, dec = float(row.ra), float(row.dec)
+                for min_ra, max_ra in Utils.cone_boxes(ra, dec, tolerance):
+                    candidates = connection.execute(
+                        "SELECT o.main_id, o.dec, o.ra, o.type, o.ids FROM positions AS p "
+                        "JOIN objects AS o ON o.id = p.id WHERE p.max_ra >= ? "
+                        "AND p.min_ra <= ? AND p.max_dec >= ? AND p.min_dec <= ?",
+                        (min_ra, max_ra, dec - tolerance, dec + tolerance),
+                    ).fetchall()
+                    for main_id, dec_2, ra_2, otype, ids in candidates:
+                        rows.append(
+                            [main_id, dec_2, ra_2, otype, row.hostbinary, ra, dec, ids]
+                        )
+        table = pd.DataFrame(
+            rows,
+            columns=["main_id", "dec_2", "ra_2", "type", "hostbinary", "ra", "dec", "ids"],
+        )
+        table = table.drop_duplicates(subset=["main_id", "hostbinary"])
+
+        separation = Utils.angular_separation(
+            table.ra, table.dec, table.ra_2, table.dec_2
+        )
+        return table[separation <= tolerance].reset_index(drop=True)
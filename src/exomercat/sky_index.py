@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from .utility_functions import UtilityFunctions as Utils
+
+
+class SkyIndex:
+    """
+    A spatial index of sky coordinates, to find the pairs of close objects without
+    comparing all of them.
+
+    The coordinates are converted to 3D unit vectors, so that the angular separation is
+    a monotonic function of the chord length, and there is no special case at RA = 0 or
+    at the poles. The vectors are hashed on a cubic grid with the size of the chord of
+    the search radius: the pairs within the radius can only be in the same or in
+    adjacent cells, which are joined in a vectorized way.
+    """
+
+    def __init__(self, ra, dec) -> None:
+        """
+        Initialize a SkyIndex instance.
+
+        :param self: An instance of class SkyIndex
+        :type self: SkyIndex
+        :param ra: The right ascensions, in degrees
+        :type ra: array-like
+        :param dec: The declinations, in degrees
+        :type dec: array-like
+        :return: None
+        :rtype: None
+        """
+        self.vectors = Utils.sky_unit_vectors(ra, dec)
+
+    @staticmethod
+    def chord(radius: float) -> float:
+        """
+        Convert an angular radius to the chord length between the unit vectors.
+
+        :param radius: The angular radius, in degrees
+        :type radius: float
+        :return: The chord length
+        :rtype: float
+        """
+        return 2 * np.sin(np.radians(radius) / 2)
+
+    def query_pairs(self, radius: float) -> pd.DataFrame:
+        """
+        Find all the pairs of objects within the given angular separation.
+
+        :param self: An instance of class SkyIndex
+        :type self: SkyIndex
+        :param radius: The maximum angular separation, in degrees
+        :type radius: float
+        :return: A DataFrame with the positions (in the input order) of the two objects of
+            each pair (first < second) and their angular separation in degrees, sorted by
+            first and second
+        :rtype: pd.DataFrame
+        """
+        chord = self.chord(radius)
+        cells = pd.DataFrame(
+            np.floor(self.vectors / chord).astype(np.int64), columns=["x", "y", "z"]
+        )
+        cells["position"] = np.arange(len(cells))
+
+        pairs = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    neighbours = cells.assign(
+                        x=cells.x + dx, y=cells.y + dy, z=cells.z + dz
+                    )
+                    candidates = cells.merge(
+                        neighbours, on=["x", "y", "z"], suffixes=("_1", "_2")
+                    )
+                    candidates = candidates[
+                        candidates.position_1 < candidates.position_2
+                    ]
+                    pairs.append(
+                        candidates[["position_1", "position_2"]].to_numpy().T
+                    )
+        first, second = np.concatenate(pairs, axis=1)
+
+        distances = np.linalg.norm(self.vectors[first] - self.vectors[second], axis=1)
+        close = distances <= chord
+        pairs = pd.DataFrame(
+            {
+                "first": first[close],
+                "second": second[close],
+                "angsep": np.degrees(
+                    2 * np.arcsin(np.clip(distances[close] / 2, 0, 1))
+                ),
+            }
+        )
+        return pairs.sort_values(["first", "second"]).reset_index(drop=True)
@@ -0,0 +1,202 @@
+import configparser
+import glob
+import hashlib
+import inspect
+import logging
+import os
+import pickle
+
+from . import catalogs, utility_functions
+from .utility_functions import UtilityFunctions as Utils
+
+
+class StepCache:
+    """
+    A cache for the intermediate results of a chain of Catalog methods.
+
+    Each step is identified by a key that combines the key of the previous step, the
+    method name, its arguments, its source code and the fingerprint of the
+    configuration it depends on. The first key is the fingerprint of the input file.
+    The log files the steps append to are not part of the keys, so that the same
+    results are reused when the logs are written to different files (e.g. in the
+    parallel input stage).
+    A rerun resumes from the last step whose key is still valid, so that, e.g., editing
+    a section of the 'replacements.ini' file only reruns the steps from the one
+    that reads it.
+    """
+
+    def __init__(self, folder: str = "Cache/") -> None:
+        """
+        Initialize a StepCache instance.
+
+        :param self: An instance of class StepCache
+        :type self: StepCache
+        :param folder: The folder where the intermediate results are stored
+        :type folder: str
+        :return: None
+        :rtype: None
+        """
+        self.folder = folder
+
+    @staticmethod
+    def fingerprint(*parts) -> str:
+        """
+        Compute a hash of the representation of the given objects.
+
+        :param parts: The objects to hash
+        :type parts: tuple
+        :return: The hexadecimal SHA-256 digest
+        :rtype: str
+        """
+        sha = hashlib.sha256()
+        for part in parts:
+            sha.update(repr(part).encode("utf-8"))
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    @staticmethod
+    def file_fingerprint(file_path: str) -> str:
+        """
+        Compute a hash of the content of a file. A missing file has an empty fingerprint.
+
+        :param file_path: The path of the file
+        :type file_path: str
+        :return: The hexadecimal SHA-256 digest of the file
+        :rtype: str
+        """
+        if not os.path.exists(file_path):
+            return ""
+        sha = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        return sha.hexdigest()
+
+    @staticmethod
+    def config_fingerprint(sections: list) -> str:
+        """
+        Compute a hash of the given sections of the 'replacements.ini' file. A missing
+        section counts as empty.
+
+        :param sections: The names of the sections
+        :type sections: list
+        :return: The hexadecimal SHA-256 digest of the sections
+        :rtype: str
+        """
+        config = {}
+        for section in sections:
+            try:
+                config[section] = sorted(
+                    Utils.read_config_replacements(section).items()
+                )
+            except configparser.NoSectionError:
+                config[section] = []
+        return StepCache.fingerprint(config)
+
+    def step_keys(
+        self, cat, steps: list, input_key: str, log_files: list = ()
+    ) -> list:
+        """
+        Compute the chained keys of the steps.
+
+        :param self: An instance of class StepCache
+        :type self: StepCache
+        :param cat: The catalog the steps are applied to
+        :type cat: Catalog
+        :param steps: A list of (method name, arguments, configuration fingerprint) tuples
+        :type steps: list
+        :param input_key: The fingerprint of the input of the first step
+        :type input_key: str
+        :param log_files: The log files the steps append to, which are replaced by their
+            position in the arguments
+        :type log_files: list
+        :return: The list of keys, one per step
+        :rtype: list
+        """
+        # The helpers in UtilityFunctions and in the Catalog base class are part of the
+        # code of every step
+        common_source = inspect.getsource(utility_functions) + inspect.getsource(
+            catalogs
+        )
+        log_files = list(log_files)
+        keys = []
+        key = input_key
+        for method, args, config in steps:
+            source = inspect.getsource(getattr(type(cat), method))
+            args = tuple(
+                ("log_file", log_files.index(arg)) if arg in log_files else arg
+                for arg in args
+            )
+            key = self.fingerprint(key, method, args, source, common_source, config)
+            keys.append(key)
+        return keys
+
+    def run(self, cat, steps: list, input_key: str, log_files: list = ()) -> None:
+        """
+        Run a chain of methods on the catalog, resuming from the cached results.
+
+        The intermediate DataFrame is stored after each step, together with the text the
+        steps appended to the log files so far. When the chain resumes, the cached
+        text is appended again to the log files, so that they are the same as in a full
+        run. The text is stored by the position of the log file in log_files, so that it
+        is replayed in the current log files. Stored results of outdated chains are
+        removed.
+
+        :param self: An instance of class StepCache
+        :type self: StepCache
+        :param cat: The catalog the steps are applied to
+        :type cat: Catalog
+        :param steps: A list of (method name, arguments, configuration fingerprint) tuples
+        :type steps: list
+        :param input_key: The fingerprint of the input of the first step
+        :type input_key: str
+        :param log_files: The log files the steps append to
+        :type log_files: list
+        :return: None
+        :rtype: None
+        """
+        keys = self.step_keys(cat, steps, input_key, log_files)
+        folder = os.path.join(self.folder, cat.name)
+        os.makedirs(folder, exist_ok=True)
+
+        # Find the last step that is still valid
+        start = 0
+        logs = {}
+        for i in reversed(range(len(keys))):
+            cache_file = os.path.join(folder, keys[i] + ".pkl")
+            if os.path.exists(cache_file):
+                with open(cache_file, "rb") as f:
+                    cached = pickle.load(f)
+                cat.data = cached["data"]
+                logs = cached["logs"]
+                for position, text in logs.items():
+                    with open(log_files[position], "a") as f:
+                        f.write(text)
+                start = i + 1
+                logging.info(
+                    "Resumed " + cat.name + " from cached step " + steps[i][0] + "."
+                )
+                break
+
+        # Run the remaining steps, storing their results
+        for i in range(start, len(steps)):
+            method, args, _ = steps[i]
+            sizes = {
+                log_file: os.path.getsize(log_file) if os.path.exists(log_file) else 0
+                for log_file in log_files
+            }
+            getattr(cat, method)(*args)
+            for position, log_file in enumerate(log_files):
+                if os.path.exists(log_file):
+                    with open(log_file) as f:
+                        f.seek(sizes[log_file])
+                        logs[position] = logs.get(position, "") + f.read()
+            with open(os.path.join(folder, keys[i] + ".pkl"), "wb") as f:
+                pickle.dump(
+                    {"data": cat.data, "logs": logs}, f, protocol=pickle.HIGHEST_PROTOCOL
+                )
+
+        # Remove the results of outdated chains
+        for cache_file in glob.glob(os.path.join(folder, "*.pkl")):
+            if os.path.basename(cache_file)[:-4] not in keys:
+                os.remove(cache_file)
@@ -0,0 +1,374 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+from astropy.table import Table
+
+from .utility_functions import UtilityFunctions as Utils
+
+
+class TicStore:
+    """
+    A local store of the subset of the TESS Input Catalog (IV/39/tic82) used by
+    Exo-MerCat.
+
+    The store is a SQLite database with one row per TIC star, keyed by the TIC
+    identifier, with one column per TIC field used in the queries (coordinates and
+    cross-identifications), and an R*Tree spatial index of the coordinates. Queries are
+    answered locally, and only the uploaded rows that are missing from the store are
+    queried on VizieR. Their results are added to the store, so that it grows
+    incrementally. If refresh is disabled, VizieR is never queried.
+
+    Since the store only holds part of the TIC, a cone search is answered locally only
+    if its cone is contained in a cone that was fully fetched from VizieR before. The
+    fetched cones (center and radius) are recorded in the store for this purpose.
+    """
+
+    # The TIC fields in the store, with their pandas types
+    columns = {
+        "TIC": "Int64",
+        "ra_2": "float64",
+        "dec_2": "float64",
+        "GAIA": "Int64",
+        "UCAC4": "object",
+        "2MASS": "object",
+        "WISEA": "object",
+        "KIC": "Int64",
+        "HIP": "Int64",
+        "TYC": "object",
+    }
+
+    def __init__(
+        self, db_path: str = "Cache/tic_store.sqlite", refresh: bool = True
+    ) -> None:
+        """
+        Initialize a TicStore instance, creating the database if needed.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param db_path: The path of the SQLite database
+        :type db_path: str
+        :param refresh: If True, the rows missing from the store are queried on VizieR and
+            added to the store. If False, VizieR is not queried.
+        :type refresh: bool
+        :return: None
+        :rtype: None
+        """
+        self.db_path = db_path
+        self.refresh = refresh
+        folder = os.path.dirname(db_path)
+        if folder != "":
+            os.makedirs(folder, exist_ok=True)
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS stars (TIC INTEGER PRIMARY KEY, ra_2 REAL, '
+                'dec_2 REAL, GAIA INTEGER, UCAC4 TEXT, "2MASS" TEXT, WISEA TEXT, '
+                "KIC INTEGER, HIP INTEGER, TYC TEXT, fetched REAL)"
+            )
+            connection.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS positions "
+                "USING rtree(id, min_ra, max_ra, min_dec, max_dec)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cones (ra REAL, dec REAL, radius REAL, "
+                "fetched REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS cones_dec ON cones (dec)")
+
+    def store(self, results: pd.DataFrame) -> None:
+        """
+        Add or update stars in the store.
+
+        Fields that are not in the results (e.g. the coordinates, which the TOI query does
+        not select) keep their stored value.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param results: The raw result of a TIC query, with the TIC column and any of the
+            other fields of the store
+        :type results: pd.DataFrame
+        :return: None
+        :rtype: None
+        """
+        if len(results) == 0:
+            return
+        fields = [column for column in self.columns if column in results.columns]
+        names = ", ".join('"' + column + '"' for column in fields)
+        updates = ", ".join(
+            '"' + column + '" = excluded."' + column + '"'
+            for column in fields
+            if column != "TIC"
+        )
+        now = time.time()
+        rows = [
+            tuple(None if pd.isna(value) else value for value in row) + (now,)
+            for row in results[fields]
+            .drop_duplicates(subset="TIC")
+            .astype(object)
+            .itertuples(index=False)
+        ]
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.executemany(
+                "INSERT INTO stars ("
+                + names
+                + ", fetched) VALUES ("
+                + ", ".join(["?"] * (len(fields) + 1))
+                + ") ON CONFLICT (TIC) DO UPDATE SET "
+                + updates
+                + (", " if updates != "" else "")
+                + "fetched = excluded.fetched",
+                rows,
+            )
+            if "ra_2" in fields and "dec_2" in fields:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (int(tic), float(ra), float(ra), float(dec), float(dec))
+                        for tic, ra, dec in results[["TIC", "ra_2", "dec_2"]]
+                        .dropna()
+                        .itertuples(index=False)
+                    ],
+                )
+
+    def store_cones(self, upload: pd.DataFrame, tolerance: float) -> None:
+        """
+        Record the cones that were fully fetched from VizieR.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param upload: The uploaded rows of the cone search, with the columns ra and dec
+        :type upload: pd.DataFrame
+        :param tolerance: The radius of the search, in degrees
+        :type tolerance: float
+        :return: None
+        :rtype: None
+        """
+        now = time.time()
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.executemany(
+                "INSERT INTO cones VALUES (?, ?, ?, ?)",
+                [
+                    (float(ra), float(dec), float(tolerance), now)
+                    for ra, dec in upload[["ra", "dec"]].dropna().itertuples(index=False)
+                ],
+            )
+
+    def fetched_cone(
+        self, connection, ra: float, dec: float, tolerance: float
+    ) -> bool:
+        """
+        Check if a cone is contained in a cone that was fully fetched from VizieR.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param connection: The connection to the database
+        :type connection: sqlite3.Connection
+        :param ra: The right ascension of the center of the cone, in degrees
+        :type ra: float
+        :param dec: The declination of the center of the cone, in degrees
+        :type dec: float
+        :param tolerance: The radius of the cone, in degrees
+        :type tolerance: float
+        :return: True if all the TIC stars of the cone are in the store
+        :rtype: bool
+        """
+        cones = np.array(
+            connection.execute(
+                "SELECT ra, dec, radius FROM cones WHERE radius >= ? "
+                "AND dec >= ? - radius AND dec <= ? + radius",
+                (tolerance, dec, dec),
+            ).fetchall(),
+            dtype=float,
+        ).reshape(-1, 3)
+        separation = Utils.angular_separation(ra, dec, cones[:, 0], cones[:, 1])
+        # Allow for the rounding errors of the separation of identical centers
+        return bool((separation + tolerance <= cones[:, 2] + 1e-9).any())
+
+    def read(self, connection, sql: str, parameters: tuple = ()) -> pd.DataFrame:
+        """
+        Read stars from the store, with the same types as the results of a query.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param connection: The connection to the database
+        :type connection: sqlite3.Connection
+        :param sql: The query, selecting all the fields of the 'stars' table as 's'
+        :type sql: str
+        :param parameters: The parameters of the query
+        :type parameters: tuple
+        :return: The stars
+        :rtype: pd.DataFrame
+        """
+        stars = pd.read_sql_query(sql, connection, params=parameters)
+        for column, dtype in self.columns.items():
+            if dtype == "object":
+                stars[column] = stars[column].astype(object).where(
+                    stars[column].notna(), np.nan
+                )
+            else:
+                stars[column] = stars[column].astype(dtype)
+        return stars
+
+    def join(self, upload: pd.DataFrame, column: str, fields: list) -> tuple:
+        """
+        Join the uploaded rows with the stars of the store, by TIC identifier.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param upload: The uploaded rows
+        :type upload: pd.DataFrame
+        :param column: The column of the upload with the TIC identifiers
+        :type column: str
+        :param fields: The fields of the store to return. If they include the coordinates,
+            stars without coordinates are considered missing.
+        :type fields: list
+        :return: The uploaded rows joined with the fields of their star (in the upload
+            order), and the uploaded rows that are missing from the store
+        :rtype: tuple
+        """
+        identifiers = [int(x) for x in pd.unique(upload[column].dropna())]
+        condition = " AND s.ra_2 IS NOT NULL" if "ra_2" in fields else ""
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute("CREATE TEMP TABLE requested (TIC INTEGER PRIMARY KEY)")
+            connection.executemany(
+                "INSERT INTO requested VALUES (?)", [(x,) for x in identifiers]
+            )
+            stars = self.read(
+                connection,
+                "SELECT s.* FROM requested AS q JOIN stars AS s ON s.TIC = q.TIC"
+                + condition,
+            )
+            connection.execute("DROP TABLE requested")
+        keys = upload[column].astype("Int64")
+        found = keys.isin(stars.TIC).fillna(False).astype(bool)
+        matched = stars.set_index(stars.TIC.astype("int64")).loc[
+            keys[found].astype("int64").to_numpy(), fields
+        ]
+        rows = pd.concat(
+            [upload[found].reset_index(drop=True), matched.reset_index(drop=True)],
+            axis=1,
+        )
+        return rows, upload[~found]
+
+    def cone_search(self, upload: pd.DataFrame, tolerance: float, fields: list) -> tuple:
+        """
+        Find the stars of the store around the uploaded coordinates.
+
+        An uploaded row is answered locally only if its cone is contained in a cone that
+        was fully fetched from VizieR, even if there are no stars in it. The stars are
+        selected with the spatial index, and then filtered by their angular separation.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param upload: The uploaded rows, with the columns ra and dec
+        :type upload: pd.DataFrame
+        :param tolerance: The radius of the search, in degrees
+        :type tolerance: float
+        :param fields: The fields of the store to return
+        :type fields: list
+        :return: The uploaded rows joined with the fields of the stars around them, and
+            the uploaded rows whose cone was not fetched
+        :rtype: tuple
+        """
+        rows = []
+        found = []
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            for position, row in enumerate(upload.itertuples(index=False)):
+                ra, dec = float(row.ra), float(row.dec)
+                if not self.fetched_cone(connection, ra, dec, tolerance):
+                    continue
+                found.append(position)
+                stars = [
+                    self.read(
+                        connection,
+                        "SELECT s.* FROM positions AS p JOIN stars AS s "
+                        "ON s.TIC = p.id WHERE p.max_ra >= ? AND p.min_ra <= ? "
+                        "AND p.max_dec >= ? AND p.min_dec <= ?",
+                        (min_ra, max_ra, dec - tolerance, dec + tolerance),
+                    )
+                    for min_ra, max_ra in Utils.cone_boxes(ra, dec, tolerance)
+                ]
+                stars = pd.concat(
+                    [x for x in stars if len(x) > 0] or stars[:1], ignore_index=True
+                ).drop_duplicates(subset="TIC")
+
+                separation = Utils.angular_separation(ra, dec, stars.ra_2, stars.dec_2)
+                stars = stars[separation <= tolerance]
+                if len(stars) > 0:
+                    matched = pd.DataFrame(
+                        [row] * len(stars), columns=upload.columns
+                    ).reset_index(drop=True)
+                    rows.append(
+                        pd.concat(
+                            [matched, stars[fields].reset_index(drop=True)], axis=1
+                        )
+                    )
+        if len(rows) > 0:
+            rows = pd.concat(rows, ignore_index=True)
+        else:
+            rows = pd.DataFrame(columns=list(upload.columns) + fields)
+        missing = upload[~np.isin(np.arange(len(upload)), found)]
+        return rows, missing
+
+    def query(
+        self,
+        service,
+        query: str,
+        upload_name: str,
+        upload: pd.DataFrame,
+        fields: list,
+        column: str = None,
+        tolerance: float = None,
+    ) -> pd.DataFrame:
+        """
+        Run a TIC query, answering locally what is in the store.
+
+        The uploaded rows that are missing from the store are queried on VizieR (if
+        refresh is enabled), and the results are added to the store, as well as the cones
+        of the cone searches. The result is then normalized as the result of
+        Utils.perform_query.
+
+        :param self: An instance of class TicStore
+        :type self: TicStore
+        :param service: The service object used to perform the query
+        :type service: object
+        :param query: The query, joining the upload with the TIC
+        :type query: str
+        :param upload_name: The name of the upload in the query
+        :type upload_name: str
+        :param upload: The uploaded rows
+        :type upload: pd.DataFrame
+        :param fields: The fields of the TIC selected by the query, in order
+        :type fields: list
+        :param column: The column of the upload with the TIC identifiers, for the queries
+            by identifier
+        :type column: str
+        :param tolerance: The radius of the search in degrees, for the queries by
+            coordinates
+        :type tolerance: float
+        :return: The normalized result of the query
+        :rtype: pd.DataFrame
+        """
+
+        def lookup():
+            if column is not None:
+                return self.join(upload, column, fields)
+            else:
+                return self.cone_search(upload, tolerance, fields)
+
+        rows, missing = lookup()
+        if self.refresh and len(missing) > 0:
+            table = Utils.perform_query(
+                service,
+                query,
+                uploads_dict={upload_name: Table.from_pandas(missing)},
+                normalize=False,
+            )
+            self.store(table)
+            if column is None:
+                self.store_cones(missing, tolerance)
+            rows, _ = lookup()
+        return Utils.normalize_query_result(rows)
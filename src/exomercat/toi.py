@@ -45,6 +45,7 @@ class Toi(Catalog):
         super().__init__()
         self.name = "toi"
         self.data = None
+        self.tic_store = None  # Optional TicStore for the TIC query
         self.columns = {
             "tid": Int64Dtype(),
             "toi": Float64Dtype(),
@@ -114,8 +115,19 @@ class Toi(Catalog):
         tap_service = pyvo.dal.TAPService(" http://TAPVizieR.cds.unistra.fr/TAPVizieR/tap/")
 
         query = """SELECT tc.tid,  db.TIC, db.UCAC4, db."2MASS", db.WISEA, db.GAIA, db.KIC, db.HIP, db.TYC FROM "IV/39/tic82" AS db JOIN TAP_UPLOAD.t1 AS tc ON db.TIC = tc.tid"""
-        t2 = Table.from_pandas(self.data[["tid"]])
-        result = Utils.perform_query(tap_service, query, uploads_dict={"t1": t2})
+        if self.tic_store is not None:
+            # Answer locally what is in the store
+            result = self.tic_store.query(
+                tap_service,
+                query,
+                "t1",
+                self.data[["tid"]],
+                ["TIC", "UCAC4", "2MASS", "WISEA", "GAIA", "KIC", "HIP", "TYC"],
+                column="tid",
+            )
+        else:
+            t2 = Table.from_pandas(self.data[["tid"]])
+            result = Utils.perform_query(tap_service, query, uploads_dict={"t1": t2})
         result["tid"] = result["tid"].astype(int)
         result = result[["tid", "ids"]]
         result=result.drop_duplicates()
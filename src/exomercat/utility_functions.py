@@ -1,6 +1,9 @@
+import asyncio
 import configparser
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import gzip
+import math
 import os
 import re
 import xml.etree.ElementTree as ElementTree
@@ -8,15 +11,15 @@ from pathlib import Path
 from typing import Union
 import socket
 import sys
+import time
 import logging
 import glob
 import numpy as np
 import pandas as pd
 import pyvo
+import requests
 from astropy.table import Table
 
-from astropy import units as u
-from astropy.coordinates import SkyCoord
 
 
 class UtilityFunctions:
@@ -24,6 +27,9 @@ class UtilityFunctions:
     A class that contains utility functions that can be used in other modules.
     """
 
+    # If set, the TAP queries are recorded or replayed (see QueryRecorder)
+    query_recorder = None
+
     def __init__(self) -> None:
         """
         Initialize the UtilityFunction class.
@@ -90,9 +96,15 @@ class UtilityFunctions:
         timeout = 100
         socket.setdefaulttimeout(timeout)
         try:
-            table = service.run_sync(query, uploads={"tab": t2}, timeout=timeout)
-            table = table.to_table()
-            if len(table.to_pandas())==1:
+            table = UtilityFunctions.recorded_query(
+                service,
+                query,
+                {"tab": t2},
+                lambda: service.run_sync(query, uploads={"tab": t2}, timeout=timeout)
+                .to_table()
+                .to_pandas(),
+            )
+            if len(table)==1:
                 error_str += "Ping to SIMBAD\t\t\tOK. \n"
             else:
                 error_str += "Ping to SIMBAD\t\t\tFAILED. \n"
@@ -118,9 +130,15 @@ class UtilityFunctions:
         socket.setdefaulttimeout(timeout)
 
         try:
-            table = service.run_sync(query, uploads={"tab": t2}, timeout=timeout)
-            table = table.to_table()
-            if len(table.to_pandas())==1:
+            table = UtilityFunctions.recorded_query(
+                service,
+                query,
+                {"tab": t2},
+                lambda: service.run_sync(query, uploads={"tab": t2}, timeout=timeout)
+                .to_table()
+                .to_pandas(),
+            )
+            if len(table)==1:
                 error_str += "Ping to VizieR\t\t\tOK."
             else:
                 error_str += "Ping to VizieR\t\t\tFAILED."
@@ -310,6 +328,68 @@ class UtilityFunctions:
 
         return constants
 
+    @staticmethod
+    def get_categorical_columns() -> dict:
+        """
+        Provide the low-cardinality columns that can be stored with the pandas category dtype.
+
+        Each column is mapped to the values that the pipeline may assign to it after loading, so that
+        they are already available as categories when they are written.
+
+        :return: A dictionary mapping column names to the list of values the pipeline may assign to them.
+        :rtype: dict
+        """
+
+        url_values = [""]
+        columns = {
+            "catalog": [],
+            "status": [],
+            "discovery_method": [""],
+            "binary": ["", "A", "B", "C", "N", "S", "AB", "S-type", "Rogue"],
+            "letter": ["BD"],
+            "main_id_provenance": ["", "SIMBAD", "SIMBADCOORD", "TIC", "TICCOORD"],
+            "a_url": url_values,
+            "mass_url": url_values,
+            "p_url": url_values,
+            "msini_url": url_values,
+            "r_url": url_values,
+            "i_url": url_values,
+            "e_url": url_values,
+        }
+
+        return columns
+
+    @staticmethod
+    def convert_to_categorical(frames: list) -> list:
+        """
+        Convert the low-cardinality columns of one or more DataFrames to the pandas category dtype.
+
+        The categories of each column are the union of the values found in all the DataFrames and
+        of the values listed in get_categorical_columns(). All DataFrames therefore share the same
+        categories, and their concatenation with pd.concat stays categorical. Columns are converted
+        in place.
+
+        :param frames: The DataFrames to convert.
+        :type frames: list
+        :return: The same list of DataFrames, with the categorical columns converted.
+        :rtype: list
+        """
+        for column, vocabulary in UtilityFunctions.get_categorical_columns().items():
+            present = [df for df in frames if column in df.columns]
+            if len(present) == 0:
+                continue
+
+            # Union of the categories across all frames
+            categories = set(vocabulary)
+            for df in present:
+                categories.update(df[column].dropna().unique())
+            dtype = pd.CategoricalDtype(sorted(categories, key=str))
+
+            for df in present:
+                df[column] = df[column].astype(dtype)
+
+        return frames
+
     @staticmethod
     def read_config() -> dict:
         """
@@ -626,6 +706,47 @@ class UtilityFunctions:
 
         tab.to_csv(output_file)
 
+    @staticmethod
+    def get_discovery_method_mapping() -> dict:
+        """
+        Get the table used to convert the discovery methods to standardized values.
+
+        The synonyms are read from the DISCOVERYMETHOD section of the 'replacements.ini'
+        file. The code only knows the standardized values themselves, so that their
+        capitalization is always fixed. The keys are lowercase, so that the conversion is
+        case-insensitive.
+
+        :return: A dictionary with the lowercase discovery method as key and the standardized
+            value as value
+        :rtype: dict
+        """
+        mapping = {
+            method.casefold(): method
+            for method in [
+                "TTV",
+                "Transit",
+                "Pulsar Timing",
+                "Other",
+                "Astrometry",
+                "Microlensing",
+                "Imaging",
+                "Radial Velocity",
+            ]
+        }
+        try:
+            config_methods = UtilityFunctions.read_config_replacements(
+                "DISCOVERYMETHOD"
+            )
+        except configparser.NoSectionError:
+            config_methods = {}
+        mapping.update(
+            {
+                key.strip().casefold(): value.strip()
+                for key, value in config_methods.items()
+            }
+        )
+        return mapping
+
     @staticmethod
     def convert_discovery_methods(data: pd.DataFrame) -> pd.DataFrame:
         """
@@ -640,64 +761,157 @@ class UtilityFunctions:
         data["discovery_method"] = (
             data["discovery_method"].fillna("").replace("nan", "")
         )
-        # Convert specific discovery methods to standardized values
-        data.loc[
-            data.discovery_method == "Primary Transit#TTV", "discovery_method"
-        ] = "TTV"
-        data.loc[
-            data.discovery_method == "Transit Timing Variations", "discovery_method"
-        ] = "TTV"
-        data.loc[
-            data.discovery_method == "Eclipse Timing Variations", "discovery_method"
-        ] = "TTV"
-        data.loc[
-            data.discovery_method == "Primary Transit", "discovery_method"
-        ] = "Transit"
-        data.loc[
-            data.discovery_method == "Pulsar", "discovery_method"
-        ] = "Pulsar Timing"
-        data.loc[
-            data.discovery_method == "Pulsation Timing Variations", "discovery_method"
-        ] = "Pulsar Timing"
-        data.loc[
-            data.discovery_method == "Timing", "discovery_method"
-        ] = "Pulsar Timing"
-        data.loc[
-            data.discovery_method == "disk kinematics", "discovery_method"
-        ] = "Other"
-        data.loc[data.discovery_method == "Kinematic", "discovery_method"] = "Other"
-        data.loc[
-            data.discovery_method == "Disk Kinematics", "discovery_method"
-        ] = "Other"
-        data.loc[
-            data.discovery_method == "Orbital Brightness Modulation", "discovery_method"
-        ] = "Other"
-        data.loc[
-            data.discovery_method == "astrometry", "discovery_method"
-        ] = "Astrometry"
-        data.loc[
-            data.discovery_method == "microlensing", "discovery_method"
-        ] = "Microlensing"
-        data.loc[data.discovery_method == "imaging", "discovery_method"] = "Imaging"
-        data.loc[data.discovery_method == "transit", "discovery_method"] = "Transit"
-        data.loc[
-            data.discovery_method == "timing", "discovery_method"
-        ] = "Pulsar Timing"
-        data.loc[data.discovery_method == "RV", "discovery_method"] = "Radial Velocity"
+        # Convert the discovery methods to standardized values in a single pass,
+        # looking up each distinct value only once (case-insensitive)
+        mapping = UtilityFunctions.get_discovery_method_mapping()
+        conversion = {
+            method: mapping.get(str(method).strip().casefold(), method)
+            for method in data["discovery_method"].unique()
+        }
+        data["discovery_method"] = data["discovery_method"].map(conversion)
 
         return data
 
     @staticmethod
-    def perform_query(service, query, uploads_dict=None) -> pd.DataFrame:
+    def recorded_query(
+        service, query: str, uploads_dict: dict, function
+    ) -> pd.DataFrame:
+        """
+        Run a query, recording or replaying its result if a query recorder is set.
+
+        :param service: The service object used to perform the query.
+        :type service: object
+        :param query: The query string.
+        :type query: str
+        :param uploads_dict: A dictionary of uploads.
+        :type uploads_dict: dict
+        :param function: The function that performs the query, without arguments.
+        :type function: function
+        :return: The result of the query as a DataFrame.
+        :rtype: pd.DataFrame
+        """
+        if UtilityFunctions.query_recorder is None:
+            return function()
+        return UtilityFunctions.query_recorder.run(
+            service, query, uploads_dict, function
+        )
+
+    @staticmethod
+    def is_transient_error(error: Exception) -> bool:
+        """
+        Check if a failed query is worth retrying: connection errors, timeouts, rate
+        limits (HTTP 429) and server errors (HTTP 5xx). Query errors, bad uploads and
+        malformed results would fail again.
+
+        :param error: The exception raised by the query.
+        :type error: Exception
+        :return: True if the error is transient.
+        :rtype: bool
+        """
+        if isinstance(error, pyvo.dal.DALServiceError):
+            if error.code:
+                return error.code == 429 or error.code >= 500
+            # No HTTP response: check the underlying cause
+            error = error.cause
+        return isinstance(
+            error,
+            (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+                ConnectionError,
+                TimeoutError,
+                socket.timeout,
+            ),
+        )
+
+    @staticmethod
+    def run_upload_chunk(
+        service,
+        query: str,
+        uploads_dict: dict,
+        timeout: float,
+        retries: int = 3,
+        backoff: float = 2.0,
+    ) -> pd.DataFrame:
+        """
+        Run a query with a set of uploads, retrying with exponential backoff if it fails
+        with a transient error. Other errors are raised immediately.
+
+        :param service: The service object used to perform the query.
+        :type service: object
+        :param query: The query string.
+        :type query: str
+        :param uploads_dict: A dictionary of uploads.
+        :type uploads_dict: dict
+        :param timeout: The timeout of the query, in seconds.
+        :type timeout: float
+        :param retries: The number of times a failed query is retried.
+        :type retries: int
+        :param backoff: The waiting time before the first retry, in seconds. It doubles at
+            each retry.
+        :type backoff: float
+        :return: The result of the query as a DataFrame (empty if no rows are returned).
+        :rtype: pd.DataFrame
+        """
+        for attempt in range(retries + 1):
+            try:
+                table = service.run_sync(query, uploads=uploads_dict, timeout=timeout)
+                break
+            except Exception as e:
+                if attempt == retries or not UtilityFunctions.is_transient_error(e):
+                    raise
+                logging.info(
+                    "Query failed ("
+                    + str(e)
+                    + "), retrying in "
+                    + str(backoff * 2**attempt)
+                    + " s."
+                )
+                time.sleep(backoff * 2**attempt)
+        if len(table) > 0:
+            return table.to_table().to_pandas()
+        else:
+            return pd.DataFrame()
+
+    @staticmethod
+    def perform_query(
+        service,
+        query,
+        uploads_dict=None,
+        chunk_size: int = 5000,
+        workers: int = 4,
+        retries: int = 3,
+        backoff: float = 2.0,
+        normalize: bool = True,
+    ) -> pd.DataFrame:
         """
         Perform a query using the given service and query.
 
+        If there is a single upload table longer than chunk_size, it is split into chunks,
+        which are queried concurrently and whose results are concatenated in order. This
+        is only valid for queries that join each uploaded row independently, as all the
+        queries of Exo-MerCat do. A chunk that fails with a transient error is retried with
+        exponential backoff.
+
         :param service: The service object used to perform the query.
         :type service: object
         :param query: The query string.
         :type query: str
         :param uploads_dict: A dictionary of uploads. Defaults to None.
         :type uploads_dict: dict, optional
+        :param chunk_size: The maximum number of rows of each uploaded chunk. If None, the
+            upload is not split.
+        :type chunk_size: int, optional
+        :param workers: The maximum number of chunks queried at the same time.
+        :type workers: int, optional
+        :param retries: The number of times a chunk that fails with a transient error is
+            retried.
+        :type retries: int, optional
+        :param backoff: The waiting time before the first retry, in seconds.
+        :type backoff: float, optional
+        :param normalize: If False, the raw result is returned, without the
+            normalization of normalize_query_result.
+        :type normalize: bool, optional
 
         :return: The result of the query as a DataFrame.
         :rtype: pd.DataFrame
@@ -706,41 +920,117 @@ class UtilityFunctions:
         timeout = 100000
         socket.setdefaulttimeout(timeout)
 
-        # Perform the query
+        # Split the upload into chunks
         if uploads_dict is None:
             uploads_dict = {}
-        table = service.run_sync(query, uploads=uploads_dict, timeout=timeout)
+        chunks = [uploads_dict]
+        if len(uploads_dict) == 1 and chunk_size is not None:
+            name, upload = list(uploads_dict.items())[0]
+            if len(upload) > chunk_size:
+                chunks = [
+                    {name: upload[start : start + chunk_size]}
+                    for start in range(0, len(upload), chunk_size)
+                ]
+
+        # Perform the query
+        def run_chunks():
+            if len(chunks) == 1:
+                tables = [
+                    UtilityFunctions.run_upload_chunk(
+                        service, query, chunks[0], timeout, retries, backoff
+                    )
+                ]
+            else:
+                logging.info(
+                    "Query split into "
+                    + str(len(chunks))
+                    + " chunks of at most "
+                    + str(chunk_size)
+                    + " rows."
+                )
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    tables = list(
+                        executor.map(
+                            lambda chunk: UtilityFunctions.run_upload_chunk(
+                                service, query, chunk, timeout, retries, backoff
+                            ),
+                            chunks,
+                        )
+                    )
+            tables = [table for table in tables if len(table) > 0]
+            if len(tables) > 0:
+                return pd.concat(tables, ignore_index=True)
+            else:
+                return pd.DataFrame()
+
+        table = UtilityFunctions.recorded_query(
+            service, query, uploads_dict, run_chunks
+        )
+        if not normalize:
+            return table
+        return UtilityFunctions.normalize_query_result(table)
 
-        # Convert the table to a DataFrame
+    @staticmethod
+    def normalize_query_result(table: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normalize the result of a query: build the main_id and the list of identifiers of
+        TIC results, drop the rows without main_id and strip the strings.
+
+        :param table: The raw result of the query.
+        :type table: pd.DataFrame
+        :return: The normalized result (empty if no rows are returned).
+        :rtype: pd.DataFrame
+        """
         if len(table) > 0:
-            table = table.to_table().to_pandas()
             # table=table[table.otype.str.contains('\*')] # IF DECOMMENTED, ADD
             # OTYPE BACK IN THE QUERY
 
             # If TIC case, treat things differently
             if "TIC" in table.columns:
+                # Missing values are empty identifiers
+                prefixes = {
+                    "UCAC4": "UCAC4 ",
+                    "2MASS": "2MASS J",
+                    "WISEA": "WISE ",
+                    "GAIA": "Gaia DR2 ",
+                    "KIC": "KIC ",
+                    "HIP": "HIP ",
+                    "TYC": "TYC ",
+                }
+                identifiers = {}
+                for col in ["TIC"] + list(prefixes):
+                    identifiers[col] = (
+                        table[col].astype(str).str.strip().where(table[col].notna(), "")
+                    )
                 table = table.astype(str)
-                table["main_id"] = "TIC " + table["TIC"].replace("", "<NA>")
-                table["UCAC4"] = "UCAC4 " + table["UCAC4"].replace("", "<NA>")
-                table["2MASS"] = "2MASS J" + table["2MASS"].replace("", "<NA>")
-                table["WISEA"] = "WISE " + table["WISEA"].replace("", "<NA>")
-                table["GAIA"] = "Gaia DR2 " + table["GAIA"].replace("", "<NA>")
-                table["KIC"] = "KIC " + table["KIC"].replace("", "<NA>")
-                table["HIP"] = "HIP " + table["HIP"].replace("", "<NA>")
-                table["TYC"] = "TYC " + table["TYC"].replace("", "<NA>")
-
-                for col in table.columns:
-                    table.loc[table[col].str.contains("<NA>"), col] = ""
-                    table["ids"] = table[
-                        ["UCAC4", "2MASS", "WISEA", "GAIA", "KIC", "HIP", "TYC"]
-                    ].agg(",".join, axis=1)
-                    table["ids"] = table["ids"].map(lambda x: x.lstrip(",").rstrip(","))
+                table = table.mask(table == "<NA>", "")
+                table["main_id"] = ("TIC " + identifiers["TIC"]).where(
+                    identifiers["TIC"] != "", ""
+                )
+                for col, prefix in prefixes.items():
+                    table[col] = (prefix + identifiers[col]).where(
+                        identifiers[col] != "", ""
+                    )
+
+                # Join the non-empty identifiers
+                ids = table["UCAC4"]
+                for col in list(prefixes)[1:]:
+                    separator = np.where((ids != "") & (table[col] != ""), ",", "")
+                    ids = ids + separator + table[col]
+                table["ids"] = ids
 
             # Add default angsep if found via name and not by coordinates
             table["angsep"] = 0.0  # default value
 
-            table = table[table.main_id != ""]
-            table = table.applymap(lambda x: x.strip() if isinstance(x, str) else x)
+            table = table[table.main_id != ""].copy()
+            for col in table.select_dtypes(include=["object", "string"]).columns:
+                try:
+                    stripped = table[col].str.strip()
+                except (AttributeError, TypeError):
+                    # No strings in the column
+                    continue
+                # Values that are not strings are kept
+                table[col] = stripped.where(stripped.notna(), table[col])
 
             return table.reset_index(drop=True)
         else:
@@ -757,53 +1047,301 @@ class UtilityFunctions:
         :rtype: pd.DataFrame
         """
         # Convert ra and dec columns to float
-        table["ra"] = table["ra"].map(lambda x: float(x))
-        table["dec"] = table["dec"].map(lambda x: float(x))
-        table["ra_2"] = table["ra_2"].map(lambda x: float(x))
-        table["dec_2"] = table["dec_2"].map(lambda x: float(x))
-
-        # Calculate angular separation
-        for row in table.iterrows():
-            r = row[1]
-            c1 = SkyCoord(
-                float(r["ra"]),
-                float(r["dec"]),
-                frame="icrs",
-                unit=(u.degree, u.degree),
-            )
-            c2 = SkyCoord(
-                float(r.ra_2), float(r.dec_2), frame="icrs", unit=(u.degree, u.degree)
-            )
-            angsep = c2.separation(c1).degree
-            table.at[row[0], "angsep"] = angsep
+        table["ra"] = table["ra"].astype(float)
+        table["dec"] = table["dec"].astype(float)
+        table["ra_2"] = table["ra_2"].astype(float)
+        table["dec_2"] = table["dec_2"].astype(float)
+
+        # Calculate angular separation of all the rows at once
+        separation = UtilityFunctions.angular_separation(
+            table["ra"], table["dec"], table["ra_2"], table["dec_2"]
+        )
+        # Round 'angsep' values and scale
+        table["angsep"] = np.round(separation, 8) * 3600
 
         # Initialize 'selected' column
         table["selected"] = 0
 
-        # Convert 'angsep' values and scale
-        table["angsep"] = table["angsep"].map(lambda x: np.round(float(x), 8) * 3600)
-
-        # Group by 'hostbinary' and select closest entry
-        for hostbin, group in table.groupby("hostbinary"):
-            if len(group) > 1:
-                # If more than one entry, remove planet entries
-                for i in group.index:
-                    if (
-                        str(re.search("[\\s\\d][b-i]$", group.main_id[i], re.M))
-                        != "None"
-                    ):
-                        group = group.drop(i)
-
-                selected = group[group.angsep == min(group.angsep)].head(1)
-
-            else:
-                selected = group.copy()
-            table.loc[selected.index, "selected"] = 1
+        # Group by 'hostbinary' and select closest entry. If more than one entry,
+        # remove planet entries
+        planets = table.main_id.astype(str).str.contains(r"[\s\d][b-i]$", regex=True)
+        entries = table.groupby("hostbinary").hostbinary.transform("size")
+        candidates = table[(entries == 1) | ~planets]
+        selected = candidates.groupby("hostbinary").angsep.idxmin()
+        table.loc[selected.dropna(), "selected"] = 1
 
         # Filter out unselected rows
         table = table[table.selected == 1]
         return table
 
+    @staticmethod
+    def select_uploaded_rows(
+        table: pd.DataFrame, upload: pd.DataFrame, keys: list
+    ) -> pd.DataFrame:
+        """
+        Select the rows of a query result that correspond to the rows of a given upload.
+
+        A query can be run in advance on a larger upload, e.g. before a previous step has
+        assigned some of the main_id. The result is then restricted to the rows that the
+        current upload would have contained, so that it is the same as a new query.
+
+        :param table: The result of the query
+        :type table: pd.DataFrame
+        :param upload: The DataFrame that would have been uploaded
+        :type upload: pd.DataFrame
+        :param keys: The uploaded columns that are returned in the result
+        :type keys: list
+        :return: The rows of the result that match a row of the upload
+        :rtype: pd.DataFrame
+        """
+        if len(table) == 0 or not set(keys).issubset(table.columns):
+            return table
+        uploaded = set(upload[keys].astype(str).itertuples(index=False, name=None))
+        selected = [
+            row in uploaded
+            for row in table[keys].astype(str).itertuples(index=False, name=None)
+        ]
+        return table[selected].reset_index(drop=True)
+
+    @staticmethod
+    def run_concurrently(functions: list) -> list:
+        """
+        Run blocking functions (e.g. TAP queries) concurrently and wait for all of them.
+
+        The functions are run by an asyncio event loop in its default thread pool, since
+        the TAP client is synchronous. Exceptions are raised to the caller.
+
+        :param functions: The functions to run, without arguments
+        :type functions: list
+        :return: The results of the functions, in the same order
+        :rtype: list
+        """
+
+        async def gather():
+            loop = asyncio.get_event_loop()
+            return await asyncio.gather(
+                *[loop.run_in_executor(None, function) for function in functions]
+            )
+
+        return list(asyncio.run(gather()))
+
+    @staticmethod
+    def group_mode(values: pd.Series, groups: pd.Series) -> pd.Series:
+        """
+        Calculate the mode of the values of each group, for each row.
+
+        As statistics.mode, the mode is the most common value, and in case of ties the one
+        that appears first. Missing values are ignored.
+
+        :param values: The values
+        :type values: pd.Series
+        :param groups: The group of each value, with the same index
+        :type groups: pd.Series
+        :return: The mode of the group of each value, with the same index
+        :rtype: pd.Series
+        """
+        counts = (
+            pd.DataFrame(
+                {
+                    "group": groups.to_numpy(),
+                    "value": values.to_numpy(),
+                    "position": np.arange(len(values)),
+                }
+            )
+            .groupby(["group", "value"], sort=False)
+            .position.agg(["size", "min"])
+            .reset_index()
+        )
+        modes = (
+            counts.sort_values(["size", "min"], ascending=[False, True])
+            .drop_duplicates(subset="group")
+            .set_index("group")
+            .value
+        )
+        return groups.map(modes)
+
+    @staticmethod
+    def sky_unit_vectors(ra, dec) -> np.ndarray:
+        """
+        Convert equatorial coordinates to Cartesian unit vectors.
+
+        :param ra: The right ascensions, in degrees
+        :type ra: array-like
+        :param dec: The declinations, in degrees
+        :type dec: array-like
+        :return: An array of shape (n, 3) with the unit vectors
+        :rtype: np.ndarray
+        """
+        ra = np.radians(np.asarray(ra, dtype=float))
+        dec = np.radians(np.asarray(dec, dtype=float))
+        return np.column_stack(
+            [np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)]
+        )
+
+    @staticmethod
+    def angular_separation(ra_1, dec_1, ra_2, dec_2):
+        """
+        Calculate the angular separations between two sets of coordinates, element-wise
+        (with the numpy broadcasting rules).
+
+        The haversine formula is used, which is accurate also at the sub-arcsecond
+        separations used for the cross-matches.
+
+        :param ra_1: The right ascensions of the first set, in degrees
+        :type ra_1: float or array-like
+        :param dec_1: The declinations of the first set, in degrees
+        :type dec_1: float or array-like
+        :param ra_2: The right ascensions of the second set, in degrees
+        :type ra_2: float or array-like
+        :param dec_2: The declinations of the second set, in degrees
+        :type dec_2: float or array-like
+        :return: The separations, in degrees
+        :rtype: float or np.ndarray
+        """
+        ra_1, dec_1, ra_2, dec_2 = (
+            np.radians(np.asarray(x, dtype=float)) for x in (ra_1, dec_1, ra_2, dec_2)
+        )
+        haversine = (
+            np.sin((dec_2 - dec_1) / 2) ** 2
+            + np.cos(dec_1) * np.cos(dec_2) * np.sin((ra_2 - ra_1) / 2) ** 2
+        )
+        return np.degrees(2 * np.arcsin(np.sqrt(np.clip(haversine, 0, 1))))
+
+    @staticmethod
+    def pairwise_separation(ra_1, dec_1, ra_2, dec_2) -> np.ndarray:
+        """
+        Calculate the angular separations between all the pairs of two sets of
+        coordinates at once.
+
+        :param ra_1: The right ascensions of the first set, in degrees
+        :type ra_1: array-like
+        :param dec_1: The declinations of the first set, in degrees
+        :type dec_1: array-like
+        :param ra_2: The right ascensions of the second set, in degrees
+        :type ra_2: array-like
+        :param dec_2: The declinations of the second set, in degrees
+        :type dec_2: array-like
+        :return: An array of shape (len(ra_1), len(ra_2)) with the separations, in degrees
+        :rtype: np.ndarray
+        """
+        return UtilityFunctions.angular_separation(
+            np.asarray(ra_1, dtype=float)[:, None],
+            np.asarray(dec_1, dtype=float)[:, None],
+            np.asarray(ra_2, dtype=float)[None, :],
+            np.asarray(dec_2, dtype=float)[None, :],
+        )
+
+    @staticmethod
+    def cone_boxes(ra: float, dec: float, tolerance: float) -> list:
+        """
+        Calculate the RA ranges of the boxes that contain a cone, for a search with a
+        spatial index. The box of a cone crossing RA = 0 is split in two, and a cone
+        containing a pole spans all right ascensions. The declination range is
+        dec - tolerance to dec + tolerance.
+
+        :param ra: The right ascension of the center of the cone, in degrees
+        :type ra: float
+        :param dec: The declination of the center of the cone, in degrees
+        :type dec: float
+        :param tolerance: The radius of the cone, in degrees
+        :type tolerance: float
+        :return: A list of (min_ra, max_ra) tuples, in degrees
+        :rtype: list
+        """
+        if abs(dec) + tolerance >= 90:
+            return [(0.0, 360.0)]
+        delta = tolerance / math.cos(math.radians(abs(dec) + tolerance))
+        boxes = [(ra - delta, ra + delta)]
+        if ra - delta < 0:
+            boxes.append((ra - delta + 360, 360.0))
+        if ra + delta > 360:
+            boxes.append((0.0, ra + delta - 360))
+        return boxes
+
+    @staticmethod
+    def connected_components(nodes, edges) -> dict:
+        """
+        Find the connected components of a graph with a union-find (disjoint-set)
+        structure, in near-linear time.
+
+        Each component is represented by its smallest node, so that the result does not
+        depend on the order of the nodes and edges.
+
+        :param nodes: The nodes of the graph (comparable and hashable, e.g. strings)
+        :type nodes: iterable
+        :param edges: The pairs of connected nodes. Nodes that are not in nodes are added.
+        :type edges: iterable
+        :return: A dictionary mapping each node to the representative of its component
+        :rtype: dict
+        """
+        parent = {node: node for node in nodes}
+
+        def find(node):
+            root = node
+            while parent[root] != root:
+                root = parent[root]
+            # Path compression
+            while parent[node] != root:
+                parent[node], node = root, parent[node]
+            return root
+
+        for first, second in edges:
+            parent.setdefault(first, first)
+            parent.setdefault(second, second)
+            first, second = find(first), find(second)
+            if first != second:
+                # The smallest node becomes the root
+                if second < first:
+                    first, second = second, first
+                parent[second] = first
+
+        return {node: find(node) for node in parent}
+
+    @staticmethod
+    def main_id_letter_candidates(identifiers) -> pd.DataFrame:
+        """
+        Find the main identifiers that end with a planet or binary letter, and the
+        identifiers without the letter.
+
+        The planet letters (b-j) and the binary letters ((AB), AB, A, B, C, S or N) are
+        removed, as well as the 'NAME ' prefix for the planet letters and (AB).
+
+        :param identifiers: The main identifiers
+        :type identifiers: array-like
+        :return: A DataFrame with the columns identifier, new_identifier and binary (the
+            binary letter, None for the planet letters), in the input order
+        :rtype: pd.DataFrame
+        """
+        identifiers = pd.Series(identifiers, dtype=object)
+        planet = identifiers.str.contains(r"[\s\d][b-j]$")
+        circumbinary = identifiers.str.contains(r"[\s\d]\(AB\)$")
+        joined = identifiers.str.contains(r"[\[a-z](?:AB)$|\s(?:AB)$|\d(?:AB)$]")
+        letter = identifiers.str.contains(r"[\s\d][ABCSN]$")
+
+        candidates = pd.DataFrame(
+            {
+                "identifier": identifiers,
+                "new_identifier": np.select(
+                    [planet, circumbinary, joined, letter],
+                    [
+                        identifiers.str[:-1].str.strip().str.replace("NAME ", ""),
+                        identifiers.str[:-4].str.rstrip().str.replace("NAME ", ""),
+                        identifiers.str[:-2].str.rstrip(),
+                        identifiers.str[:-1].str.strip(),
+                    ],
+                    default="",
+                ),
+                "binary": np.select(
+                    [planet, circumbinary | joined, letter],
+                    [None, "AB", identifiers.str[-1:]],
+                    default=None,
+                ),
+            }
+        )
+        return candidates[planet | circumbinary | joined | letter].reset_index(
+            drop=True
+        )
+
     def load_standardized_catalog(filename: str, local_date: str) -> pd.DataFrame:
         """
         Load a standardized catalog file for a given date. If not found,
@@ -848,6 +1386,29 @@ class UtilityFunctions:
 
         return pd.read_csv(file_path_str)
 
+    @staticmethod
+    def concatenate_log_files(input_files: list, output_file: str) -> None:
+        """
+        Append the content of several log files to a single log file, in the given order,
+        and remove them.
+
+        This is used to collect the logs written by parallel workers deterministically.
+        Missing files are skipped.
+
+        :param input_files: The list of log files to concatenate
+        :type input_files: list
+        :param output_file: The log file to append to
+        :type output_file: str
+        :return: None
+        :rtype: None
+        """
+        with open(output_file, "a") as f:
+            for input_file in input_files:
+                if os.path.exists(input_file):
+                    with open(input_file) as f_in:
+                        f.write(f_in.read())
+                    os.remove(input_file)
+
     @staticmethod
     def print_progress_bar(iteration, total, prefix="", suffix="", length=50, fill="█"):
         """
@@ -329,9 +329,11 @@ def test__identify_brown_dwarfs(instance):
             "MOA 2015-BLG-337 a",
             "KOI-123.01",
             "DENIS J063001.4-184014 (bc)",
+            "PSR B1257+12 A",
+            "Kepler-1 b",
         ],
-        "binary": ["", "", "", "", ""],
-        "letter": ["", "", "", "", ""],
+        "binary": ["", "", "", "", "", "", ""],
+        "letter": ["", "", "", "", "", "", "b"],
     }
 
     df = pd.DataFrame(data)
@@ -350,9 +352,11 @@ def test__identify_brown_dwarfs(instance):
             "MOA 2015-BLG-337 a",
             "KOI-123.01",
             "DENIS J063001.4-184014 (bc)",
+            "PSR B1257+12 A",
+            "Kepler-1 b",
         ],
-        "binary": ["B", "", "a", "", "bc"],
-        "letter": ["BD", "BD", "BD", "", "BD"],
+        "binary": ["B", "", "a", "", "bc", "", ""],
+        "letter": ["BD", "BD", "BD", "", "BD", "", "b"],
     }
     expected_df = pd.DataFrame(expected_result)
     pd.testing.assert_frame_equal(df, expected_df)
@@ -425,6 +429,14 @@ def test__replace_known_mistakes(tmp_path, instance):
     assert instance.data["binary"][5] == "A"
     assert "Trojan" not in instance.data.name.values
     assert instance.data["host"][6] == "2MASS J03590986+2009361"
+    with open("Logs/replace_known_mistakes.txt") as f:
+        assert "NAME for NAME: not present" in f.read()
+
+    # The unused replacements can be logged to a different file
+    instance.data = pd.DataFrame(data)
+    instance.replace_known_mistakes("Logs/replace_known_mistakes_catalog.txt")
+    with open("Logs/replace_known_mistakes_catalog.txt") as f:
+        assert "HOST for HOST: not present" in f.read()
 
     os.chdir(original_dir)
 
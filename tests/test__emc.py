@@ -1,5 +1,6 @@
 import math
 import os
+import re
 from datetime import date
 
 import numpy as np
@@ -8,7 +9,11 @@ import pytest
 from pandas._testing import assert_frame_equal
 from testfixtures import LogCapture
 import socket
+from unittest.mock import patch
 from exomercat.emc import Emc
+from exomercat.identifier_cache import IdentifierCache
+from exomercat.simbad_snapshot import SimbadSnapshot
+from exomercat.utility_functions import UtilityFunctions
 
 
 @pytest.fixture
@@ -102,6 +107,51 @@ def test__alias_as_host(tmp_path, instance):
 
     os.chdir(original_dir)
 
+def test__alias_as_host_chain(tmp_path, instance):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    os.mkdir("Logs/")
+
+    # Hosts linked through each other's aliases, in any order
+    instance.data = pd.DataFrame(
+        {
+            "host": ["KOI-1", "Kepler-1", "TrES-2", "HD 1", np.nan, "HD 2"],
+            "alias": [
+                "Kepler-1,KIC 1",
+                "TrES-2,nan",
+                "GSC 1, KOI-1",
+                "HD 1,HIP 1",
+                "HIP 9",
+                np.nan,
+            ],
+        }
+    )
+    with LogCapture() as log:
+        instance.alias_as_host()
+        assert (
+            "Aliases labeled as hosts in some other entry checked. It happens 2 times."
+            in str(log)
+        )
+    assert list(instance.data.host[:4]) == ["KOI-1", "KOI-1", "KOI-1", "HD 1"]
+    assert list(instance.data.alias[:4]) == [
+        "GSC 1,KIC 1,Kepler-1,TrES-2",
+        "GSC 1,KIC 1,Kepler-1,TrES-2",
+        "GSC 1,KIC 1,Kepler-1,TrES-2",
+        "HIP 1",
+    ]
+    # Rows without host are not changed
+    assert instance.data.at[4, "alias"] == "HIP 9"
+    assert instance.data.at[5, "alias"] == ""
+
+    with open("Logs/alias_as_host.txt") as f:
+        assert f.readlines() == [
+            "ALIAS: Kepler-1 AS HOST:KOI-1\n",
+            "ALIAS: TrES-2 AS HOST:KOI-1\n",
+        ]
+
+    os.chdir(original_dir)
+
+
 def test__check_binary_mismatch(tmp_path, instance):
     import os
     import pandas as pd
@@ -463,6 +513,26 @@ def test__prepare_columns_for_mainid_search(instance):
         )
 
 
+def test__combine_aliases_binary(instance):
+    instance.data = pd.DataFrame({"alias": ["HD 1, HIP 1", "", "KOI-7"]}, index=[5, 3, 8])
+    aliases = instance.data.alias[instance.data.alias != ""].str.split(",").explode()
+    binary = pd.Series(["B", "A", ""], index=[5, 3, 8])
+
+    instance.combine_aliases_binary(aliases, binary, "aliasbinary", " ")
+    assert list(instance.data.aliasbinary) == ["HD 1 B,HIP 1 B", "", "KOI-7"]
+    instance.combine_aliases_binary(aliases, binary, "aliasbinary2", "")
+    assert list(instance.data.aliasbinary2) == ["HD 1B,HIP 1B", "", "KOI-7"]
+
+    # Rows without aliases keep their value
+    instance.data["aliasbinary"] = ["x", "y", "z"]
+    instance.combine_aliases_binary(aliases[aliases.index == 8], binary, "aliasbinary", " ")
+    assert list(instance.data.aliasbinary) == ["x", "y", "KOI-7"]
+
+    # Without aliases, the column is not created
+    instance.combine_aliases_binary(aliases[:0], binary, "aliasbinary3", " ")
+    assert "aliasbinary3" not in instance.data.columns
+
+
 def test__fill_mainid_provenance_column(instance):
     instance.data = pd.DataFrame({"main_id": ["*   4 Mon"], "main_id_provenance": [""]})
     instance.fill_mainid_provenance_column("SIMBAD")
@@ -470,6 +540,57 @@ def test__fill_mainid_provenance_column(instance):
     assert instance.data.main_id_provenance.values == ["SIMBAD"]
 
 
+def test__apply_resolution_results(instance):
+    instance.data = pd.DataFrame(
+        {
+            "host": ["HD 1", "HD 1", "HD 2", "HD 3", "HD 2"],
+            "main_id": ["", "", "", "", "*  2 Cyg"],
+            "list_id": ["", "", "", "", "HD 2"],
+            "main_id_ra": [np.nan] * 5,
+            "main_id_dec": [np.nan] * 5,
+            "angsep": [-1.0] * 5,
+        }
+    )
+    table = pd.DataFrame(
+        {
+            "host": ["HD 2", "HD 1", "HD 2"],
+            "main_id": ["* b", "* a", "* c"],
+            "ids": ["* b|HIP 2", "* a", "* c"],
+            "ra_2": ["2.0", "1.0", "3.0"],
+            "dec_2": ["-2.0", "-1.0", "-3.0"],
+            "angsep": [0.5, 0.1, 0.2],
+        }
+    )
+    instance.apply_resolution_results(table, "host")
+    # The first result of each host is applied to all its rows
+    assert list(instance.data.main_id) == ["* a", "* a", "* b", "", "* b"]
+    assert list(instance.data.list_id) == ["* a", "* a", "* b,HIP 2", "", "* b,HIP 2"]
+    assert instance.data.main_id_ra.tolist()[:3] == [1.0, 1.0, 2.0]
+    assert instance.data.main_id_dec.tolist()[:3] == [-1.0, -1.0, -2.0]
+    assert list(instance.data.angsep) == [0.1, 0.1, 0.5, -1.0, 0.5]
+
+    # Without angular separation, the matches are direct
+    instance.apply_resolution_results(
+        pd.DataFrame(
+            {
+                "host": ["HD 3"],
+                "main_id": ["* d"],
+                "ids": ["* d"],
+                "ra_2": [4.0],
+                "dec_2": [4.0],
+            }
+        ),
+        "host",
+    )
+    assert instance.data.at[3, "main_id"] == "* d"
+    assert instance.data.at[3, "angsep"] == 0.0
+
+    # Empty results change nothing
+    data = instance.data.copy()
+    instance.apply_resolution_results(pd.DataFrame(), "host")
+    assert_frame_equal(instance.data, data)
+
+
 def test__simbad_list_host_search(tmp_path, instance):
     data = pd.DataFrame(
         {
@@ -624,6 +745,417 @@ def test__simbad_list_alias_search(tmp_path, instance):
         )
 
 
+def test__simbad_identifier_query(tmp_path, instance):
+    upload = pd.DataFrame(
+        {"ind": [0, 0, 1, 2], "alias": ["51 Peg", "HD 217014", "51 Peg", np.nan]}
+    )
+    simbad = pd.DataFrame(
+        {
+            "alias": ["51 Peg", "HD 217014"],
+            "main_id": ["*  51 Peg", "*  51 Peg"],
+            "ra_2": [344.366585, 344.366585],
+            "dec_2": [20.768833, 20.768833],
+            "ids": ["HD 217014|*  51 Peg", "HD 217014|*  51 Peg"],
+            "angsep": [0.0, 0.0],
+        }
+    )
+
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        return_value=simbad,
+    ) as mock_query, patch("pyvo.dal.TAPService"):
+        table = instance.simbad_identifier_query(upload, "alias")
+        # Each distinct identifier is uploaded only once
+        uploaded = mock_query.call_args[1]["uploads_dict"]["tab"]
+        assert list(uploaded["alias"]) == ["51 Peg", "HD 217014"]
+
+    assert list(table.ind) == [0, 0, 1]
+    assert list(table.alias) == ["51 Peg", "HD 217014", "51 Peg"]
+    assert list(table.main_id) == ["*  51 Peg"] * 3
+    assert list(table.angsep) == [0.0] * 3
+
+    # Identifiers resolved in this run are not queried again
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        assert_frame_equal(instance.simbad_identifier_query(upload, "alias"), table)
+        assert mock_query.call_count == 0
+
+    # With a cache, only the identifiers that are not cached are queried
+    instance = Emc()
+    instance.identifier_cache = IdentifierCache(
+        os.path.join(str(tmp_path), "simbad.sqlite")
+    )
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        return_value=simbad.head(1),
+    ) as mock_query, patch("pyvo.dal.TAPService"):
+        instance.simbad_identifier_query(upload.head(1), "alias")
+        assert mock_query.call_count == 1
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        return_value=simbad.tail(1),
+    ) as mock_query, patch("pyvo.dal.TAPService"):
+        cached_table = instance.simbad_identifier_query(upload, "alias")
+        uploaded = mock_query.call_args[1]["uploads_dict"]["tab"]
+        assert list(uploaded["alias"]) == ["HD 217014"]
+    assert_frame_equal(cached_table, table)
+
+    # Nothing is queried if all identifiers are cached
+    instance = Emc()
+    instance.identifier_cache = IdentifierCache(
+        os.path.join(str(tmp_path), "simbad.sqlite")
+    )
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        cached_table = instance.simbad_identifier_query(upload, "alias")
+        assert mock_query.call_count == 0
+    assert_frame_equal(cached_table, table)
+
+
+def test__simbad_identifier_query_unresolved(instance):
+    upload = pd.DataFrame({"host": ["51 Peg", "nonexisting"]})
+    simbad = pd.DataFrame(
+        {
+            "host": ["51 Peg"],
+            "main_id": ["*  51 Peg"],
+            "ra_2": [344.366585],
+            "dec_2": [20.768833],
+            "ids": ["HD 217014|*  51 Peg"],
+            "angsep": [0.0],
+        }
+    )
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        return_value=simbad,
+    ), patch("pyvo.dal.TAPService"):
+        instance.simbad_identifier_query(upload, "host")
+    assert instance.unresolved_identifiers == {"nonexisting"}
+
+    # Later passes of the same run skip the unresolved identifiers
+    upload = pd.DataFrame({"alias": ["nonexisting", "HD 217014"]})
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        return_value=pd.DataFrame(),
+    ) as mock_query, patch("pyvo.dal.TAPService"):
+        table = instance.simbad_identifier_query(upload, "alias")
+        uploaded = mock_query.call_args[1]["uploads_dict"]["tab"]
+        assert list(uploaded["alias"]) == ["HD 217014"]
+    assert len(table) == 0
+    assert instance.unresolved_identifiers == {"nonexisting", "HD 217014"}
+
+
+def test__simbad_snapshot(tmp_path, instance):
+    snapshot = SimbadSnapshot(os.path.join(str(tmp_path), "snapshot.sqlite"))
+    # A previous query resolved 51 Peg
+    snapshot.store(
+        pd.DataFrame(
+            {
+                "identifier": ["51 Peg"],
+                "main_id": ["*  51 Peg"],
+                "ra_2": [344.366585],
+                "dec_2": [20.768833],
+                "ids": ["HD 217014|*  51 Peg"],
+            }
+        )
+    )
+    simbad = pd.DataFrame(
+        {
+            "host": ["HD 1"],
+            "main_id": ["HD 1"],
+            "ra_2": [1.0],
+            "dec_2": [1.0],
+            "ids": ["HD 1"],
+            "angsep": [0.0],
+        }
+    )
+    upload = pd.DataFrame({"host": ["51 Peg", "HD 1", "HD 2"]})
+
+    # Identifiers in the snapshot are resolved locally, the others are queried
+    instance.simbad_snapshot = snapshot
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        return_value=simbad,
+    ) as mock_query, patch("pyvo.dal.TAPService"):
+        table = instance.simbad_identifier_query(upload, "host")
+        uploaded = mock_query.call_args[1]["uploads_dict"]["tab"]
+        assert list(uploaded["host"]) == ["HD 1", "HD 2"]
+    assert list(table.main_id) == ["*  51 Peg", "HD 1"]
+    # The snapshot is refreshed with the results
+    assert snapshot.lookup(["HD 1"])[1] == []
+
+    # Without refresh, nothing is queried
+    instance = Emc()
+    instance.simbad_snapshot = SimbadSnapshot(snapshot.db_path, refresh=False)
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        table = instance.simbad_identifier_query(upload, "host")
+        assert mock_query.call_count == 0
+    assert list(table.main_id) == ["*  51 Peg", "HD 1"]
+    assert instance.unresolved_identifiers == {"HD 2"}
+
+    instance.data = pd.DataFrame(
+        {
+            "hostbinary": ["51 Peg", "Far"],
+            "ra": [344.3667, 100.0],
+            "dec": [20.7689, 10.0],
+            "main_id": ["", ""],
+            "list_id": ["", ""],
+            "binary": ["", ""],
+        }
+    )
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        table = instance.fetch_coordinates_from_simbad(1 / 3600)
+        assert list(table.main_id) == ["*  51 Peg"]
+        instance.data.loc[0, "main_id"] = "51 Peg b"
+        instance.replace_old_new_identifier("51 Peg b", "51 Peg")
+        assert instance.replace_old_new_identifier("HD 3 b", "HD 3").startswith(
+            "Weird MAINID found"
+        )
+        assert mock_query.call_count == 0
+    assert instance.data.at[0, "main_id"] == "*  51 Peg"
+    assert instance.data.at[0, "main_id_ra"] == 344.366585
+
+
+def test__get_coordinates_from_simbad_snapshot(tmp_path, instance):
+    instance.simbad_snapshot = SimbadSnapshot(
+        os.path.join(str(tmp_path), "snapshot.sqlite"), refresh=False
+    )
+    instance.simbad_snapshot.store(
+        pd.DataFrame(
+            {
+                "main_id": ["*  51 Peg"],
+                "ra_2": [344.366585],
+                "dec_2": [20.768833],
+                "ids": ["HD 217014|*  51 Peg"],
+            }
+        )
+    )
+    instance.data = pd.DataFrame(
+        {
+            "hostbinary": ["51 Peg", "Far"],
+            "ra": [344.3667, 100.0],
+            "dec": [20.7689, 10.0],
+            "main_id": ["", ""],
+            "list_id": ["", ""],
+            "main_id_ra": [np.nan, np.nan],
+            "main_id_dec": [np.nan, np.nan],
+            "angsep": [np.nan, np.nan],
+            "main_id_provenance": ["", ""],
+        }
+    )
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        instance.get_coordinates_from_simbad(1 / 3600)
+        assert mock_query.call_count == 0
+    assert list(instance.data.main_id) == ["*  51 Peg", ""]
+    assert list(instance.data.main_id_provenance) == ["SIMBADCOORD", ""]
+    # The angular separation is in arcsec, as for the remote results
+    expected = UtilityFunctions.angular_separation(
+        344.3667, 20.7689, 344.366585, 20.768833
+    )
+    assert math.isclose(instance.data.at[0, "angsep"], expected * 3600, abs_tol=1e-4)
+    assert 0 < instance.data.at[0, "angsep"] < 1
+
+
+def fake_simbad_query(service, query, uploads_dict=None):
+    """Resolve the uploaded identifiers from a fixed table instead of SIMBAD."""
+    known = {
+        "16 Cyg B": ("*  16 Cyg B", 295.466, 50.517, "*  16 Cyg B|HD 186427"),
+        "HD 147869 AB": ("*  21 Her", 246.0, 7.0, "*  21 Her|HD 147869"),
+        "HD 19994A": ("HD 19994A", 48.0, -1.0, "HD 19994A|*  94 Cet A"),
+        "HD 19994": ("*  94 Cet", 48.1, -1.1, "*  94 Cet|HD 19994"),
+        "Kepler-451": ("Kepler-451", 294.0, 46.0, "Kepler-451"),
+    }
+    column = re.findall(r"ident.id = t.(\w+)", query)[0]
+    upload = uploads_dict["tab"].to_pandas()
+    rows = [
+        dict(zip([column, "main_id", "ra_2", "dec_2", "ids"], (x,) + known[x]))
+        for x in upload[column]
+        if x in known
+    ]
+    return pd.DataFrame(rows)
+
+
+def test__simbad_list_alias_search_upload(instance):
+    instance.data = pd.DataFrame(
+        {
+            "alias": [
+                "16 Cyg B,16 Cyg B,HD 186427é",
+                "nan",
+                "HD 19994A,HD 19994",
+                "Kepler-451",
+                np.nan,
+            ],
+            "main_id": ["", "", "", "Kepler-451", ""],
+            "list_id": ["", "", "", "Kepler-451", ""],
+            "main_id_ra": [np.nan] * 5,
+            "main_id_dec": [np.nan] * 5,
+            "angsep": [-1.0] * 5,
+        }
+    )
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        side_effect=fake_simbad_query,
+    ) as mock_query, patch("pyvo.dal.TAPService"), LogCapture() as log:
+        instance.simbad_list_alias_search("alias")
+        uploaded = mock_query.call_args[1]["uploads_dict"]["tab"]
+        # One row per distinct ASCII alias of the rows without main_id
+        assert list(uploaded["alias"]) == ["16 Cyg B", "HD 19994A", "HD 19994"]
+        assert (
+            "WARNING, MULTIPLE ALIASES NOT IN AGREEMENT alias ['HD 19994', 'HD 19994A'] "
+            "main_id ['*  94 Cet', 'HD 19994A']" in str(log)
+        )
+
+    # The first alias resolved is used
+    assert list(instance.data.main_id) == ["*  16 Cyg B", "", "HD 19994A", "Kepler-451", ""]
+    assert list(instance.data.list_id) == [
+        "*  16 Cyg B,HD 186427",
+        "",
+        "HD 19994A,*  94 Cet A",
+        "Kepler-451",
+        "",
+    ]
+    assert instance.data.main_id_ra.tolist()[2] == 48.0
+    assert list(instance.data.angsep) == [0.0, -1.0, 0.0, -1.0, -1.0]
+    assert instance.data.at[4, "alias"] == ""
+
+
+def test__collect_simbad_identifiers(instance):
+    instance.data = pd.DataFrame(
+        {
+            "host": ["HD 19994", "Kepler-451", "Ross 128"],
+            "hostbinary": ["HD 19994 A", "Kepler-451 AB", "Ross 128"],
+            "hostbinary2": ["HD 19994A", "Kepler-451AB", "Ross 128"],
+            "alias": ["94 Cet,HIP 14954", "", "GJ 447"],
+            "aliasbinary": ["94 Cet A,HIP 14954 A", "", "GJ 447"],
+            "aliasbinary2": ["94 CetA,HIP 14954A", "", "GJ 447"],
+            "main_id": ["", "", "Ross 128"],
+        }
+    )
+    keys = instance.collect_simbad_identifiers()
+    assert list(keys.columns) == ["ind", "kind", "priority", "identifier"]
+    assert set(keys.ind) == {0, 1}
+    assert list(keys[keys.ind == 0].identifier) == [
+        "HD 19994 A",
+        "94 Cet A",
+        "HIP 14954 A",
+        "HD 19994A",
+        "94 CetA",
+        "HIP 14954A",
+        "HD 19994",
+        "94 Cet",
+        "HIP 14954",
+    ]
+    assert list(keys[keys.ind == 0].priority) == [0, 1, 1, 2, 3, 3, 4, 5, 5]
+    assert list(keys[keys.ind == 1].kind) == ["hostbinary", "hostbinary2", "host"]
+
+
+def test__get_host_info_from_simbad_single_query(instance):
+    data = pd.DataFrame(
+        {
+            "host": ["16 Cyg", "21 Her", "HD 19994", "HD 19994", "Kepler-451"],
+            "binary": ["B", "AB", "A", "B", "AB"],
+            "alias": ["16 Cygni", "HD 147869,o Her", "94 Cet", "94 Cet", "Kepler-451"],
+            "hostbinary": [
+                "16 Cyg B",
+                "21 Her AB",
+                "HD 19994 A",
+                "HD 19994 B",
+                "Kepler-451 AB",
+            ],
+            "aliasbinary": [
+                "16 Cygni B",
+                "HD 147869 AB,o Her AB",
+                "94 Cet A",
+                "94 Cet B",
+                "Kepler-451 AB",
+            ],
+            "hostbinary2": [
+                "16 CygB",
+                "21 HerAB",
+                "HD 19994A",
+                "HD 19994B",
+                "Kepler-451AB",
+            ],
+            "aliasbinary2": [
+                "16 CygniB",
+                "HD 147869AB,o HerAB",
+                "94 CetA",
+                "94 CetB",
+                "Kepler-451AB",
+            ],
+            "main_id": ["", "", "", "", ""],
+            "list_id": ["", "", "", "", ""],
+            "main_id_ra": [np.nan] * 5,
+            "main_id_dec": [np.nan] * 5,
+            "angsep": [-1.0] * 5,
+            "main_id_provenance": ["", "", "", "", ""],
+        }
+    )
+
+    # Passes run one by one, each with its own query
+    sequential = Emc()
+    sequential.data = data.copy()
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        side_effect=fake_simbad_query,
+    ) as mock_query, patch("pyvo.dal.TAPService"):
+        for typed_id in ["hostbinary", "hostbinary2", "host"]:
+            sequential.simbad_list_host_search(typed_id)
+            sequential.simbad_list_alias_search(typed_id.replace("host", "alias"))
+        assert mock_query.call_count > 1
+
+    # All the identifiers are resolved with a single query
+    instance.data = data.copy()
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        side_effect=fake_simbad_query,
+    ) as mock_query, patch("pyvo.dal.TAPService"):
+        instance.get_host_info_from_simbad()
+        assert mock_query.call_count == 1
+
+    # Same precedence: e.g. HD 19994 A is resolved by HOST+BINARY, but then
+    # overwritten by the PURE HOST search needed by HD 19994 B
+    assert list(instance.data.main_id) == [
+        "*  16 Cyg B",
+        "*  21 Her",
+        "*  94 Cet",
+        "*  94 Cet",
+        "Kepler-451",
+    ]
+    assert list(instance.data.main_id_provenance) == ["SIMBAD"] * 5
+    sequential.fill_mainid_provenance_column("SIMBAD")
+    assert_frame_equal(
+        instance.data.drop(columns="list_id"), sequential.data.drop(columns="list_id")
+    )
+    assert list(instance.data.list_id) == [
+        x.replace("|", ",") for x in sequential.data.list_id
+    ]
+
+    # The prefetched identifiers are used as they are, without querying again
+    prefetched = Emc()
+    prefetched.data = data.copy()
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        side_effect=fake_simbad_query,
+    ), patch("pyvo.dal.TAPService"):
+        resolved = prefetched.fetch_host_info_from_simbad()
+    assert list(resolved.columns) == ["identifier", "main_id", "ra_2", "dec_2", "ids"]
+    prefetched.simbad_results = prefetched.simbad_results.iloc[0:0]
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        prefetched.get_host_info_from_simbad(prefetched=resolved)
+        mock_query.assert_not_called()
+    assert_frame_equal(prefetched.data, instance.data)
+
+
 def test__get_host_info_from_simbad(instance):
     data = {
         "name": [
@@ -1008,6 +1540,129 @@ def test__get_coordinates_info_from_tic(instance):
     pass
 
 
+def test__get_host_info_from_tic_prefetched(instance):
+    instance.data = pd.DataFrame(
+        {
+            "host": ["TIC 1", "TIC 2", "HD 3"],
+            "alias": ["", "", "TIC 3"],
+            "main_id": ["", "", ""],
+            "list_id": ["", "", ""],
+            "main_id_ra": ["", "", ""],
+            "main_id_dec": ["", "", ""],
+            "main_id_provenance": ["", "", ""],
+            "angsep": [-1.0, -1.0, -1.0],
+        }
+    )
+    # Results of a query run before TIC 2 was resolved by SIMBAD
+    hosts = pd.DataFrame(
+        {
+            "host": ["1", "2"],
+            "main_id": ["TIC 1", "TIC 2"],
+            "ra_2": ["1.0", "2.0"],
+            "dec_2": ["1.0", "2.0"],
+            "ids": ["Gaia DR2 1", "Gaia DR2 2"],
+        }
+    )
+    aliases = pd.DataFrame(
+        {
+            "host": ["HD 3"],
+            "tic_alias": ["3"],
+            "main_id": ["TIC 3"],
+            "ra_2": ["3.0"],
+            "dec_2": ["3.0"],
+            "ids": ["Gaia DR2 3"],
+        }
+    )
+    instance.data.loc[1, ["main_id", "main_id_provenance"]] = ["*  2 Cyg", "SIMBAD"]
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        instance.get_host_info_from_tic(prefetched=(hosts, aliases))
+        assert mock_query.call_count == 0
+    assert list(instance.data.main_id) == ["TIC 1", "*  2 Cyg", "TIC 3"]
+    assert list(instance.data.main_id_provenance) == ["TIC", "SIMBAD", "TIC"]
+
+
+def fake_coordinate_query(service, query, uploads_dict=None):
+    """Match the uploaded coordinates from fixed tables instead of SIMBAD and TIC."""
+    upload = uploads_dict["tab"].to_pandas()
+    if "ids.ids" in query:
+        upload["ids"] = upload.main_id + "|HIP " + upload.main_id.str[-1]
+        return upload
+    if "basic" in query:
+        known = {"HD 1": ("HD 1", 1.0001, 1.0), "HD 2": ("HD 2", 2.0, 2.0001)}
+        columns = ["main_id", "ra_2", "dec_2"]
+    else:
+        known = {
+            "HD 2": ("TIC 2", 2.0001, 2.0, "Gaia DR2 2"),
+            "HD 3": ("TIC 3", 3.0, 3.0001, "Gaia DR2 3"),
+        }
+        columns = ["main_id", "ra_2", "dec_2", "ids"]
+    rows = [
+        dict(row._asdict(), **dict(zip(columns, known[row.hostbinary])))
+        for row in upload.itertuples(index=False)
+        if row.hostbinary in known
+    ]
+    table = pd.DataFrame(rows)
+    if "basic" not in query:
+        # TIC results are returned as strings
+        table = table.astype(str)
+    return table
+
+
+def test__get_coordinates_prefetched(tmp_path, instance):
+    data = pd.DataFrame(
+        {
+            "hostbinary": ["HD 1", "HD 2", "HD 3", "HD 4"],
+            "ra": [1.0, 2.0, 3.0, 4.0],
+            "dec": [1.0, 2.0, 3.0, 4.0],
+            "main_id": ["", "", "", ""],
+            "list_id": ["", "", "", ""],
+            "main_id_ra": [np.nan] * 4,
+            "main_id_dec": [np.nan] * 4,
+            "main_id_provenance": ["", "", "", ""],
+            "angsep": [-1.0] * 4,
+        }
+    )
+
+    # Each step queries the rows that are still missing the main_id
+    sequential = Emc()
+    sequential.data = data.copy()
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        side_effect=fake_coordinate_query,
+    ), patch("pyvo.dal.TAPService"):
+        sequential.get_coordinates_from_simbad(1.0 / 3600.0)
+        sequential.get_coordinates_from_tic(1.0 / 3600.0)
+
+    # Both queries are run in advance on the same rows
+    instance.data = data.copy()
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        side_effect=fake_coordinate_query,
+    ), patch("pyvo.dal.TAPService"):
+        simbad, tic = UtilityFunctions.run_concurrently(
+            [instance.fetch_coordinates_from_simbad, instance.fetch_coordinates_from_tic]
+        )
+    # HD 2 is matched by both, but SIMBAD takes precedence
+    assert list(tic.hostbinary) == ["HD 2", "HD 3"]
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query"
+    ) as mock_query:
+        instance.get_coordinates_from_simbad(1.0 / 3600.0, prefetched=simbad)
+        instance.get_coordinates_from_tic(1.0 / 3600.0, prefetched=tic)
+        assert mock_query.call_count == 0
+
+    assert list(instance.data.main_id) == ["HD 1", "HD 2", "TIC 3", ""]
+    assert list(instance.data.main_id_provenance) == [
+        "SIMBADCOORD",
+        "SIMBADCOORD",
+        "TICCOORD",
+        "",
+    ]
+    assert_frame_equal(instance.data, sequential.data)
+
+
 def test__check_coordinates(tmp_path, instance):
     original_dir = os.getcwd()
 
@@ -1077,6 +1732,64 @@ def test__replace_old_new_identifier(instance):
     pass
 
 
+def test__polish_main_id_batched(tmp_path, instance):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    os.mkdir("Logs/")
+    instance.data = pd.DataFrame(
+        {
+            "main_id": ["HD 19994 b", "HD 19994 B", "Kepler-451 c", "HD 2 b", "HD 2 b"],
+            "main_id_ra": [np.nan] * 5,
+            "main_id_dec": [np.nan] * 5,
+            "list_id": ["", "HD 19994 B", "", "", ""],
+            "name": ["HD 19994 b", "HD 19994 B b", "Kepler-451 c", "HD 2 b", "HD 2 b"],
+            "host": ["HD 19994", "HD 19994 B", "Kepler-451", "HD 2", "HD 2"],
+            "catalog": ["eu", "nasa", "oec", "eu", "nasa"],
+            "binary": ["", "S-type", "", "", ""],
+        }
+    )
+    with patch(
+        "exomercat.utility_functions.UtilityFunctions.perform_query",
+        side_effect=fake_simbad_query,
+    ) as mock_query:
+        with LogCapture() as log:
+            instance.polish_main_id()
+            assert (
+                "Removed planet/binary letter from main_id. It happens 4 times."
+                in [record.getMessage() for record in log.records]
+            )
+        # The identifiers of both checks are resolved with a single upload
+        assert mock_query.call_count == 1
+    assert list(instance.data.main_id) == [
+        "*  94 Cet",
+        "*  94 Cet",
+        "Kepler-451",
+        "HD 2 b",
+        "HD 2 b",
+    ]
+    assert list(instance.data.binary) == ["", "B", "", "", ""]
+    assert instance.data.at[0, "main_id_ra"] == 48.1
+    assert instance.data.at[0, "list_id"] == "*  94 Cet,HD 19994"
+    assert sorted(instance.data.at[1, "list_id"].split(",")) == [
+        "*  94 Cet",
+        "HD 19994",
+        "HD 19994 B",
+    ]
+    with open("Logs/polish_main_id.txt") as f:
+        lines = f.readlines()
+    assert lines == [
+        "***** CHECK FOR PLANET LETTER IN MAIN_ID *****\n",
+        "MAINID can be corrected HD 19994 b to HD 19994. \n",
+        "MAINID can be corrected Kepler-451 c to Kepler-451. \n",
+        "Weird MAINID found: HD 2 b but cannot be found when HD 2. No replacement "
+        "performed.\n",
+        "***** CHECK FOR BINARY LETTER IN MAIN_ID *****\n",
+        "MAINID can be corrected HD 19994 B to HD 19994.  Binary value: B. Only "
+        "S-type or null. Binary could be standardized.\n",
+    ]
+    os.chdir(original_dir)
+
+
 def test__polish_main_id(tmp_path, instance):
     original_dir = os.getcwd()
 
@@ -1370,15 +2083,48 @@ def test__check_same_coords_different_id(tmp_path, instance):
         "            host        main_id binary letter catalog    angsep main_id_provenance\n",
         "0   TIC 10974783   TIC 10974783           .01     toi  0.000000             SIMBAD\n",
         "1  TIC 628103717  TIC 628103717           .01     toi  0.000248             SIMBAD\n",
-        "FOUND SAME COORDINATES DIFFERENT MAINID\n",
-        "            host        main_id binary letter catalog    angsep main_id_provenance\n",
-        "0   TIC 10974783   TIC 10974783           .01     toi  0.000248             SIMBAD\n",
-        "1  TIC 628103717  TIC 628103717           .01     toi  0.000000             SIMBAD\n",
     ]
 
     os.chdir(original_dir)
 
 
+def test__check_same_coords_different_id_components(tmp_path, instance):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    os.mkdir("Logs/")
+
+    # A chain of close entries across RA = 0, a close pair with the same main_id and
+    # entries without coordinates
+    instance.data = pd.DataFrame(
+        {
+            "catalog": ["eu", "nasa", "toi", "eu", "nasa", "eu", "toi"],
+            "host": ["A", "B", "C", "D", "D", "E", "F"],
+            "binary": [""] * 7,
+            "letter": ["b"] * 7,
+            "main_id": ["A", "B", "C", "D", "D", "", ""],
+            "main_id_ra": [359.99995, 0.00005, 0.00015, 10.0, 10.0, np.nan, np.nan],
+            "main_id_dec": [0.0, 0.0, 0.0, 20.0, 20.0, np.nan, 5.0],
+            "main_id_provenance": ["SIMBAD"] * 7,
+        }
+    )
+    instance.check_same_coords_different_id(tolerance=0.5 / 3600)
+
+    with open("Logs/post_main_id_query_checks.txt") as f:
+        text = f.read()
+    # The chain is reported once, with the separations from its first entry
+    assert text.count("FOUND SAME COORDINATES DIFFERENT MAINID") == 1
+    assert "0    A       A" in text
+    assert "2    C       C" in text
+    assert "toi  0.0002 " in text
+    assert "    D       D" not in text
+
+    # An empty catalog has nothing to report
+    instance.data = instance.data.head(0)
+    instance.check_same_coords_different_id()
+
+    os.chdir(original_dir)
+
+
 def test__group_by_list_id_check_main_id(tmp_path, instance):
     original_dir = os.getcwd()
 
@@ -1435,6 +2181,42 @@ def test__group_by_list_id_check_main_id(tmp_path, instance):
     os.chdir(original_dir)
 
 
+def test__group_by_list_id_check_main_id_shared_identifiers(tmp_path, instance):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    os.mkdir("Logs/")
+    instance.data = pd.DataFrame(
+        {
+            "catalog": ["eu", "nasa", "oec", "toi", "epic"],
+            "status": ["CONFIRMED"] * 5,
+            "letter": ["b"] * 5,
+            "main_id": ["HD 1", "HD 2", "Kepler-1", "HD 3", "HD 4"],
+            # The first three rows are linked by HIP 1 and TIC 2, although no two
+            # list_ids are identical
+            "list_id": ["HD 1,HIP 1", "HIP 1, TIC 2", "TIC 2,Kepler-1", "HD 3", ""],
+        },
+        index=[10, 11, 12, 13, 14],
+    )
+    with LogCapture() as log:
+        instance.group_by_list_id_check_main_id()
+        assert (
+            "Planets that had a different main_id name but same SIMBAD alias: 1"
+            in [record.getMessage() for record in log.records]
+        )
+    assert list(instance.data.main_id) == ["HD 1", "HD 1", "HD 1", "HD 3", "HD 4"]
+
+    with open("Logs/post_main_id_query_checks.txt") as f:
+        lines = f.readlines()
+    assert lines[3:] == [
+        "*** SAME LIST_ID, DIFFERENT MAIN_ID *** \n",
+        "   catalog     status letter   main_id\n",
+        "10      eu  CONFIRMED      b      HD 1\n",
+        "11    nasa  CONFIRMED      b      HD 2\n",
+        "12     oec  CONFIRMED      b  Kepler-1\n",
+    ]
+    os.chdir(original_dir)
+
+
 def test__group_by_main_id_set_main_id_aliases(instance):
     data = {
         "host": ["51 Peg", "TYC 1717-2193-1 b"],
@@ -1523,6 +2305,24 @@ def test__group_by_main_id_set_main_id_aliases(instance):
     )
 
 
+def test__group_by_main_id_set_main_id_aliases_sorted(instance):
+    instance.data = pd.DataFrame(
+        {
+            "main_id": ["HD 2", "HD 1", "HD 2", np.nan],
+            "alias": ["Kepler-2,nan", np.nan, "Ananke,HIP 2", "HD 9"],
+            "list_id": ["HIP 2,HD 2", "", "Kepler-2", "HD 9"],
+        }
+    )
+    instance.group_by_main_id_set_main_id_aliases()
+    # The identifiers are sorted, and the ones containing "nan" are kept
+    assert list(instance.data.main_id_aliases) == [
+        "Ananke,HD 2,HIP 2,Kepler-2",
+        "",
+        "Ananke,HD 2,HIP 2,Kepler-2",
+        "",
+    ]
+
+
 def test__cleanup_catalog(instance):
     data = {
         "name": ["51 Peg b", "anotherplanet"],
@@ -1,4 +1,5 @@
 import os
+import shutil
 from datetime import date
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -22,7 +23,12 @@ def test__init(instance):
 
 
 
-def test__standardize_catalog(instance):
+def test__standardize_catalog(instance, tmp_path):
+    # Use the discovery method synonyms shipped in the replacements.ini file of the
+    # repository
+    original_dir = os.getcwd()
+    shutil.copy(Path(__file__).parent.parent / "replacements.ini", tmp_path)
+    os.chdir(tmp_path)
     # Create a sample DataFrame with some additional columns
     data = {
         "name": ["11 Oph b"],
@@ -170,6 +176,7 @@ def test__standardize_catalog(instance):
         for element in ["Oph 1622-2405 b", "Oph 1622-2405", "Oph 11A"]
     )
     assert instance.data.at[0, "discovery_method"] == "TTV"
+    os.chdir(original_dir)
 
 
 def test__remove_theoretical_masses(instance):
@@ -0,0 +1,85 @@
+import os
+
+import pandas as pd
+import pytest
+
+from exomercat.identifier_cache import IdentifierCache
+
+
+@pytest.fixture
+def instance(tmp_path):
+    return IdentifierCache(os.path.join(str(tmp_path), "Cache", "simbad.sqlite"))
+
+
+def test__init(instance):
+    assert isinstance(instance, IdentifierCache)
+    assert instance.ttl == 30
+    assert instance.negative_ttl == 7
+    assert os.path.exists(instance.db_path)
+
+
+def test__lookup_store(instance):
+    cached, missing = instance.lookup(["51 Peg", "HD 114762"])
+    assert len(cached) == 0
+    assert missing == ["51 Peg", "HD 114762"]
+
+    results = pd.DataFrame(
+        {
+            "identifier": ["51 Peg", "16 Cyg", "16 Cyg"],
+            "main_id": ["*  51 Peg", "*  16 Cyg", "*  16 Cyg B"],
+            "ra_2": [344.366585, 295.454542, 295.466],
+            "dec_2": [20.768833, 50.525, 50.517],
+            "ids": ["HD 217014|*  51 Peg", "*  16 Cyg", "*  16 Cyg B"],
+        }
+    )
+    instance.store(results)
+
+    cached, missing = instance.lookup(["HD 114762", "16 Cyg", "51 Peg", "16 Cyg"])
+    assert missing == ["HD 114762"]
+    assert list(cached.identifier) == ["16 Cyg", "16 Cyg", "51 Peg"]
+    # The order of the rows of each identifier is preserved
+    assert list(cached.main_id) == ["*  16 Cyg", "*  16 Cyg B", "*  51 Peg"]
+    assert cached.at[2, "ra_2"] == 344.366585
+    assert cached.at[2, "ids"] == "HD 217014|*  51 Peg"
+
+    # Storing an identifier again replaces its rows
+    instance.store(results.tail(1))
+    cached, missing = instance.lookup(["16 Cyg"])
+    assert list(cached.main_id) == ["*  16 Cyg B"]
+
+    # Expired entries are missing
+    instance.ttl = -1
+    cached, missing = instance.lookup(["16 Cyg", "51 Peg"])
+    assert len(cached) == 0
+    assert missing == ["16 Cyg", "51 Peg"]
+
+
+def test__negative_results(instance):
+    results = pd.DataFrame(
+        {
+            "identifier": ["51 Peg"],
+            "main_id": ["*  51 Peg"],
+            "ra_2": [344.366585],
+            "dec_2": [20.768833],
+            "ids": ["HD 217014|*  51 Peg"],
+        }
+    )
+    instance.store(results, queried=["51 Peg", "nonexisting"])
+
+    # Identifiers that were not resolved are neither cached nor missing
+    cached, missing = instance.lookup(["nonexisting", "51 Peg", "new"])
+    assert list(cached.identifier) == ["51 Peg"]
+    assert missing == ["new"]
+
+    # Negative results expire separately
+    instance.negative_ttl = -1
+    cached, missing = instance.lookup(["nonexisting", "51 Peg"])
+    assert list(cached.identifier) == ["51 Peg"]
+    assert missing == ["nonexisting"]
+
+    # An identifier that is no longer resolved loses its previous rows
+    instance.store(pd.DataFrame(), queried=["51 Peg"])
+    instance.negative_ttl = 7
+    cached, missing = instance.lookup(["51 Peg"])
+    assert len(cached) == 0
+    assert missing == []
@@ -1,5 +1,6 @@
 import gzip
 import os
+import shutil
 from datetime import date
 from pathlib import Path, PosixPath
 from unittest.mock import MagicMock, patch, Mock
@@ -356,7 +357,12 @@ def test__download_catalog(tmp_path, instance) -> None:
 
 
 
-def test__standardize_catalog(instance):
+def test__standardize_catalog(instance, tmp_path):
+    # Use the discovery method synonyms shipped in the replacements.ini file of the
+    # repository
+    original_dir = os.getcwd()
+    shutil.copy(Path(__file__).parent.parent / "replacements.ini", tmp_path)
+    os.chdir(tmp_path)
     # Create a sample DataFrame with some additional columns
     data = {
         "alias": [
@@ -488,6 +494,7 @@ def test__standardize_catalog(instance):
     assert instance.data.at[0, "discovery_method"] == "Radial Velocity"
     assert instance.data.at[1, "discovery_method"] == ""
     assert instance.data.at[2, "discovery_method"] == ""
+    os.chdir(original_dir)
 
 
 def test__remove_theoretical_masses(instance):
@@ -0,0 +1,64 @@
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+from astropy.table import Table
+
+from exomercat.query_recorder import QueryRecorder
+
+
+class Service:
+    baseurl = "http://simbad.cds.unistra.fr/simbad/sim-tap"
+
+
+@pytest.fixture
+def instance(tmp_path):
+    return QueryRecorder(os.path.join(str(tmp_path), "Recordings"))
+
+
+def test__init(instance):
+    assert isinstance(instance, QueryRecorder)
+    assert instance.mode == "record"
+    assert instance.latency == 0.0
+    assert os.path.exists(instance.folder)
+    with pytest.raises(ValueError):
+        QueryRecorder(instance.folder, mode="other")
+
+
+def test__key(instance):
+    upload = {"tab": Table.from_pandas(pd.DataFrame({"host": ["51 Peg"]}))}
+    key = instance.key(Service(), "SELECT 1", upload)
+    assert key == instance.key(Service(), "SELECT 1", upload)
+    assert key != instance.key(Service(), "SELECT 2", upload)
+    other_upload = {"tab": Table.from_pandas(pd.DataFrame({"host": ["HD 1"]}))}
+    assert key != instance.key(Service(), "SELECT 1", other_upload)
+    assert key != instance.key(None, "SELECT 1", upload)
+
+
+def test__run(instance):
+    upload = {"tab": Table.from_pandas(pd.DataFrame({"host": ["51 Peg"]}))}
+    result = pd.DataFrame({"host": ["51 Peg"], "main_id": ["*  51 Peg"]})
+    calls = []
+
+    def query():
+        calls.append(1)
+        return result
+
+    # Record mode: the query is run and stored
+    recorded = instance.run(Service(), "SELECT 1", upload, query)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(recorded, result)
+    assert len(os.listdir(instance.folder)) == 1
+
+    # Replay mode: the stored result is served after the latency
+    replay = QueryRecorder(instance.folder, mode="replay", latency=0.5)
+    with patch("time.sleep") as mock_sleep:
+        replayed = replay.run(Service(), "SELECT 1", upload, query)
+        mock_sleep.assert_called_once_with(0.5)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(replayed, result)
+
+    # Queries that were not recorded fail
+    with pytest.raises(ValueError):
+        replay.run(Service(), "SELECT 2", upload, query)
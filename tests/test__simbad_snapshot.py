@@ -0,0 +1,123 @@
+import os
+
+import pandas as pd
+import pytest
+
+from exomercat.simbad_snapshot import SimbadSnapshot
+
+
+@pytest.fixture
+def instance(tmp_path):
+    return SimbadSnapshot(os.path.join(str(tmp_path), "Cache", "snapshot.sqlite"))
+
+
+def test__init(instance):
+    assert isinstance(instance, SimbadSnapshot)
+    assert instance.refresh
+    assert os.path.exists(instance.db_path)
+
+
+def test__identifier_keys(instance):
+    assert instance.normalize(" *  51   Peg ") == "* 51 Peg"
+    assert instance.identifier_keys(["*  51 Peg", "HD 217014", "NAME Helvetios", ""]) == [
+        "* 51 Peg",
+        "HD 217014",
+        "NAME Helvetios",
+    ]
+
+
+def test__store_lookup(instance):
+    found, missing = instance.lookup(["51 Peg"])
+    assert len(found) == 0
+    assert missing == ["51 Peg"]
+
+    results = pd.DataFrame(
+        {
+            "identifier": ["51 Pegasi"],
+            "main_id": ["*  51 Peg"],
+            "ra_2": [344.366585],
+            "dec_2": [20.768833],
+            "ids": ["HD 217014|*  51 Peg|NAME Helvetios"],
+        }
+    )
+    instance.store(results)
+
+    # All identifiers of the object are indexed, as well as the queried one. As in the
+    # SIMBAD queries, the identifiers without their prefixes are not found
+    found, missing = instance.lookup(
+        ["HD  217014", "51 Peg", "NAME Helvetios", "Helvetios", "51 Pegasi", "HD 1"]
+    )
+    assert missing == ["51 Peg", "Helvetios", "HD 1"]
+    assert list(found.identifier) == ["51 Pegasi", "HD  217014", "NAME Helvetios"]
+    assert list(found.main_id) == ["*  51 Peg"] * 3
+    assert found.at[0, "ra_2"] == 344.366585
+    assert found.at[0, "ids"] == "HD 217014|*  51 Peg|NAME Helvetios"
+
+    # Storing an object again updates it
+    results["ra_2"] = 344.4
+    instance.store(results.drop(columns="identifier"))
+    found, missing = instance.lookup(["51 Pegasi"])
+    assert list(found.ra_2) == [344.4]
+
+
+def test__load_dump(instance, tmp_path):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    pd.DataFrame(
+        {
+            "oid": [1, 2, 3],
+            "main_id": ["*  51 Peg", "HD 1", "no coordinates"],
+            "ra": [344.366585, 1.0, None],
+            "dec": [20.768833, 1.0, None],
+            "otype": ["PM*", "*", "*"],
+        }
+    ).to_csv("basic.csv", index=False)
+    pd.DataFrame(
+        {"oidref": [1, 1, 2, 3], "id": ["*  51 Peg", "GJ 882", "HD 1", "x"]}
+    ).to_csv("ident.csv", index=False)
+    pd.DataFrame({"oidref": [1], "ids": ["*  51 Peg|HD 217014"]}).to_csv(
+        "ids.csv", index=False
+    )
+    instance.load_dump("basic.csv", "ident.csv", "ids.csv")
+    found, missing = instance.lookup(["GJ 882", "HD 217014", "HD 1", "x"])
+    assert missing == ["x"]
+    assert list(found.main_id) == ["*  51 Peg", "HD 1", "*  51 Peg"]
+    # Objects without ids keep their main_id as list of identifiers
+    assert list(found.ids) == ["*  51 Peg|HD 217014", "HD 1", "*  51 Peg|HD 217014"]
+    os.chdir(original_dir)
+
+
+def test__cone_search(instance):
+    instance.store(
+        pd.DataFrame(
+            {
+                "main_id": ["*  51 Peg", "HD 1", "near zero", "pole"],
+                "ra_2": [344.366585, 10.0, 359.9999, 180.0],
+                "dec_2": [20.768833, 10.0, 0.0, 89.9999],
+                "ids": ["*  51 Peg", "HD 1", "near zero", "pole"],
+                "type": ["PM*", "*", "*", "*"],
+            }
+        )
+    )
+    upload = pd.DataFrame(
+        {
+            "hostbinary": ["51 Peg", "Far", "Zero", "Pole"],
+            "ra": [344.3667, 100.0, 0.0001, 0.0],
+            "dec": [20.7689, 10.0, 0.0, 89.9999],
+        }
+    )
+    table = instance.cone_search(upload, 1 / 3600)
+    assert list(table.columns) == [
+        "main_id",
+        "dec_2",
+        "ra_2",
+        "type",
+        "hostbinary",
+        "ra",
+        "dec",
+        "ids",
+    ]
+    # Matches across RA = 0 and close to the pole are found
+    assert list(table.hostbinary) == ["51 Peg", "Zero", "Pole"]
+    assert list(table.main_id) == ["*  51 Peg", "near zero", "pole"]
+    assert table.at[0, "type"] == "PM*"
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from exomercat.sky_index import SkyIndex
+from exomercat.utility_functions import UtilityFunctions
+
+
+@pytest.fixture
+def instance():
+    return SkyIndex(
+        [10.0, 10.0001, 359.99995, 0.00005, 120.0, 300.0, 10.0],
+        [20.0, 20.0, 0.0, 0.0, 89.99995, 89.99995, 20.0],
+    )
+
+
+def test__init(instance):
+    assert isinstance(instance, SkyIndex)
+    assert instance.vectors.shape == (7, 3)
+
+
+def test__chord():
+    assert np.isclose(SkyIndex.chord(180.0), 2.0)
+    assert np.isclose(SkyIndex.chord(1 / 3600), np.radians(1 / 3600))
+
+
+def test__query_pairs(instance):
+    pairs = instance.query_pairs(1 / 3600)
+    # Also across RA = 0 and at the pole
+    assert list(zip(pairs["first"], pairs["second"])) == [
+        (0, 1),
+        (0, 6),
+        (1, 6),
+        (2, 3),
+        (4, 5),
+    ]
+    assert pairs.at[1, "angsep"] == 0.0
+    assert np.isclose(pairs.at[3, "angsep"], 0.0001)
+
+    # Same pairs as comparing all of them
+    rng = np.random.default_rng(0)
+    ra = np.concatenate([rng.uniform(0, 360, 300)] * 2) + rng.normal(0, 2e-4, 600)
+    dec = np.concatenate([rng.uniform(-90, 90, 300)] * 2) + rng.normal(0, 2e-4, 600)
+    dec = np.clip(dec, -90, 90)
+    pairs = SkyIndex(ra % 360, dec).query_pairs(1 / 3600)
+    separations = UtilityFunctions.pairwise_separation(ra, dec, ra, dec)
+    first, second = np.nonzero(np.triu(separations <= 1 / 3600, 1))
+    assert list(zip(pairs["first"], pairs["second"])) == list(zip(first, second))
+    assert np.allclose(pairs.angsep, separations[first, second])
+
+    assert len(SkyIndex([], []).query_pairs(1 / 3600)) == 0
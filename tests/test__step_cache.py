@@ -0,0 +1,169 @@
+import inspect
+import os
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from exomercat import catalogs
+from exomercat.catalogs import Catalog
+from exomercat.step_cache import StepCache
+
+
+class CountingCatalog(Catalog):
+    calls = []
+
+    def __init__(self):
+        super().__init__()
+        self.name = "counting"
+
+    def read_csv_catalog(self, file_path_str):
+        self.calls.append("read_csv_catalog")
+        self.data = pd.read_csv(file_path_str)
+
+    def double(self, column):
+        self.calls.append("double")
+        self.data[column] = self.data[column] * 2
+
+    def log_rows(self, log_file):
+        self.calls.append("log_rows")
+        with open(log_file, "a") as f:
+            f.write(str(len(self.data)) + " rows\n")
+
+    def add_one(self, column):
+        self.calls.append("add_one")
+        self.data[column] = self.data[column] + 1
+
+
+@pytest.fixture
+def instance():
+    return StepCache()
+
+
+def test__init(instance):
+    assert isinstance(instance, StepCache)
+    assert instance.folder == "Cache/"
+
+
+def test__fingerprint(instance, tmp_path):
+    assert instance.fingerprint("a", (1,)) == instance.fingerprint("a", (1,))
+    assert instance.fingerprint("a", (1,)) != instance.fingerprint("a", (2,))
+
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    assert instance.file_fingerprint("missing.csv") == ""
+    with open("file.csv", "w") as f:
+        f.write("a\n1\n")
+    assert instance.file_fingerprint("file.csv") == instance.file_fingerprint(
+        "file.csv"
+    )
+
+    # A missing section counts as empty, comments are ignored
+    empty = instance.config_fingerprint(["NAMEtochangeNAME"])
+    with open("replacements.ini", "w") as f:
+        f.write("[NAMEtochangeNAME]\n")
+    assert instance.config_fingerprint(["NAMEtochangeNAME"]) == empty
+    with open("replacements.ini", "w") as f:
+        f.write("[NAMEtochangeNAME]\n")
+        f.write("alf Tau b = Aldebaran b # comment\n")
+    changed = instance.config_fingerprint(["NAMEtochangeNAME"])
+    assert changed != empty
+    # Other sections do not change the fingerprint
+    with open("replacements.ini", "a") as f:
+        f.write("[DROP]\n")
+        f.write("name = Trojan\n")
+    assert instance.config_fingerprint(["NAMEtochangeNAME"]) == changed
+    os.chdir(original_dir)
+
+
+def test__run(instance, tmp_path):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+    os.mkdir("Logs")
+    with open("input.csv", "w") as f:
+        f.write("value\n1\n2\n")
+
+    def run_chain(config, log_file="Logs/log.txt"):
+        cat = CountingCatalog()
+        CountingCatalog.calls = []
+        steps = [
+            ("read_csv_catalog", ("input.csv",), ""),
+            ("double", ("value",), ""),
+            ("log_rows", (log_file,), config),
+            ("add_one", ("value",), ""),
+        ]
+        instance.run(
+            cat,
+            steps,
+            instance.file_fingerprint("input.csv"),
+            log_files=[log_file],
+        )
+        return cat
+
+    # First run: all steps are executed
+    cat = run_chain("config1")
+    assert CountingCatalog.calls == ["read_csv_catalog", "double", "log_rows", "add_one"]
+    assert list(cat.data.value) == [3, 5]
+    assert len(os.listdir("Cache/counting")) == 4
+
+    # Same input and configuration: nothing is executed, logs are replayed
+    os.remove("Logs/log.txt")
+    cat = run_chain("config1")
+    assert CountingCatalog.calls == []
+    assert list(cat.data.value) == [3, 5]
+    with open("Logs/log.txt") as f:
+        assert f.read() == "2 rows\n"
+
+    # Different log file (e.g. in the parallel input stage): the results are reused and
+    # the logs are replayed into the new file
+    cat = run_chain("config1", "Logs/log_worker.txt")
+    assert CountingCatalog.calls == []
+    assert list(cat.data.value) == [3, 5]
+    with open("Logs/log_worker.txt") as f:
+        assert f.read() == "2 rows\n"
+
+    # Changed configuration of the third step: resume from it
+    os.remove("Logs/log.txt")
+    cat = run_chain("config2")
+    assert CountingCatalog.calls == ["log_rows", "add_one"]
+    assert list(cat.data.value) == [3, 5]
+    with open("Logs/log.txt") as f:
+        assert f.read() == "2 rows\n"
+    # Outdated results are removed
+    assert len(os.listdir("Cache/counting")) == 4
+
+    # Changed input: rerun everything
+    with open("input.csv", "w") as f:
+        f.write("value\n1\n")
+    cat = run_chain("config2")
+    assert CountingCatalog.calls == ["read_csv_catalog", "double", "log_rows", "add_one"]
+    assert list(cat.data.value) == [3]
+
+    os.chdir(original_dir)
+
+
+def test__step_keys(instance):
+    steps = [("double", ("value",), ""), ("log_rows", ("Logs/log.txt",), "")]
+    keys = instance.step_keys(CountingCatalog(), steps, "input", ["Logs/log.txt"])
+    assert len(keys) == 2
+
+    # The log files do not change the keys
+    other_steps = [steps[0], ("log_rows", ("Logs/log_eu.txt",), "")]
+    assert (
+        instance.step_keys(CountingCatalog(), other_steps, "input", ["Logs/log_eu.txt"])
+        == keys
+    )
+
+    # A change in the Catalog base class changes the keys
+    getsource = inspect.getsource
+
+    def edited_getsource(obj):
+        source = getsource(obj)
+        return source + "# edited" if obj is catalogs else source
+
+    with patch("exomercat.step_cache.inspect.getsource", side_effect=edited_getsource):
+        edited = instance.step_keys(
+            CountingCatalog(), steps, "input", ["Logs/log.txt"]
+        )
+    assert edited[0] != keys[0]
+    assert edited[1] != keys[1]
@@ -0,0 +1,242 @@
+import os
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+import pytest
+from astropy.table import MaskedColumn, Table
+from pandas._testing import assert_frame_equal
+
+from exomercat.tic_store import TicStore
+from exomercat.utility_functions import UtilityFunctions
+
+FIELDS = ["ra_2", "dec_2", "GAIA", "UCAC4", "2MASS", "WISEA", "TIC", "KIC", "HIP", "TYC"]
+
+STARS = {
+    100: (306.501164, -48.92036, 6668227036766532864, "206-182296", "20260027-4855132"),
+    200: (140.514718, 15.808193, 630836794912890624, "530-049849", "09220352+1548296"),
+}
+
+
+class LocalTICService:
+    """Stand-in for VizieR that joins the uploaded TIC identifiers with STARS."""
+
+    def __init__(self):
+        self.uploads = []
+
+    def run_sync(self, query, uploads=None, timeout=None):
+        upload = uploads["t1"].to_pandas()
+        self.uploads.append(list(upload["host"]))
+        upload = upload[upload["host"].isin(STARS)].reset_index(drop=True)
+        stars = [STARS[x] for x in upload["host"]]
+        result = Table.from_pandas(upload)
+        result["ra_2"] = [x[0] for x in stars]
+        result["dec_2"] = [x[1] for x in stars]
+        result["GAIA"] = [x[2] for x in stars]
+        result["UCAC4"] = [x[3] for x in stars]
+        result["2MASS"] = [x[4] for x in stars]
+        result["WISEA"] = [""] * len(upload)
+        result["TIC"] = upload["host"]
+        result["KIC"] = MaskedColumn([0] * len(upload), mask=[True] * len(upload))
+        result["HIP"] = MaskedColumn([0] * len(upload), mask=[True] * len(upload))
+        result["TYC"] = [""] * len(upload)
+        response = MagicMock()
+        response.__len__.return_value = len(result)
+        response.to_table.return_value = result
+        return response
+
+
+@pytest.fixture
+def instance(tmp_path):
+    return TicStore(os.path.join(str(tmp_path), "Cache", "tic.sqlite"))
+
+
+def test__init(instance):
+    assert isinstance(instance, TicStore)
+    assert instance.refresh
+    assert os.path.exists(instance.db_path)
+
+
+def test__store_join(instance):
+    upload = pd.DataFrame({"tid": pd.array([1, 2, 1, 3], dtype="Int64")})
+    rows, missing = instance.join(upload, "tid", ["TIC", "UCAC4", "KIC"])
+    assert len(rows) == 0
+    assert list(missing.tid) == [1, 2, 1, 3]
+
+    # The TOI query does not select the coordinates
+    instance.store(
+        pd.DataFrame(
+            {
+                "tid": [1, 2],
+                "TIC": [1, 2],
+                "UCAC4": ["206-182296", np.nan],
+                "KIC": pd.array([10, None], dtype="Int64"),
+            }
+        )
+    )
+    rows, missing = instance.join(upload, "tid", ["TIC", "UCAC4", "KIC"])
+    assert list(missing.tid) == [3]
+    assert list(rows.columns) == ["tid", "TIC", "UCAC4", "KIC"]
+    assert list(rows.tid) == [1, 2, 1]
+    assert rows.KIC.dtype == "Int64"
+    assert rows.at[1, "KIC"] is pd.NA
+    assert np.isnan(rows.at[1, "UCAC4"])
+
+    # Stars without coordinates are missing for the queries that select them
+    rows, missing = instance.join(upload, "tid", ["ra_2", "dec_2", "TIC"])
+    assert len(rows) == 0
+    instance.store(pd.DataFrame({"TIC": [2], "ra_2": [1.0], "dec_2": [2.0]}))
+    rows, missing = instance.join(upload, "tid", ["ra_2", "dec_2", "TIC", "UCAC4"])
+    assert list(rows.tid) == [2]
+    # The other fields are kept
+    assert np.isnan(rows.at[0, "UCAC4"])
+    rows, _ = instance.join(upload, "tid", ["TIC", "UCAC4"])
+    assert rows.at[0, "UCAC4"] == "206-182296"
+
+
+def test__cone_search(instance):
+    instance.store(
+        pd.DataFrame(
+            {
+                "TIC": [1, 2],
+                "ra_2": [359.9999, 10.0],
+                "dec_2": [0.0, 10.0],
+                "GAIA": [1, 2],
+            }
+        )
+    )
+    upload = pd.DataFrame(
+        {
+            "hostbinary": ["Zero", "Far", "Empty"],
+            "ra": [0.0001, 100.0, 50.0],
+            "dec": [0.0, 10.0, 10.0],
+        }
+    )
+    # The stars of the store are not enough to answer a cone search
+    rows, missing = instance.cone_search(upload, 1 / 3600, ["ra_2", "dec_2", "TIC"])
+    assert len(rows) == 0
+    assert list(missing.hostbinary) == ["Zero", "Far", "Empty"]
+
+    # Cones contained in fetched cones are answered locally, even without stars
+    instance.store_cones(
+        pd.DataFrame({"ra": [359.9999, 50.0], "dec": [0.0, 10.0]}), 2 / 3600
+    )
+    rows, missing = instance.cone_search(upload, 1 / 3600, ["ra_2", "dec_2", "TIC"])
+    assert list(rows.columns) == ["hostbinary", "ra", "dec", "ra_2", "dec_2", "TIC"]
+    assert list(rows.hostbinary) == ["Zero"]
+    assert list(rows.TIC) == [1]
+    assert list(missing.hostbinary) == ["Far"]
+
+    # A larger cone is not contained in the fetched one
+    rows, missing = instance.cone_search(upload, 3 / 3600, ["ra_2", "dec_2", "TIC"])
+    assert list(missing.hostbinary) == ["Zero", "Far", "Empty"]
+
+
+class LocalTICConeService:
+    """Stand-in for VizieR that finds the stars of a fixed table around the uploads."""
+
+    def __init__(self, stars, tolerance):
+        self.stars = stars
+        self.tolerance = tolerance
+        self.uploads = []
+
+    def run_sync(self, query, uploads=None, timeout=None):
+        upload = uploads["tab"].to_pandas()
+        self.uploads.append(list(upload["hostbinary"]))
+        rows = []
+        for row in upload.itertuples(index=False):
+            separation = UtilityFunctions.angular_separation(
+                row.ra, row.dec, self.stars.ra_2, self.stars.dec_2
+            )
+            for star in self.stars[separation <= self.tolerance].itertuples(index=False):
+                rows.append(list(row) + list(star))
+        result = pd.DataFrame(
+            rows, columns=list(upload.columns) + list(self.stars.columns)
+        )
+        response = MagicMock()
+        response.__len__.return_value = len(result)
+        response.to_table.return_value = Table.from_pandas(result)
+        return response
+
+
+def test__query_cone(instance):
+    tolerance = 1 / 3600
+    query = "SELECT t.*, RAJ2000 as ra_2 FROM \"IV/39/tic82\" JOIN TAP_UPLOAD.tab AS t"
+    upload = pd.DataFrame({"hostbinary": ["Star"], "ra": [10.0], "dec": [10.0]})
+    stars = pd.DataFrame(
+        {
+            "ra_2": [10.0 + 0.8 / 3600, 10.0 + 0.1 / 3600],
+            "dec_2": [10.0, 10.0],
+            "GAIA": [11, 12],
+            "UCAC4": ["", ""],
+            "2MASS": ["", ""],
+            "WISEA": ["", ""],
+            "TIC": [1, 2],
+            "KIC": [0, 0],
+            "HIP": [0, 0],
+            "TYC": ["", ""],
+        }
+    )
+    # The store holds the farther star (e.g. from a lookup by identifier), but not the
+    # closer one
+    instance.store(stars[stars.TIC == 1])
+
+    service = LocalTICConeService(stars, tolerance)
+    with patch("socket.setdefaulttimeout"):
+        table = instance.query(
+            service,
+            query,
+            "tab",
+            upload,
+            FIELDS,
+            tolerance=tolerance,
+        )
+    assert service.uploads == [["Star"]]
+    assert sorted(table.main_id) == ["TIC 1", "TIC 2"]
+
+    # The cone was fetched, so it is then answered locally
+    with patch("socket.setdefaulttimeout"):
+        table = instance.query(
+            service,
+            query,
+            "tab",
+            upload,
+            FIELDS,
+            tolerance=tolerance,
+        )
+    assert len(service.uploads) == 1
+    assert sorted(table.main_id) == ["TIC 1", "TIC 2"]
+
+
+def test__query(instance):
+    query = 'SELECT tc.*, RAJ2000 as ra_2, DEJ2000 as dec_2, GAIA, UCAC4, "2MASS", WISEA, TIC, KIC, HIP, TYC  FROM "IV/39/tic82" AS db JOIN TAP_UPLOAD.t1 AS tc ON db.TIC = tc.host'
+    upload = pd.DataFrame({"host": [100, 300]})
+
+    service = LocalTICService()
+    with patch("socket.setdefaulttimeout"):
+        direct = UtilityFunctions.perform_query(
+            service, query, uploads_dict={"t1": Table.from_pandas(upload)}
+        )
+
+    # The first query goes to the service, and the result is stored
+    service = LocalTICService()
+    with patch("socket.setdefaulttimeout"):
+        table = instance.query(service, query, "t1", upload, FIELDS, column="host")
+    assert service.uploads == [[100, 300]]
+    assert_frame_equal(table, direct)
+    assert table.at[0, "main_id"] == "TIC 100"
+    assert table.at[0, "ids"].startswith("UCAC4 206-182296,2MASS J20260027-4855132,")
+
+    # Later, only the missing stars are queried
+    upload = pd.DataFrame({"host": [200, 100, 300]})
+    with patch("socket.setdefaulttimeout"):
+        table = instance.query(service, query, "t1", upload, FIELDS, column="host")
+    assert service.uploads[1:] == [[200, 300]]
+    assert list(table.main_id) == ["TIC 200", "TIC 100"]
+
+    # Without refresh, the service is not queried
+    instance.refresh = False
+    with patch("socket.setdefaulttimeout"):
+        table = instance.query(service, query, "t1", upload, FIELDS, column="host")
+    assert len(service.uploads) == 2
+    assert list(table.main_id) == ["TIC 200", "TIC 100"]
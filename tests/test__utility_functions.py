@@ -1,5 +1,8 @@
 import gzip
+import math
 import os
+import shutil
+import threading
 import xml.etree.ElementTree as ElementTree
 from unittest.mock import patch, MagicMock
 
@@ -8,7 +11,10 @@ import pandas as pd
 from pandas._testing import assert_frame_equal
 
 import pyvo
+import requests
+from astropy.coordinates import SkyCoord
 from astropy.table import Table
+from exomercat.query_recorder import QueryRecorder
 from exomercat.utility_functions import UtilityFunctions
 import pytest
 
@@ -215,6 +221,41 @@ def test__get_common_nomenclature(instance):
     assert expected_constants == actual_constants
 
 
+def test__convert_to_categorical(instance):
+    frame1 = pd.DataFrame(
+        {
+            "catalog": ["nasa", "nasa"],
+            "binary": ["A", ""],
+            "letter": ["b", "c"],
+            "name": ["Kepler-1 A b", "Kepler-1 c"],
+        }
+    )
+    frame2 = pd.DataFrame(
+        {
+            "catalog": ["eu"],
+            "binary": ["B"],
+            "letter": ["BD"],
+            "name": ["HD 1 B"],
+        }
+    )
+    frame1, frame2 = instance.convert_to_categorical([frame1, frame2])
+
+    for col in ["catalog", "binary", "letter"]:
+        assert isinstance(frame1[col].dtype, pd.CategoricalDtype)
+        assert frame1[col].dtype == frame2[col].dtype
+    # Columns not in the list are untouched
+    assert frame1["name"].dtype == object
+    # Categories are shared, so the concatenation stays categorical
+    data = pd.concat([frame1, frame2])
+    assert isinstance(data["catalog"].dtype, pd.CategoricalDtype)
+    assert list(data["catalog"].cat.categories) == ["eu", "nasa"]
+    # Values written later by the pipeline are already valid categories
+    for value in ["S-type", "Rogue", "N"]:
+        assert value in data["binary"].cat.categories
+    assert "BD" in data["letter"].cat.categories
+    assert list(data["binary"].astype(str)) == ["A", "", "B"]
+
+
 def test__read_config(instance, tmp_path):
     original_dir = os.getcwd()
 
@@ -650,7 +691,14 @@ def test__convert_xmlfile_to_csvfile(instance):
     assert "No such file or directory" in str(e.value)
 
 
-def test__convert_discovery_methods(instance):
+def test__convert_discovery_methods(instance, tmp_path):
+    # Use the synonyms shipped in the replacements.ini file of the repository
+    original_dir = os.getcwd()
+    shutil.copy(
+        os.path.join(os.path.dirname(os.path.dirname(__file__)), "replacements.ini"),
+        tmp_path,
+    )
+    os.chdir(tmp_path)
     # Sample data
     data = pd.DataFrame(
         {
@@ -707,6 +755,43 @@ def test__convert_discovery_methods(instance):
 
     # Check if the result matches the expected output
     assert result.equals(expected_result)
+    os.chdir(original_dir)
+
+
+def test__get_discovery_method_mapping(instance, tmp_path):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+
+    # Without a replacements.ini file, only the standardized values are known
+    mapping = instance.get_discovery_method_mapping()
+    assert mapping["transit"] == "Transit"
+    assert mapping["radial velocity"] == "Radial Velocity"
+    assert "primary transit" not in mapping
+    assert "rv" not in mapping
+    assert all(key == key.casefold() for key in mapping.keys())
+
+    # The DISCOVERYMETHOD section is the only source of synonyms
+    with open("replacements.ini", "w") as config_file:
+        config_file.write("[DISCOVERYMETHOD]\n")
+        config_file.write("Doppler = Radial Velocity\n")
+        config_file.write("Orbital Brightness Modulation = Transit\n")
+    mapping = instance.get_discovery_method_mapping()
+    assert mapping["doppler"] == "Radial Velocity"
+    assert mapping["orbital brightness modulation"] == "Transit"
+    assert "primary transit" not in mapping
+
+    data = pd.DataFrame(
+        {"discovery_method": ["DOPPLER", "Transit", "TRANSIT", "Unknown", np.nan]}
+    )
+    result = instance.convert_discovery_methods(data)
+    assert list(result.discovery_method) == [
+        "Radial Velocity",
+        "Transit",
+        "Transit",
+        "Unknown",
+        "",
+    ]
+    os.chdir(original_dir)
 
 
 def test__perform_query(instance):
@@ -990,6 +1075,340 @@ def test__perform_query(instance):
     assert_frame_equal(table, expected)
 
 
+class LocalTAPService:
+    """Stand-in for a TAP service that joins the uploaded names with a local table."""
+
+    def __init__(self, fail_first=0, error=None):
+        self.fail_first = fail_first
+        if error is None:
+            error = pyvo.dal.DALServiceError("Service unavailable", code=503)
+        self.error = error
+        self.uploads = []
+        self.lock = threading.Lock()
+
+    def run_sync(self, query, uploads=None, timeout=None):
+        with self.lock:
+            self.uploads.append(len(uploads["tab"]))
+            if self.fail_first > 0:
+                self.fail_first -= 1
+                raise self.error
+        upload = uploads["tab"].to_pandas()
+        result = pd.DataFrame(
+            {
+                "host": upload["host"],
+                "main_id": "* " + upload["host"],
+                "ra_2": np.arange(len(upload), dtype=float),
+                "dec_2": 0.0,
+                "ids": upload["host"],
+            }
+        )
+        result = result[~result.host.str.startswith("unknown")]
+        response = MagicMock()
+        response.__len__.return_value = len(result)
+        response.to_table.return_value = Table.from_pandas(result)
+        return response
+
+
+def test__perform_query_chunks(instance):
+    hosts = ["star " + str(i) for i in range(10)] + ["unknown 1"]
+    upload = Table.from_pandas(pd.DataFrame({"host": hosts}))
+    query = "SELECT t.*, basic.main_id FROM TAP_UPLOAD.tab as t"
+
+    # Without chunks, the whole table is uploaded at once
+    service = LocalTAPService()
+    with patch("socket.setdefaulttimeout"):
+        full = instance.perform_query(
+            service, query, uploads_dict={"tab": upload}, chunk_size=None
+        )
+    assert service.uploads == [11]
+    assert list(full.host) == hosts[:-1]
+    assert list(full.angsep) == [0.0] * 10
+
+    # Chunks are queried separately and concatenated in order
+    service = LocalTAPService()
+    with patch("socket.setdefaulttimeout"):
+        chunked = instance.perform_query(
+            service, query, uploads_dict={"tab": upload}, chunk_size=3, workers=2
+        )
+    assert sorted(service.uploads) == [2, 3, 3, 3]
+    assert list(chunked.host) == hosts[:-1]
+    assert list(chunked.main_id) == ["* " + host for host in hosts[:-1]]
+
+    # Failed chunks are retried
+    service = LocalTAPService(fail_first=2)
+    with patch("socket.setdefaulttimeout"), LogCapture() as log:
+        chunked = instance.perform_query(
+            service,
+            query,
+            uploads_dict={"tab": upload},
+            chunk_size=3,
+            workers=2,
+            backoff=0,
+        )
+        assert "retrying" in str(log)
+    assert len(service.uploads) == 6
+    assert list(chunked.host) == hosts[:-1]
+
+    # A chunk that keeps failing makes the query fail
+    service = LocalTAPService(fail_first=10)
+    with patch("socket.setdefaulttimeout"), pytest.raises(pyvo.dal.DALServiceError):
+        instance.perform_query(
+            service,
+            query,
+            uploads_dict={"tab": upload},
+            chunk_size=3,
+            retries=1,
+            backoff=0,
+        )
+
+
+def test__is_transient_error(instance):
+    assert instance.is_transient_error(
+        pyvo.dal.DALServiceError("Service unavailable", code=503)
+    )
+    assert instance.is_transient_error(pyvo.dal.DALServiceError("Too many", code=429))
+    assert instance.is_transient_error(
+        pyvo.dal.DALServiceError(
+            "Connection refused", cause=requests.exceptions.ConnectionError()
+        )
+    )
+    assert instance.is_transient_error(requests.exceptions.ReadTimeout())
+    assert instance.is_transient_error(TimeoutError())
+    assert not instance.is_transient_error(
+        pyvo.dal.DALServiceError("Bad request", code=400)
+    )
+    assert not instance.is_transient_error(pyvo.dal.DALServiceError("Unknown"))
+    assert not instance.is_transient_error(pyvo.dal.DALQueryError("Syntax error"))
+    assert not instance.is_transient_error(pyvo.dal.DALFormatError(ValueError()))
+    assert not instance.is_transient_error(ValueError())
+
+
+def test__perform_query_not_retried(instance):
+    # A query error is raised immediately, without retrying
+    upload = Table.from_pandas(pd.DataFrame({"host": ["star 1"]}))
+    service = LocalTAPService(
+        fail_first=10, error=pyvo.dal.DALQueryError("Syntax error")
+    )
+    with patch("socket.setdefaulttimeout"), patch("time.sleep") as sleep:
+        with pytest.raises(pyvo.dal.DALQueryError):
+            instance.perform_query(
+                service,
+                "SELECT t.* FROM TAP_UPLOAD.tab AS t",
+                uploads_dict={"tab": upload},
+            )
+    assert service.uploads == [1]
+    assert sleep.call_count == 0
+
+
+def test__perform_query_recorded(instance, tmp_path):
+    upload = Table.from_pandas(pd.DataFrame({"host": ["star 1", "unknown 1"]}))
+    query = "SELECT t.*, basic.main_id FROM TAP_UPLOAD.tab as t"
+    folder = os.path.join(str(tmp_path), "Recordings")
+    try:
+        UtilityFunctions.query_recorder = QueryRecorder(folder, mode="record")
+        service = LocalTAPService()
+        with patch("socket.setdefaulttimeout"):
+            recorded = instance.perform_query(
+                service, query, uploads_dict={"tab": upload}
+            )
+        assert service.uploads == [2]
+
+        # The replayed result is processed in the same way, without querying
+        UtilityFunctions.query_recorder = QueryRecorder(folder, mode="replay")
+        service = LocalTAPService()
+        with patch("socket.setdefaulttimeout"):
+            replayed = instance.perform_query(
+                service, query, uploads_dict={"tab": upload}
+            )
+        assert service.uploads == []
+        assert_frame_equal(replayed, recorded)
+        assert list(replayed.main_id) == ["* star 1"]
+    finally:
+        UtilityFunctions.query_recorder = None
+
+
+def test__calculate_angsep(instance):
+    table = pd.DataFrame(
+        {
+            "hostbinary": ["HD 1", "HD 1", "HD 1", "HD 2", "HD 3", "HD 3", "HD 3"],
+            "ra": ["10.0", "10.0", "10.0", "20.0", "30.0", "30.0", "30.0"],
+            "dec": ["0.0"] * 7,
+            "ra_2": ["10.0", "10.0001", "10.0002", "20.0001", "30.0002", "30.0001", "30.0001"],
+            "dec_2": ["0.0"] * 7,
+            "main_id": ["HD 1 b", "HD 1", "HD 1A", "HD 2 b", "HD 3", "HD 3B", "HD 3C"],
+        }
+    )
+    table = instance.calculate_angsep(table)
+    # The closest entry that is not a planet, unless it is the only one
+    assert list(table.index) == [1, 3, 5]
+    assert list(table.main_id) == ["HD 1", "HD 2 b", "HD 3B"]
+    assert np.allclose(table.angsep, [0.36, 0.36, 0.36])
+    assert list(table.selected) == [1, 1, 1]
+    assert table.ra.dtype == float
+
+    # Groups made only of planets are not selected
+    table = pd.DataFrame(
+        {
+            "hostbinary": ["HD 1", "HD 1"],
+            "ra": [1.0, 1.0],
+            "dec": [1.0, 1.0],
+            "ra_2": [1.0, 1.0],
+            "dec_2": [1.0, 1.0],
+            "main_id": ["HD 1 b", "HD 1 c"],
+        }
+    )
+    assert len(instance.calculate_angsep(table)) == 0
+
+
+def test__select_uploaded_rows(instance):
+    table = pd.DataFrame(
+        {
+            "hostbinary": ["51 Peg", "51 Peg", "HD 1", "HD 2"],
+            "ra": ["344.3667", "344.3667", "1.5", "2.5"],
+            "dec": ["20.7689", "20.7689", "-1.5", "2.5"],
+            "main_id": ["*  51 Peg", "*  51 Peg b", "HD 1", "HD 2"],
+        }
+    )
+    upload = pd.DataFrame(
+        {"hostbinary": ["51 Peg", "HD 2"], "ra": [344.3667, 2.0], "dec": [20.7689, 2.5]}
+    )
+    selected = instance.select_uploaded_rows(table, upload, ["hostbinary", "ra", "dec"])
+    # All the rows of an uploaded key are kept, other keys are dropped
+    assert list(selected.main_id) == ["*  51 Peg", "*  51 Peg b"]
+    assert list(selected.index) == [0, 1]
+
+    # Empty results are returned as they are
+    empty = pd.DataFrame()
+    assert instance.select_uploaded_rows(empty, upload, ["hostbinary"]) is empty
+
+
+def test__run_concurrently(instance):
+    barrier = threading.Barrier(2, timeout=5)
+
+    def first():
+        # Would time out if the functions were run one after the other
+        barrier.wait()
+        return 1
+
+    def second():
+        barrier.wait()
+        return 2
+
+    assert instance.run_concurrently([first, second]) == [1, 2]
+
+    def failing():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        instance.run_concurrently([failing])
+
+
+def test__group_mode(instance):
+    values = pd.Series([2.0, 1.0, 1.0, 5.0, 3.0, 4.0, np.nan, np.nan, 7.0], index=list("abcdefghi"))
+    groups = pd.Series([0, 0, 0, 1, 1, 1, 2, 2, 2], index=list("abcdefghi"))
+    modes = instance.group_mode(values, groups)
+    # The most common value, or the first one in case of ties, ignoring missing values
+    assert list(modes.index) == list("abcdefghi")
+    assert list(modes) == [1.0, 1.0, 1.0, 5.0, 5.0, 5.0, 7.0, 7.0, 7.0]
+
+
+def test__pairwise_separation(instance):
+    ra_1, dec_1 = [0.0, 359.9999, 120.0, 10.0], [0.0, 0.0, 89.9999, -45.0]
+    ra_2, dec_2 = [0.0001, 300.0, 10.0], [0.0, 89.9999, -45.0003]
+    separations = instance.pairwise_separation(ra_1, dec_1, ra_2, dec_2)
+    assert separations.shape == (4, 3)
+
+    expected = SkyCoord(ra_1, dec_1, unit="deg")[:, None].separation(
+        SkyCoord(ra_2, dec_2, unit="deg")[None, :]
+    )
+    assert np.allclose(separations, expected.deg, rtol=1e-9, atol=1e-12)
+    # Across RA = 0 and at the pole
+    assert math.isclose(separations[1, 0], 0.0002, rel_tol=1e-9)
+    assert math.isclose(separations[2, 1], 0.0002, rel_tol=1e-6)
+    assert instance.pairwise_separation([], [], ra_2, dec_2).shape == (0, 3)
+
+    vectors = instance.sky_unit_vectors([0.0, 90.0], [0.0, 90.0])
+    assert np.allclose(vectors, [[1, 0, 0], [0, 0, 1]])
+
+
+def test__angular_separation(instance):
+    ra_1 = [0.0, 10.0, 359.9999, 180.0]
+    dec_1 = [0.0, 20.0, 0.0, 89.9999]
+    ra_2 = [0.0001, 10.0, 0.0001, 0.0]
+    dec_2 = [0.0, 20.0002, 0.0, 89.9999]
+    separations = instance.angular_separation(ra_1, dec_1, ra_2, dec_2)
+    expected = SkyCoord(ra_1, dec_1, unit="deg").separation(
+        SkyCoord(ra_2, dec_2, unit="deg")
+    )
+    assert np.allclose(separations, expected.deg, rtol=1e-9, atol=1e-12)
+    # Scalars are broadcast
+    assert np.allclose(
+        instance.angular_separation(0.0, 0.0, [0.0, 90.0], [1.0, 0.0]), [1.0, 90.0]
+    )
+
+
+def test__cone_boxes(instance):
+    (min_ra, max_ra), = instance.cone_boxes(10.0, 0.0, 1 / 3600)
+    assert min_ra <= 10.0 - 1 / 3600 and max_ra >= 10.0 + 1 / 3600
+    # The box is wider at higher declinations
+    (min_ra, max_ra), = instance.cone_boxes(10.0, 60.0, 1 / 3600)
+    assert max_ra - min_ra > 2 * 2 / 3600 * 0.99
+    # Boxes crossing RA = 0 are split in two
+    assert len(instance.cone_boxes(0.0001, 0.0, 1 / 3600)) == 2
+    assert instance.cone_boxes(359.9999, 0.0, 1 / 3600)[1][0] == 0.0
+    # Cones containing a pole span all right ascensions
+    assert instance.cone_boxes(180.0, 89.9999, 1 / 3600) == [(0.0, 360.0)]
+
+
+def test__connected_components(instance):
+    components = instance.connected_components(
+        ["e", "d", "c", "b", "a", "f"], [("e", "c"), ("d", "b"), ("b", "e"), ("g", "f")]
+    )
+    # Each component is represented by its smallest node
+    assert components == {
+        "a": "a",
+        "b": "b",
+        "c": "b",
+        "d": "b",
+        "e": "b",
+        "f": "f",
+        "g": "f",
+    }
+    assert instance.connected_components([], []) == {}
+
+
+def test__main_id_letter_candidates(instance):
+    candidates = instance.main_id_letter_candidates(
+        [
+            "NAME V672 Lyr b",
+            "HD 1",
+            "*  51 Peg (AB)",
+            "* 51 PegAB",
+            "BD+18  2050B",
+            "*  30 Ari B",
+            "Kepler-1 c",
+        ]
+    )
+    assert list(candidates.identifier) == [
+        "NAME V672 Lyr b",
+        "*  51 Peg (AB)",
+        "* 51 PegAB",
+        "BD+18  2050B",
+        "*  30 Ari B",
+        "Kepler-1 c",
+    ]
+    assert list(candidates.new_identifier) == [
+        "V672 Lyr",
+        "*  51 Peg",
+        "* 51 Peg",
+        "BD+18  2050",
+        "*  30 Ari",
+        "Kepler-1",
+    ]
+    assert list(candidates.binary) == [None, "AB", "AB", "B", "B", None]
+    assert len(instance.main_id_letter_candidates([])) == 0
+
+
 def test__load_standardized_catalog(tmp_path):
     original_dir = os.getcwd()
     os.chdir(tmp_path)
@@ -1031,6 +1450,27 @@ def test__load_standardized_catalog(tmp_path):
     os.chdir(original_dir)
 
 
+def test__concatenate_log_files(instance, tmp_path):
+    original_dir = os.getcwd()
+    os.chdir(tmp_path)
+
+    with open("log.txt", "w") as f:
+        f.write("previous\n")
+    for name in ["nasa", "eu"]:
+        with open("log_" + name + ".txt", "w") as f:
+            f.write(name + "\n")
+
+    instance.concatenate_log_files(
+        ["log_eu.txt", "log_missing.txt", "log_nasa.txt"], "log.txt"
+    )
+    with open("log.txt") as f:
+        assert f.read() == "previous\neu\nnasa\n"
+    assert not os.path.exists("log_eu.txt")
+    assert not os.path.exists("log_nasa.txt")
+
+    os.chdir(original_dir)
+
+
 def test__ping_simbad_vizier():
     # SUCCESS
     #
@@ -1093,4 +1533,50 @@ columns=['hostbinary', 'host', 'main_id', 'ra_2', 'dec_2', 'ids'])
 
         # Check the output
         assert 'Ping to SIMBAD\t\t\tFAILED.' in result
-        assert 'Ping to VizieR\t\t\tFAILED.' in result
\ No newline at end of file
+        assert 'Ping to VizieR\t\t\tFAILED.' in result
+
+def test__normalize_query_result(instance):
+    assert_frame_equal(instance.normalize_query_result(pd.DataFrame()), pd.DataFrame())
+
+    # SIMBAD results: strings are stripped, other values are kept
+    table = pd.DataFrame(
+        {
+            "host": [" 51 Peg ", "unknown"],
+            "main_id": ["*  51 Peg ", ""],
+            "ra_2": [344.366585, np.nan],
+            "flag": pd.Series([None, 1], dtype=object),
+        }
+    )
+    table = instance.normalize_query_result(table)
+    assert list(table.host) == ["51 Peg"]
+    assert list(table.main_id) == ["*  51 Peg"]
+    assert table.at[0, "ra_2"] == 344.366585
+    assert table.at[0, "flag"] is None
+    assert list(table.angsep) == [0.0]
+
+    # TIC results: missing identifiers are dropped from the list of identifiers
+    table = Table.from_pandas(
+        pd.DataFrame(
+            {
+                "host": ["TOI-1", "TOI-2", "TOI-3"],
+                "TIC": pd.array([1, 2, None], dtype="Int64"),
+                "ra_2": [10.0, 20.0, 30.0],
+                "GAIA": pd.array([123, None, 5], dtype="Int64"),
+                "UCAC4": ["", "206-182296 ", "1"],
+                "2MASS": ["20260027-4855132", "", "2"],
+                "WISEA": [np.nan, np.nan, "3"],
+                "KIC": pd.array([None, None, None], dtype="Int64"),
+                "HIP": pd.array([None, 7, None], dtype="Int64"),
+                "TYC": ["", "", ""],
+            }
+        )
+    ).to_pandas()
+    table = instance.normalize_query_result(table)
+    assert list(table.main_id) == ["TIC 1", "TIC 2"]
+    assert list(table.ids) == [
+        "2MASS J20260027-4855132,Gaia DR2 123",
+        "UCAC4 206-182296,HIP 7",
+    ]
+    assert list(table.GAIA) == ["Gaia DR2 123", ""]
+    assert list(table.KIC) == ["", ""]
+    assert list(table.ra_2) == ["10.0", "20.0"]